@@ -0,0 +1,55 @@
+#! /usr/bin/env python3
+"""
+Measure the time needed to compute dominance analyses on big synthetic CFGs.
+
+Run it with: python -m benchmarks.dominance [--size N]
+"""
+
+import argparse
+import time
+
+from decompil.analysis import dominance
+
+from benchmarks import synthetic_cfg
+
+
+parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+parser.add_argument(
+    '--size', type=int, default=10000,
+    help='Number of basic blocks in the synthetic CFG (default: 10000)'
+)
+parser.add_argument(
+    '--seed', type=int, default=0,
+    help='Seed for the synthetic CFG generation (default: 0)'
+)
+parser.add_argument(
+    '--repeat', type=int, default=3,
+    help='Number of runs for each analysis; the best is kept (default: 3)'
+)
+
+
+def measure(analysis, func, repeat):
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        analysis(func)
+        duration = time.perf_counter() - start_time
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def main(args):
+    func = synthetic_cfg.generate(args.size, args.seed)
+    print('{} basic blocks'.format(len(func)))
+    for analysis in (
+        dominance.get_dominator_tree,
+        dominance.get_dominance_frontiers,
+    ):
+        print('{:<24} {:.3f}s'.format(
+            analysis.__name__, measure(analysis, func, args.repeat)
+        ))
+
+
+if __name__ == '__main__':
+    main(parser.parse_args())
@@ -0,0 +1,145 @@
+#! /usr/bin/env python3
+"""
+Compare the speed of the reference interpreter, of compiled functions and of
+batched functions.
+
+Run it with: python -m benchmarks.interpreter [--iterations N] [--lanes N]
+"""
+
+import argparse
+import random
+import time
+
+import gcdsp
+from decompil import batch, builder, compiler, interpreter
+from decompil.interpreter import LiveValue
+
+
+parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+parser.add_argument(
+    '--iterations', type=int, default=20000,
+    help='Number of loop iterations in the interpreted function'
+         ' (default: 20000)'
+)
+parser.add_argument(
+    '--lanes', type=int, default=2000,
+    help='Number of register states for batched execution (default: 2000)'
+)
+
+
+def build_loop(context):
+    """
+    Build a function that loops ar0 times, computing a checksum in ac0.m
+    from ar1.
+    """
+    func = context.create_function(0)
+    counter_reg, value_reg, result_reg = (
+        context.registers[0x00], context.registers[0x01],
+        context.registers[0x1e]
+    )
+    half_type = context.half_type
+    bld = builder.Builder()
+    bld.position_at_end(func.entry)
+
+    bb_cond = bld.create_basic_block()
+    bb_loop = bld.create_basic_block()
+    bb_end = bld.create_basic_block()
+
+    bld.build_rstore(result_reg, half_type.create(0))
+    bld.build_jump(bb_cond)
+
+    bld.position_at_end(bb_cond)
+    bld.build_branch(
+        bld.build_ne(bld.build_rload(counter_reg), half_type.create(0)),
+        bb_loop, bb_end
+    )
+
+    bld.position_at_end(bb_loop)
+    counter = bld.build_rload(counter_reg)
+    value = bld.build_xor(
+        bld.build_mul(bld.build_rload(value_reg), half_type.create(3)),
+        bld.build_lshr(counter, half_type.create(2))
+    )
+    bld.build_rstore(value_reg, value)
+    bld.build_rstore(result_reg, bld.build_add(
+        bld.build_rload(result_reg),
+        bld.build_ashr(value, half_type.create(1))
+    ))
+    bld.build_rstore(
+        counter_reg, bld.build_sub(counter, half_type.create(1))
+    )
+    bld.build_jump(bb_cond)
+
+    bld.position_at_end(bb_end)
+    bld.build_ret()
+    return func
+
+
+def measure(run, context, iterations):
+    registers = {
+        context.registers[0x00]: LiveValue(context.half_type, iterations),
+        context.registers[0x01]: LiveValue(context.half_type, 1),
+    }
+    start_time = time.perf_counter()
+    run(registers)
+    return time.perf_counter() - start_time, registers
+
+
+def main(args):
+    context = gcdsp.Context()
+    func = build_loop(context)
+
+    ref_time, ref_regs = measure(
+        lambda regs: interpreter.Interpreter(func, regs),
+        context, args.iterations
+    )
+    compiled = compiler.compile_function(func)
+    compiled_time, compiled_regs = measure(
+        compiled.run, context, args.iterations
+    )
+    assert ref_regs == compiled_regs
+
+    print('Interpreter:       {:.3f}s'.format(ref_time))
+    print('CompiledFunction:  {:.3f}s ({:.1f}x faster)'.format(
+        compiled_time, ref_time / compiled_time
+    ))
+
+    # Run the loop for many register states, with a different number of
+    # iterations in each one.
+    rng = random.Random(0)
+    inputs = [
+        (rng.randrange(32), rng.getrandbits(16)) for _ in range(args.lanes)
+    ]
+    start_time = time.perf_counter()
+    lanes_regs = []
+    for iterations, value in inputs:
+        registers = {
+            context.registers[0x00]: LiveValue(context.half_type, iterations),
+            context.registers[0x01]: LiveValue(context.half_type, value),
+        }
+        compiled.run(registers)
+        lanes_regs.append(registers)
+    compiled_time = time.perf_counter() - start_time
+
+    batched = batch.compile_batched_function(func)
+    registers = {
+        context.registers[0x00]: [iterations for iterations, _ in inputs],
+        context.registers[0x01]: [value for _, value in inputs],
+    }
+    start_time = time.perf_counter()
+    batched.run(registers)
+    batched_time = time.perf_counter() - start_time
+    for i, lane_regs in enumerate(lanes_regs):
+        for reg, value in lane_regs.items():
+            assert registers[reg][i] == value.value
+
+    print()
+    print('{} register states:'.format(args.lanes))
+    print('CompiledFunction:  {:.3f}s'.format(compiled_time))
+    print('BatchedFunction:   {:.3f}s ({:.1f}x faster)'.format(
+        batched_time, compiled_time / batched_time
+    ))
+
+
+if __name__ == '__main__':
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+#! /usr/bin/env python3
+"""
+Measure the memory used by the IR of a decompiled synthetic ROM.
+
+Run it with: python -m benchmarks.ir_memory [--size N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import gcdsp
+from decompil.disassemblers import EntryDisassembler
+from decompil.optimizations.manager import PassManager
+
+from benchmarks import synthetic_rom
+
+
+parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+parser.add_argument(
+    '--size', type=int, default=1000,
+    help='Number of instructions in the synthetic ROM (default: 1000)'
+)
+parser.add_argument(
+    '--seed', type=int, default=0,
+    help='Seed for the synthetic ROM generation (default: 0)'
+)
+
+
+def count_instructions(context):
+    return sum(
+        len(bb)
+        for func in context.functions.values()
+        for bb in func
+    )
+
+
+def main(args):
+    rom = gcdsp.RomImage(synthetic_rom.generate(args.size, args.seed))
+
+    tracemalloc.start()
+    start_time = time.time()
+    context = gcdsp.Context()
+    EntryDisassembler(context, gcdsp.Decoder(rom), 0).process()
+    # Measure only what is still reachable.
+    gc.collect()
+    decoded_size, _ = tracemalloc.get_traced_memory()
+    decoded_insns = count_instructions(context)
+    decoded_time = time.time() - start_time
+
+    pass_manager = PassManager('ssa')
+    for func in context.functions.values():
+        pass_manager.run(func)
+    gc.collect()
+    ssa_size, peak_size = tracemalloc.get_traced_memory()
+    ssa_insns = count_instructions(context)
+    ssa_time = time.time() - start_time
+    tracemalloc.stop()
+
+    print('Decoded: {} instructions, {:.1f} KiB ({:.0f} bytes/insn), {:.2f}s'
+        .format(decoded_insns, decoded_size / 1024,
+                decoded_size / decoded_insns, decoded_time))
+    print('SSA:     {} instructions, {:.1f} KiB ({:.0f} bytes/insn), {:.2f}s'
+        .format(ssa_insns, ssa_size / 1024,
+                ssa_size / ssa_insns, ssa_time))
+    print('Peak:    {:.1f} KiB'.format(peak_size / 1024))
+
+
+if __name__ == '__main__':
+    main(parser.parse_args())
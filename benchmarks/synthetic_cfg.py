@@ -0,0 +1,38 @@
+"""
+Generation of synthetic control flow graphs, used by benchmarks.
+
+Generated functions contain only control flow: each basic block either jumps
+to the next one or branches to the next one and to a random other one. This
+produces long chains with many loops and joins, which is what the GC DSP
+decoder produces for big functions.
+"""
+
+import random
+
+from decompil import builder, ir
+
+
+def generate(size, seed=0, context=None):
+    """Return a synthetic function with `size` basic blocks."""
+    rng = random.Random(seed)
+    if context is None:
+        context = ir.Context(32)
+    func = context.create_function(0)
+    bld = builder.Builder()
+
+    basic_blocks = [func.entry]
+    for _ in range(size - 1):
+        basic_blocks.append(func.create_basic_block())
+
+    condition = context.boolean_type.create(1)
+    for i, bb in enumerate(basic_blocks[:-1]):
+        bld.position_at_end(bb)
+        if rng.random() < 0.5:
+            bld.build_jump(basic_blocks[i + 1])
+        else:
+            other = basic_blocks[rng.randrange(1, size)]
+            bld.build_branch(condition, basic_blocks[i + 1], other)
+
+    bld.position_at_end(basic_blocks[-1])
+    bld.build_ret()
+    return func
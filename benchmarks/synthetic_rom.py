@@ -0,0 +1,47 @@
+"""
+Generation of synthetic GC DSP ROMs, used by benchmarks.
+
+Generated ROMs contain a single straight-line function made of randomly
+picked instructions that the gcdsp package can decode, terminated by a RET.
+"""
+
+import random
+import struct
+
+import gcdsp
+
+
+def get_decodable_opcodes():
+    """Return the list of opcodes for instructions that gcdsp can decode."""
+    result = []
+    for opcode, (insn_pat, ext_pat) in enumerate(gcdsp.opcode_table):
+        if not is_decodable(insn_pat) or insn_pat.name == 'RET':
+            continue
+        if insn_pat.is_extended and not is_decodable(ext_pat):
+            continue
+        result.append(opcode)
+    return result
+
+
+def is_decodable(pat):
+    return (
+        pat is not None
+        and pat.decode.__name__ != 'default_decoder'
+    )
+
+
+def generate(size, seed=0):
+    """
+    Return the content of a ROM that contains `size` instructions (plus the
+    final RET) as a bytes object.
+    """
+    rnd = random.Random(seed)
+    opcodes = get_decodable_opcodes()
+    words = []
+    for _ in range(size):
+        opcode = rnd.choice(opcodes)
+        words.append(opcode)
+        if gcdsp.opcode_table[opcode][0].have_extra_operand:
+            words.append(rnd.randrange(1 << 16))
+    words.append(gcdsp.decoders.RET.opcode)
+    return b''.join(struct.pack('>H', word) for word in words)
@@ -1,9 +1,3 @@
-import collections
-import itertools
-
-from decompil.analysis.predecessors import get_predecessors
-
-
 class Tree:
     """General tree with both parent and children links."""
 
@@ -56,147 +50,248 @@ def parent_links_to_tree(parents):
     """Convert a mapping: node -> parent into a Tree."""
     tree = Tree()
 
-    def helper(node, parent):
-        """
-        Add `node` to `tree` as child of `parent` if it's not there already.
-        """
-        if node not in tree:
-            # Before we can add `node`, we have to make sure `parent` is
-            # already there.
-            if parent:
-                helper(parent, parents[parent])
-            tree.add(node, parent)
-
-    for node, parent in parents.items():
-        helper(node, parent)
+    for node in parents:
+        # Before we can add `node`, we have to make sure all its ancestors are
+        # already there: collect the missing ones and add them top-down.
+        missing = []
+        while node is not None and node not in tree:
+            missing.append(node)
+            node = parents[node]
+        for node in reversed(missing):
+            tree.add(node, parents[node])
 
     return tree
 
 
 def get_dfs_spanning_tree(func):
     dfs_tree = Tree()
-    dfs_numbers = {}
-    next_dfs_number = iter(itertools.count(0))
-
-    def build_helper(basic_block, parent=None):
-        if basic_block in dfs_numbers:
-            return
-        dfs_tree.add(basic_block, parent)
-        dfs_numbers[basic_block] = next(next_dfs_number)
-        for succ in basic_block.successors:
-            build_helper(succ, basic_block)
-
-    build_helper(func.entry)
+    dfs_numbers = {func.entry: 0}
+    dfs_tree.add(func.entry)
+
+    # Stack of (basic block, iterator on its successors) pairs for the basic
+    # blocks being visited.
+    stack = [(func.entry, iter(func.entry.successors))]
+    while stack:
+        basic_block, successors = stack[-1]
+        for succ in successors:
+            if succ not in dfs_numbers:
+                dfs_tree.add(succ, basic_block)
+                dfs_numbers[succ] = len(dfs_numbers)
+                stack.append((succ, iter(succ.successors)))
+                break
+        else:
+            stack.pop()
+
     return dfs_tree, dfs_numbers
 
 
-def get_dominator_tree(func):
-    """Return the dominance tree for basic blocks in func.
+def get_reverse_postorder(func):
+    """
+    Return the list of basic blocks in `func` that are reachable from its
+    entry, in reverse postorder. Like for interpreters, basic blocks without
+    terminator have no successor.
+    """
+    postorder = []
+    visited = {func.entry}
+
+    # Stack of (basic block, iterator on its successors) pairs for the basic
+    # blocks being visited.
+    stack = [(func.entry, iter(func.entry.get_successors(True)))]
+    while stack:
+        basic_block, successors = stack[-1]
+        for succ in successors:
+            if succ not in visited:
+                visited.add(succ)
+                stack.append((succ, iter(succ.get_successors(True))))
+                break
+        else:
+            stack.pop()
+            postorder.append(basic_block)
+
+    postorder.reverse()
+    return postorder
+
+
+def get_immediate_dominators(rpo):
+    """
+    Return the list of immediate dominators for basic blocks in `rpo`.
 
-    This tree is a dictionnary that maps basic blocks to their parent (their
-    immediate dominator).
+    `rpo` must be the list of reachable basic blocks in reverse postorder (see
+    get_reverse_postorder). Basic blocks are identified with their index in
+    `rpo`, both in the input and in the output. The entry basic block is its
+    own immediate dominator.
+    """
+    # Implementation is based on A Simple, Fast Dominance Algorithm, Keith D.
+    # Cooper, Timothy J. Harvey and Ken Kennedy. Working on reverse postorder
+    # indexes makes the "intersect" step simple: a dominator always has a
+    # smaller index than the basic blocks it dominates.
+
+    ids = {bb: i for i, bb in enumerate(rpo)}
+    # For each basic block, the list of its reachable predecessors.
+    predecessors = [
+        [ids[pred] for pred in bb.predecessors if pred in ids]
+        for bb in rpo
+    ]
+
+    idoms = [None] * len(rpo)
+    idoms[0] = 0
+
+    changed = True
+    while changed:
+        changed = False
+        for i in range(1, len(rpo)):
+            new_idom = None
+            for pred in predecessors[i]:
+                if idoms[pred] is None:
+                    continue
+                elif new_idom is None:
+                    new_idom = pred
+                    continue
+
+                # Look for the nearest common dominator for `pred` and the
+                # current candidate.
+                finger_1, finger_2 = pred, new_idom
+                while finger_1 != finger_2:
+                    while finger_1 > finger_2:
+                        finger_1 = idoms[finger_1]
+                    while finger_2 > finger_1:
+                        finger_2 = idoms[finger_2]
+                new_idom = finger_1
+
+            if idoms[i] != new_idom:
+                idoms[i] = new_idom
+                changed = True
+
+    return idoms
+
+
+class DominatorTree(Tree):
     """
-    # Implementation is based on Modern Compiler Implementation, Andew W.
-    # Appel, Chapter 19 Static Single-Assignment Form, algorithms 19.9 and
-    # 19.10 (naive versions).
-
-    predecessors = get_predecessors(func)
-
-    dfs_tree, dfs_numbers = get_dfs_spanning_tree(func)
-    # Mapping: basic block -> its immediate dominator. Once completely built,
-    # we can build the dominator tree from it.
-    imm_dominators = {}
-
-    # Mapping: basic block -> semidominator
-    semidominators = {}
-    # Mapping: basic_block -> ??? TODO
-    ancestors = {}
-    # Mapping: basic_block -> ??? TODO
-    buckets = collections.defaultdict(set)
-    # Mapping: basic_block -> ??? TODO
-    same_dominators = {}
-
-    def ancestor_with_lowest_semi_no(basic_block):
-        result = basic_block
-        while result not in ancestors:
-            bb_semi = semidominators.get(basic_block, None)
-            result_semi = semidominators.get(result, None)
-            if (dfs_numbers.get(bb_semi, 0)
-                < dfs_numbers.get(result_semi, 0)
-            ):
-                result = basic_block
-            result = ancestors[result]
-        return result
-
-    basic_blocks_dfs_order = list(sorted(
-        (dfs_number, basic_block)
-        for basic_block, dfs_number in dfs_numbers.items()
-    ))
-
-    for i, basic_block in reversed(basic_blocks_dfs_order):
-        if i == 0:
-            imm_dominators[basic_block] = None
-            continue
-        parent = dfs_tree.get_parent(basic_block)
-
-        # Compute the semi-dominator for basic_block.
-        semi_candidate = parent
-        semi_candidate_number = dfs_numbers[semi_candidate]
-
-        for pred in predecessors[basic_block]:
-            s = (
-                pred
-                if dfs_numbers[pred] <= i else
-                semidominators.get(ancestor_with_lowest_semi_no(pred), None)
-            )
-            s_no = dfs_numbers[s]
-            if s_no < semi_candidate_number:
-                semi_candidate, semi_candidate_number = s, s_no
-
-        semidominators[basic_block] = semi_candidate
-        buckets[semi_candidate].add(basic_block)
-        ancestors[basic_block] = parent
-
-        for bb in buckets[parent]:
-            y = ancestor_with_lowest_semi_no(bb)
-            if semidominators[y] == semidominators[bb]:
-                imm_dominators[bb] = parent
+    Dominator tree for the basic blocks of a function that are reachable from
+    its entry.
+
+    On top of the Tree interface, this provides constant time dominance
+    queries: each node is numbered when a depth-first walk of the tree enters
+    and leaves it, so a node dominates another one if and only if its
+    [enter, leave] interval contains the other's.
+    """
+
+    def __init__(self, rpo, idoms):
+        """
+        Build the tree from a list of basic blocks in reverse postorder and
+        the corresponding list of immediate dominators (see
+        get_immediate_dominators).
+        """
+        super(DominatorTree, self).__init__()
+
+        # Reachable basic blocks in reverse postorder, and the reverse mapping
+        # (basic block -> index in `rpo`).
+        self.rpo = rpo
+        self.ids = {bb: i for i, bb in enumerate(rpo)}
+        # For each basic block index, the index of its immediate dominator
+        # (the entry is its own immediate dominator).
+        self.idoms = idoms
+
+        # Immediate dominators come before the basic blocks they dominate in
+        # reverse postorder, so parents are always added before their
+        # children.
+        self.add(rpo[0])
+        for i in range(1, len(rpo)):
+            self.add(rpo[i], rpo[idoms[i]])
+
+        # For each basic block index, the numbers of the steps at which the
+        # walk enters and leaves the corresponding node.
+        self.enter = [None] * len(rpo)
+        self.leave = [None] * len(rpo)
+        children = [[] for _ in rpo]
+        for i in range(1, len(rpo)):
+            children[idoms[i]].append(i)
+
+        step = 0
+        self.enter[0] = step
+        stack = [(0, iter(children[0]))]
+        while stack:
+            node, node_children = stack[-1]
+            step += 1
+            for child in node_children:
+                self.enter[child] = step
+                stack.append((child, iter(children[child])))
+                break
             else:
-                same_dominators[bb] = y
-        buckets[parent] = set()
-
-    for i, basic_block in basic_blocks_dfs_order[1:]:
-        try:
-            same_dom = same_dominators[basic_block]
-        except KeyError:
-            pass
-        else:
-            imm_dominators[basic_block] = imm_dominators[same_dom]
+                self.leave[node] = step
+                stack.pop()
 
-    return parent_links_to_tree(imm_dominators)
+    def get_idom(self, basic_block):
+        """
+        Return the immediate dominator of `basic_block`, or None for the
+        entry.
+        """
+        return self.get_parent(basic_block)
+
+    def dominates(self, dominator, basic_block):
+        """Return whether `dominator` dominates `basic_block`."""
+        dom_id = self.ids[dominator]
+        bb_id = self.ids[basic_block]
+        return (
+            self.enter[dom_id] <= self.enter[bb_id]
+            and self.leave[bb_id] <= self.leave[dom_id]
+        )
+
+    def strictly_dominates(self, dominator, basic_block):
+        """
+        Return whether `dominator` dominates `basic_block` and is not
+        `basic_block` itself.
+        """
+        return (
+            dominator is not basic_block
+            and self.dominates(dominator, basic_block)
+        )
 
+    def is_ancestor(self, value, ancestor):
+        return self.strictly_dominates(ancestor, value)
+
+    def get_frontiers(self):
+        """Return a mapping: basic_block -> dominance frontier."""
+        # Implementation is based on A Simple, Fast Dominance Algorithm, Keith
+        # D. Cooper, Timothy J. Harvey and Ken Kennedy: walk up the dominator
+        # tree from each predecessor of a join point until reaching its
+        # immediate dominator. Every basic block on the way has the join point
+        # in its frontier.
+        rpo = self.rpo
+        ids = self.ids
+        idoms = self.idoms
+        frontiers = [set() for _ in rpo]
+
+        for i, bb in enumerate(rpo):
+            # The entry has no immediate dominator: runners go up to the root
+            # of the tree.
+            stop = idoms[i] if i > 0 else None
+            for pred in bb.predecessors:
+                runner = ids.get(pred)
+                if runner is None:
+                    # Unreachable predecessor
+                    continue
+                while runner != stop:
+                    frontiers[runner].add(bb)
+                    runner = idoms[runner] if runner > 0 else None
+
+        return {bb: frontiers[i] for i, bb in enumerate(rpo)}
 
-def get_dominance_frontiers(func):
-    """Return a mapping: basic_block -> dominance frontier."""
-    # Implementation is based on Modern Compiler Implementation, Andew W.
-    # Appel, Chapter 19 Static Single-Assignment Form.
 
-    result = {}
-    dom_tree = get_dominator_tree(func)
+def get_dominator_tree(func):
+    """
+    Return the dominator tree for basic blocks in func.
+
+    Only basic blocks that are reachable from the entry are in this tree.
+    """
+    rpo = get_reverse_postorder(func)
+    return DominatorTree(rpo, get_immediate_dominators(rpo))
+
 
-    def process_node(basic_block):
-        df = set()
-        # First compute DF_local[basic_block].
-        for bb in basic_block.successors:
-            if dom_tree.get_parent(bb) != basic_block:
-                df.add(bb)
-        for bb in dom_tree.get_children(basic_block):
-            process_node(bb)
-            # Compute DF_up[bb].
-            for bb_front in result[bb]:
-                if not dom_tree.is_ancestor(bb_front, basic_block):
-                    df.add(bb_front)
-        result[basic_block] = df
-
-    process_node(func.entry)
-    return dom_tree, result
+def get_dominance_frontiers(func):
+    """
+    Return the dominator tree for `func` and a mapping: basic_block ->
+    dominance frontier.
+    """
+    dom_tree = get_dominator_tree(func)
+    return dom_tree, dom_tree.get_frontiers()
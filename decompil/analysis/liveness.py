@@ -0,0 +1,135 @@
+from decompil import ir
+from decompil.analysis.dominance import get_reverse_postorder
+
+
+# Kinds for instructions that can read or write any register (see
+# RegistersToSSA.is_reg_barrier).
+BARRIER_KINDS = (ir.CALL, ir.RET, ir.UNDEF)
+
+
+class RegisterLiveness:
+    """
+    Registers that are live when entering and leaving each basic block.
+
+    Register sets are stored as integer bitsets: each register that is loaded
+    or stored in the function gets a bit (see `registers` and `indexes`).
+    Register barriers are considered as reading all these registers.
+    """
+
+    def __init__(self, func):
+        self.function = func
+
+        # List of registers the function accesses, and the reverse mapping:
+        # register -> bit index.
+        self.registers = []
+        self.indexes = {}
+
+        # Mapping: basic block -> bitset of registers that are live when
+        # entering it and when leaving it.
+        self.live_in = {}
+        self.live_out = {}
+
+        self._compute()
+
+    def _get_bit(self, register):
+        try:
+            index = self.indexes[register]
+        except KeyError:
+            index = len(self.registers)
+            self.registers.append(register)
+            self.indexes[register] = index
+        return 1 << index
+
+    def _compute(self):
+        # Mapping: basic block -> bitset of registers used before being
+        # defined in it (`gen`) and bitset of registers it defines before
+        # the first barrier (`kill`). Barriers make all registers not defined
+        # yet part of `gen`, but the set of all registers is known only once
+        # all basic blocks are scanned.
+        gen = {}
+        kill = {}
+        has_barrier = set()
+        for basic_block in self.function:
+            bb_gen = bb_kill = 0
+            for insn in basic_block:
+                if insn.kind == ir.RLOAD:
+                    bit = self._get_bit(insn.source)
+                    if not bb_kill & bit:
+                        bb_gen |= bit
+                elif insn.kind == ir.RSTORE:
+                    bb_kill |= self._get_bit(insn.destination)
+                elif insn.kind in BARRIER_KINDS:
+                    has_barrier.add(basic_block)
+                    break
+            gen[basic_block] = bb_gen
+            kill[basic_block] = bb_kill
+
+        all_registers = (1 << len(self.registers)) - 1
+        for basic_block in has_barrier:
+            gen[basic_block] |= all_registers & ~kill[basic_block]
+
+        # Regular backward data flow problem. Popping from the end of the
+        # reverse postorder processes successors before their predecessors as
+        # much as possible. Unreachable basic blocks come first so that they
+        # are processed last.
+        rpo = get_reverse_postorder(self.function)
+        reachable = set(rpo)
+        worklist = [bb for bb in self.function if bb not in reachable]
+        worklist.extend(rpo)
+        queued = set(worklist)
+
+        live_in = self.live_in
+        live_out = self.live_out
+        for basic_block in worklist:
+            live_in[basic_block] = 0
+        while worklist:
+            basic_block = worklist.pop()
+            queued.remove(basic_block)
+
+            bb_live_out = 0
+            for succ in basic_block.get_successors(True):
+                bb_live_out |= live_in[succ]
+            live_out[basic_block] = bb_live_out
+
+            bb_live_in = gen[basic_block] | (bb_live_out & ~kill[basic_block])
+            if bb_live_in != live_in[basic_block]:
+                live_in[basic_block] = bb_live_in
+                for pred in basic_block.predecessors:
+                    if pred not in queued:
+                        queued.add(pred)
+                        worklist.append(pred)
+
+    def to_set(self, bitset):
+        """Return the set of registers in `bitset`."""
+        result = set()
+        index = 0
+        while bitset:
+            if bitset & 1:
+                result.add(self.registers[index])
+            bitset >>= 1
+            index += 1
+        return result
+
+    def get_live_in(self, basic_block):
+        """Return the set of registers live when entering `basic_block`."""
+        return self.to_set(self.live_in[basic_block])
+
+    def get_live_out(self, basic_block):
+        """Return the set of registers live when leaving `basic_block`."""
+        return self.to_set(self.live_out[basic_block])
+
+    def is_live_in(self, basic_block, register):
+        bit = self.indexes.get(register)
+        return bit is not None and bool(self.live_in[basic_block] >> bit & 1)
+
+    def is_live_out(self, basic_block, register):
+        bit = self.indexes.get(register)
+        return bit is not None and bool(self.live_out[basic_block] >> bit & 1)
+
+
+def get_register_liveness(func):
+    """
+    Return the RegisterLiveness analysis for `func`: registers that are live
+    when entering and leaving its basic blocks.
+    """
+    return RegisterLiveness(func)
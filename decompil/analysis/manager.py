@@ -0,0 +1,50 @@
+from decompil.analysis.dominance import (
+    get_dominance_frontiers, get_dominator_tree
+)
+from decompil.analysis.predecessors import get_predecessors
+from decompil.analysis.uses import get_uses
+
+
+# Analyses that are only views on data the IR maintains by itself: they are
+# always up to date, so they are never invalidated.
+MAINTAINED_ANALYSES = frozenset((get_predecessors, get_uses))
+
+# Analyses that depend only on the control flow graph. Optimizations that do
+# not add, remove or rewire basic blocks preserve them.
+CFG_ANALYSES = frozenset((get_dominator_tree, get_dominance_frontiers))
+
+
+class AnalysisManager:
+    """
+    Cache for the results of analyses on some function.
+
+    Analyses are functions (for instance `get_dominance_frontiers`) that take
+    a function and return some result. The manager computes each result once
+    and keeps it until it is invalidated. Optimizations invalidate the
+    analyses they do not preserve (see Optimization); code that modifies the
+    function otherwise must call `invalidate` itself.
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+        # Mapping: analysis -> cached result
+        self.results = {}
+
+    def get(self, analysis):
+        """Return the result of `analysis`, computing it if needed."""
+        try:
+            return self.results[analysis]
+        except KeyError:
+            result = analysis(self.function)
+            self.results[analysis] = result
+            return result
+
+    def invalidate(self, preserved=frozenset()):
+        """Discard the results of all analyses that are not `preserved`."""
+        for analysis in list(self.results):
+            if (
+                analysis not in preserved
+                and analysis not in MAINTAINED_ANALYSES
+            ):
+                del self.results[analysis]
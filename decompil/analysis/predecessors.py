@@ -1,13 +1,38 @@
-from collections import defaultdict
+import collections.abc
 
 from decompil import ir
 
 
+class Predecessors(collections.abc.Mapping):
+    """
+    Mapping: basic block -> set-like view (dict keys) of its predecessors.
+
+    This is only a view on the predecessor maps the IR maintains (see
+    BasicBlock.predecessors), so it is always up to date. It contains all
+    the basic blocks of the function.
+    """
+
+    def __init__(self, func):
+        self.function = func
+
+    def __getitem__(self, bb):
+        return bb.predecessors.keys()
+
+    def __iter__(self):
+        return iter(self.function)
+
+    def __len__(self):
+        return len(self.function)
+
+    def __contains__(self, bb):
+        return bb in self.function.bb_indexes
+
+
 def get_predecessors(func, allow_incomplete=False):
-    """Compute and return all basic block predecessors as a mapping."""
+    """
+    Return all basic block predecessors as a mapping.
 
-    predecessors = defaultdict(set)
-    for bb in func:
-        for succ in bb.get_successors(allow_incomplete):
-            predecessors[succ].add(bb)
-    return predecessors
+    `allow_incomplete` is accepted for compatibility but has no effect:
+    basic blocks without terminator simply have no successor.
+    """
+    return Predecessors(func)
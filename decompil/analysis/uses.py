@@ -1,7 +1,22 @@
-from collections import defaultdict
-
 from decompil import ir
-from decompil.analysis.utils import get_inlined_insns
+
+
+class Uses:
+    """
+    Mapping: computing instruction -> set of instructions using it.
+
+    This is only a view on the use lists the IR maintains, so it is always up
+    to date.
+    """
+
+    def __init__(self, func):
+        self.function = func
+
+    def __getitem__(self, insn):
+        if isinstance(insn, ir.ComputingInstruction):
+            return insn.uses.keys()
+        else:
+            return frozenset()
 
 
 def get_uses(func):
@@ -9,13 +24,4 @@ def get_uses(func):
     Return the uses of all computing instructions in `func` as a mapping
     (computing instructions -> set of instructions using it).
     """
-
-    uses = defaultdict(set)
-    for bb in func:
-        for insn in bb:
-            for sub_insn in get_inlined_insns(insn):
-                for value in sub_insn.inputs:
-                    input = value.value
-                    if isinstance(input, ir.ComputingInstruction):
-                        uses[input].add(sub_insn)
-    return uses
+    return Uses(func)
@@ -5,14 +5,17 @@ def get_inlined_insns(root_insn):
     """Return the set of all inlined instructions in `root_insn` (included)."""
     result = set()
 
-    def helper(insn):
+    # Expressions can be arbitrarily deep: use an explicit stack.
+    stack = [root_insn]
+    while stack:
+        insn = stack.pop()
         result.add(insn)
         for input in insn.inputs:
             if (
-                isinstance(input.value, ir.ComputingInstruction)
+                input is not None
+                and isinstance(input.value, ir.ComputingInstruction)
                 and input.value.inline
+                and input.value not in result
             ):
-                helper(input.value)
-
-    helper(root_insn)
+                stack.append(input.value)
     return result
@@ -0,0 +1,238 @@
+from itertools import compress
+
+from decompil import ir
+from decompil.compiler import MAYBE_UNDEF_KINDS, CompiledFunction, _mask
+
+
+class BatchedFunction(CompiledFunction):
+    """
+    Function translated to Python code that executes it for many register
+    states (lanes) at once.
+
+    Values are lists that hold one integer (or None when undefined) per lane,
+    so that each instruction is a single list comprehension over all lanes.
+    Basic blocks return the index of the next basic block, or -1 when the
+    function returns, like for CompiledFunction. Conditional branches return
+    a (condition, true index, false index) tuple instead: lanes that disagree
+    on the condition are split into separate groups, which then run on their
+    own.
+
+    Memory instructions are not supported.
+    """
+
+    BLOCK_ARGUMENTS = 'v, regs, n, last'
+
+    def __init__(self, function):
+        # Mapping: slot -> name of the loop variable for the corresponding
+        # value in the current list comprehension.
+        self.lane_vars = {}
+        super(BatchedFunction, self).__init__(function)
+
+        # When splitting lanes, only values that are used outside of the
+        # basic block that computes them need to be kept: the others are
+        # always computed again before being used. PHI nodes are evaluated
+        # when entering their basic block, so they count as outside uses.
+        evaluation_blocks = {}
+        for bb in self.basic_blocks:
+            for insn in self.get_statements(bb):
+                evaluation_blocks[insn] = bb
+        self.live_slots = [self.return_slot]
+        for insn, slot in self.slots.items():
+            bb = evaluation_blocks.get(insn)
+            if any(
+                user.kind == ir.PHI or evaluation_blocks.get(user) is not bb
+                for user in insn.uses
+            ):
+                self.live_slots.append(slot)
+
+    def run(self, registers, count=None):
+        """
+        Execute the function on all lanes. `registers` is a mapping (register
+        -> list of integers or None, one per lane) that is updated in place.
+        `count` is the number of lanes: it is required only when `registers`
+        is empty. Return the list of returned integers, one per lane, or None
+        if the function returns nothing.
+        """
+        for lanes in registers.values():
+            if count is None:
+                count = len(lanes)
+            elif len(lanes) != count:
+                raise ValueError('All registers must have the same number of'
+                                 ' lanes')
+        if count is None:
+            raise ValueError('Cannot guess the number of lanes')
+
+        regs = {}
+        for reg, lanes in registers.items():
+            mask = _mask(reg.type)
+            regs[reg] = [
+                None if value is None else value & mask
+                for value in lanes
+            ]
+        returned = [None] * count
+
+        # Groups of lanes that still have to run, and that follow the same
+        # path. The values list is specific to each group as basic blocks
+        # update it, but lists for individual values are never modified, so
+        # groups can share them.
+        blocks = self.blocks
+        pending = [
+            (0, -1, list(range(count)), [None] * (self.return_slot + 1), regs)
+        ]
+        while pending:
+            index, last, lane_ids, values, regs = pending.pop()
+            while index >= 0:
+                target = blocks[index](values, regs, len(lane_ids), last)
+                if type(target) is tuple:
+                    condition, dest_true, dest_false = target
+                    if all(condition):
+                        target = dest_true
+                    elif not any(condition):
+                        target = dest_false
+                    else:
+                        # Lanes that take the false branch go in a new group,
+                        # the others continue.
+                        negated = [not cond for cond in condition]
+                        pending.append((
+                            dest_false, index,
+                            _filter_lanes(lane_ids, negated),
+                            self.filter_values(values, negated),
+                            {reg: _filter_lanes(lanes, negated)
+                             for reg, lanes in regs.items()},
+                        ))
+                        lane_ids = _filter_lanes(lane_ids, condition)
+                        values = self.filter_values(values, condition)
+                        regs = {reg: _filter_lanes(lanes, condition)
+                                for reg, lanes in regs.items()}
+                        target = dest_true
+                index, last = target, index
+
+            for reg, lanes in regs.items():
+                result = registers.get(reg)
+                if result is None:
+                    result = registers[reg] = [None] * count
+                for lane_id, value in zip(lane_ids, lanes):
+                    result[lane_id] = value
+            if values[-1] is not None:
+                for lane_id, value in zip(lane_ids, values[-1]):
+                    returned[lane_id] = value
+
+        if self.function.return_type == self.function.context.void_type:
+            return None
+        return returned
+
+    def filter_values(self, values, condition):
+        """
+        Return a new values list for the lanes in `values` whose `condition`
+        is true. Only slots in `live_slots` are kept.
+        """
+        result = [None] * len(values)
+        for slot in self.live_slots:
+            result[slot] = _filter_lanes(values[slot], condition)
+        return result
+
+    def operand(self, value):
+        """
+        Return a Python expression for the value of `value` in a single lane.
+        """
+        if value is None or isinstance(value.value, int):
+            return super(BatchedFunction, self).operand(value)
+        slot = self.get_slot(value.value)
+        try:
+            return self.lane_vars[slot]
+        except KeyError:
+            name = 'x{}'.format(len(self.lane_vars))
+            self.lane_vars[slot] = name
+            return name
+
+    def lanes(self, value):
+        """Return a Python expression for the list of lanes for `value`."""
+        if value is None or isinstance(value.value, int):
+            return '[{}] * n'.format(
+                super(BatchedFunction, self).operand(value)
+            )
+        else:
+            return 'v[{}]'.format(self.get_slot(value.value))
+
+    def incoming(self, value):
+        return self.lanes(value)
+
+    def checked(self, value, checks):
+        if (
+            isinstance(value.value, ir.BaseInstruction)
+            and value.value.kind in MAYBE_UNDEF_KINDS
+        ):
+            checks.append('None not in {}'.format(self.lanes(value)))
+        return self.operand(value)
+
+    def generate_instruction(self, insn):
+        checks = []
+        self.lane_vars = {}
+        expression = self.generate_expression(insn, checks)
+        if expression is None:
+            code = self.generate_statement(insn, checks)
+        elif not self.lane_vars:
+            code = ['v[{}] = [{}] * n'.format(self.get_slot(insn), expression)]
+        else:
+            names = ', '.join(self.lane_vars.values())
+            sources = ', '.join(
+                'v[{}]'.format(slot) for slot in self.lane_vars
+            )
+            if len(self.lane_vars) > 1:
+                sources = 'zip({})'.format(sources)
+            code = ['v[{}] = [{} for {} in {}]'.format(
+                self.get_slot(insn), expression, names, sources
+            )]
+        if checks:
+            code.insert(0, 'assert {}'.format(' and '.join(checks)))
+        return code
+
+    def generate_statement(self, insn, checks):
+        kind = insn.kind
+
+        if kind == ir.RLOAD:
+            return ['v[{}] = regs.get({}) or [None] * n'.format(
+                self.get_slot(insn), self.get_name('reg', insn.source)
+            )]
+
+        elif kind == ir.RSTORE:
+            return ['regs[{}] = {}'.format(
+                self.get_name('reg', insn.destination),
+                self.lanes(insn.value)
+            )]
+
+        elif kind == ir.BRANCH:
+            self.checked(insn.condition, checks)
+            return ['return {}, {}, {}'.format(
+                self.lanes(insn.condition),
+                self.block_indexes[insn.dest_true],
+                self.block_indexes[insn.dest_false],
+            )]
+
+        elif kind == ir.RET:
+            code = []
+            if self.function.return_type != self.function.context.void_type:
+                code.append('v[-1] = {}'.format(
+                    self.lanes(insn.return_value)
+                ))
+            code.append('return -1')
+            return code
+
+        elif kind in (ir.LOAD, ir.STORE, ir.ALLOCA):
+            return ['raise NotImplementedError()']
+
+        else:
+            return super(BatchedFunction, self).generate_statement(
+                insn, checks
+            )
+
+
+def _filter_lanes(lanes, condition):
+    if lanes is None:
+        return None
+    return list(compress(lanes, condition))
+
+
+def compile_batched_function(function):
+    """Return a BatchedFunction for `function`."""
+    return BatchedFunction(function)
@@ -0,0 +1,422 @@
+import collections
+
+from decompil import ir
+from decompil.interpreter import LiveValue
+from decompil.memory import Memory
+from decompil.register_file import RegisterFile
+
+
+def _mask(type):
+    return (1 << type.width) - 1
+
+
+def _sign_bit(type):
+    return 1 << (type.width - 1)
+
+
+# Python operators for binary and comparison instructions whose result needs
+# no special processing.
+UNMASKED_OPERATORS = {
+    ir.UDIV: '//',
+    ir.LSHR: '>>',
+    ir.AND: '&',
+    ir.OR: '|',
+    ir.XOR: '^',
+}
+MASKED_OPERATORS = {
+    ir.ADD: '+',
+    ir.SUB: '-',
+    ir.MUL: '*',
+    ir.LSHL: '<<',
+}
+COMPARISON_OPERATORS = {
+    ir.EQ: '==', ir.NE: '!=',
+    ir.SLE: '<=', ir.SLT: '<', ir.SGE: '>=', ir.SGT: '>',
+    ir.ULE: '<=', ir.ULT: '<', ir.UGE: '>=', ir.UGT: '>',
+}
+SIGNED_COMPARISONS = (ir.SLE, ir.SLT, ir.SGE, ir.SGT)
+
+# Kinds for instructions whose result can be undefined (see
+# LiveValue.is_undef).
+MAYBE_UNDEF_KINDS = (ir.RLOAD, ir.LOAD, ir.PHI, ir.SELECT, ir.COPY)
+
+
+class CompiledFunction:
+    """
+    Function translated to Python code, so that it can be interpreted quickly
+    many times.
+
+    Each basic block becomes a Python function that takes the list of values
+    for computing instructions, the registers mapping, the memory and the
+    index of the previously executed basic block. It returns the index of the
+    next basic block to execute, or -1 when the function returns. Values are
+    plain integers, or None when undefined. Both the pure and the expression
+    forms are supported.
+
+    CALL and CAT instructions are not supported: compiling a function that
+    contains some raises a NotImplementedError.
+    """
+
+    # Arguments of the Python functions for basic blocks.
+    BLOCK_ARGUMENTS = 'v, regs, mem, last'
+
+    def __init__(self, function):
+        self.function = function
+        self.basic_blocks = list(function)
+        self.block_indexes = {
+            bb: i for i, bb in enumerate(self.basic_blocks)
+        }
+
+        # Mapping: computing instruction -> index in the list of values. The
+        # return value comes last (see return_slot).
+        self.slots = {}
+
+        # Mapping: name -> object, for objects the generated code references
+        # (types, and registers for batched functions).
+        self.namespace = {}
+        self.names = {}
+
+        # Registers that RSTORE instructions write to
+        self.stored_registers = set()
+
+        lines = []
+        for i, bb in enumerate(self.basic_blocks):
+            self.generate_basic_block(i, bb, lines)
+        self.return_slot = len(self.slots)
+        self.source = '\n'.join(lines) + '\n'
+
+        code = compile(
+            self.source, '<compiled sub_{:x}>'.format(function.address),
+            'exec'
+        )
+        exec(code, self.namespace)
+        self.blocks = [
+            self.namespace['bb_{}'.format(i)]
+            for i in range(len(self.basic_blocks))
+        ]
+
+    def run(self, registers, memory=None, profile=None):
+        """
+        Execute the function. Like for Interpreter, `registers` is a mapping
+        (register -> LiveValue) that is updated in place, and `profile`, if
+        provided, records what is executed. `registers` can also be a
+        RegisterFile, which is then used directly. Return the returned
+        LiveValue, or None if the function returns nothing.
+        """
+        if isinstance(registers, RegisterFile):
+            register_file = registers
+            register_file.resize()
+        else:
+            register_file = RegisterFile.from_live_values(
+                self.function.context, registers
+            )
+        regs = register_file.values
+        values = [None] * (self.return_slot + 1)
+        if memory is None:
+            memory = Memory()
+
+        blocks = self.blocks
+        index = 0
+        last = -1
+        if profile is None:
+            while index >= 0:
+                index, last = blocks[index](values, regs, memory, last), index
+        else:
+            # Count edges as (source index, destination index) first, and
+            # translate them to basic blocks at the end.
+            profile.runs += 1
+            edge_counts = collections.Counter()
+            while index >= 0:
+                index, last = blocks[index](values, regs, memory, last), index
+                if index >= 0:
+                    edge_counts[(last, index)] += 1
+            for (source, dest), count in edge_counts.items():
+                profile.edge_counts[(
+                    self.basic_blocks[source], self.basic_blocks[dest]
+                )] += count
+
+        if register_file is not registers:
+            register_file.update_live_values(registers)
+            # Like for Interpreter, registers the function stores undefined
+            # values to must show up.
+            for reg in self.stored_registers:
+                if reg not in registers:
+                    registers[reg] = LiveValue(reg.type)
+
+        if self.function.return_type == self.function.context.void_type:
+            return None
+        return LiveValue(self.function.return_type, values[-1])
+
+    def get_name(self, prefix, obj):
+        """Return a name for `obj` in the generated code."""
+        key = (prefix, id(obj))
+        try:
+            return self.names[key]
+        except KeyError:
+            name = '{}_{}'.format(prefix, len(self.names))
+            self.names[key] = name
+            self.namespace[name] = obj
+            return name
+
+    def get_register_index(self, register):
+        """
+        Return the index of `register` in the register file. Composite
+        registers are split by front-ends, so they never show up here.
+        """
+        return self.function.context.get_register_index(register)
+
+    def get_slot(self, insn):
+        try:
+            return self.slots[insn]
+        except KeyError:
+            slot = len(self.slots)
+            self.slots[insn] = slot
+            return slot
+
+    def operand(self, value):
+        """Return a Python expression for `value`."""
+        if value is None:
+            return 'None'
+        elif isinstance(value.value, int):
+            return repr(value.value & _mask(value.type))
+        else:
+            return 'v[{}]'.format(self.get_slot(value.value))
+
+    def incoming(self, value):
+        """Return a Python expression for the incoming `value` of a PHI."""
+        return self.operand(value)
+
+    def checked(self, value, checks):
+        """
+        Like `operand`, but for values that must be defined: add the checks
+        to perform to the `checks` list.
+        """
+        result = self.operand(value)
+        if (
+            isinstance(value.value, ir.BaseInstruction)
+            and value.value.kind in MAYBE_UNDEF_KINDS
+        ):
+            checks.append('{} is not None'.format(result))
+        return result
+
+    def signed(self, value, checks):
+        """Return a Python expression for `value` as a signed integer."""
+        sign = _sign_bit(value.type)
+        return '(({} ^ {}) - {})'.format(
+            self.checked(value, checks), sign, sign
+        )
+
+    @staticmethod
+    def get_statements(bb):
+        """
+        Return the instructions in `bb` in execution order, including the
+        ones inlined in them.
+        """
+        result = []
+        for root_insn in bb:
+            # Operands are evaluated before the instruction that uses them.
+            # Expressions can be arbitrarily deep: use an explicit stack.
+            stack = [(root_insn, False)]
+            while stack:
+                insn, inputs_done = stack.pop()
+                if inputs_done:
+                    result.append(insn)
+                    continue
+                stack.append((insn, True))
+                for value in reversed(insn.inputs):
+                    if (
+                        value is not None
+                        and isinstance(value.value, ir.ComputingInstruction)
+                        and value.value.inline
+                    ):
+                        stack.append((value.value, False))
+        return result
+
+    def generate_basic_block(self, index, bb, lines):
+        lines.append('def bb_{}({}):'.format(index, self.BLOCK_ARGUMENTS))
+        statements = self.get_statements(bb)
+
+        # PHI nodes are evaluated all at once when entering the basic block.
+        phi_nodes = [insn for insn in statements if insn.kind == ir.PHI]
+        if phi_nodes:
+            targets = ', '.join(
+                'v[{}]'.format(self.get_slot(insn)) for insn in phi_nodes
+            )
+            incoming = {}
+            for insn in phi_nodes:
+                for pred, value in insn.pairs:
+                    incoming.setdefault(pred, {})[insn] = value
+            keyword = 'if'
+            for pred, pred_values in incoming.items():
+                lines.append('    {} last == {}:'.format(
+                    keyword, self.block_indexes.get(pred, -2)
+                ))
+                lines.append('        {}, = {},'.format(targets, ', '.join(
+                    self.incoming(pred_values.get(insn))
+                    for insn in phi_nodes
+                )))
+                keyword = 'elif'
+            lines.append('    else:')
+            lines.append('        raise AssertionError()')
+
+        for insn in statements:
+            if insn.kind != ir.PHI:
+                lines.extend(
+                    '    ' + line for line in self.generate_instruction(insn)
+                )
+        # Like for Interpreter, basic blocks without terminator end the
+        # execution.
+        lines.append('    return -1')
+
+    def generate_instruction(self, insn):
+        """Return the lines of Python code that execute `insn`."""
+        checks = []
+        expression = self.generate_expression(insn, checks)
+        if expression is not None:
+            code = ['v[{}] = {}'.format(self.get_slot(insn), expression)]
+        else:
+            code = self.generate_statement(insn, checks)
+        if checks:
+            code.insert(0, 'assert {}'.format(' and '.join(checks)))
+        return code
+
+    def generate_expression(self, insn, checks):
+        """
+        Return a Python expression that computes the result of `insn` from
+        its operands, or None if `insn` is not such a pure computation.
+        """
+        kind = insn.kind
+
+        if isinstance(insn, ir.ConversionInstruction):
+            value = self.checked(insn.value, checks)
+            if kind == ir.SEXT:
+                value = self.signed(insn.value, [])
+            return '{} & {}'.format(value, _mask(insn.dest_type))
+
+        elif kind in MASKED_OPERATORS:
+            return '({} {} {}) & {}'.format(
+                self.checked(insn.left, checks), MASKED_OPERATORS[kind],
+                self.checked(insn.right, checks),
+                _mask(insn.type)
+            )
+
+        elif kind in UNMASKED_OPERATORS:
+            return '{} {} {}'.format(
+                self.checked(insn.left, checks), UNMASKED_OPERATORS[kind],
+                self.checked(insn.right, checks)
+            )
+
+        elif kind in (ir.SDIV, ir.ASHR):
+            right = (
+                self.signed(insn.right, checks)
+                if kind == ir.SDIV else
+                self.checked(insn.right, checks)
+            )
+            return '({} {} {}) & {}'.format(
+                self.signed(insn.left, checks),
+                '//' if kind == ir.SDIV else '>>', right,
+                _mask(insn.type)
+            )
+
+        elif kind in COMPARISON_OPERATORS:
+            if kind in SIGNED_COMPARISONS:
+                left = self.signed(insn.left, checks)
+                right = self.signed(insn.right, checks)
+            else:
+                left = self.checked(insn.left, checks)
+                right = self.checked(insn.right, checks)
+            return '1 if {} {} {} else 0'.format(
+                left, COMPARISON_OPERATORS[kind], right
+            )
+
+        elif kind == ir.SELECT:
+            return '{} if {} else {}'.format(
+                self.operand(insn.true_value),
+                self.checked(insn.condition, checks),
+                self.operand(insn.false_value),
+            )
+
+        elif kind == ir.COPY:
+            return self.operand(insn.value)
+
+        else:
+            return None
+
+    def generate_statement(self, insn, checks):
+        """
+        Return the lines of Python code that execute `insn`, for instructions
+        that generate_expression does not handle.
+        """
+        kind = insn.kind
+        result = None
+        code = []
+
+        if isinstance(insn, ir.ComputingInstruction):
+            result = 'v[{}] = '.format(self.get_slot(insn))
+
+        if kind == ir.RLOAD:
+            code.append('{}regs[{}]'.format(
+                result, self.get_register_index(insn.source)
+            ))
+
+        elif kind == ir.RSTORE:
+            self.stored_registers.add(insn.destination)
+            code.append('regs[{}] = {}'.format(
+                self.get_register_index(insn.destination),
+                self.operand(insn.value)
+            ))
+
+        elif kind == ir.LOAD:
+            code.append('{}mem.load({}, {})'.format(
+                result, self.checked(insn.source, checks),
+                self.get_name('type', insn.type)
+            ))
+
+        elif kind == ir.STORE:
+            code.append('mem.store({}, {}, {})'.format(
+                self.checked(insn.destination, checks),
+                self.get_name('type', insn.value.type),
+                self.operand(insn.value)
+            ))
+
+        elif kind == ir.ALLOCA:
+            code.append('{}mem.alloca({})'.format(
+                result, self.get_name('type', insn.stored_type)
+            ))
+
+        elif kind == ir.JUMP:
+            code.append('return {}'.format(
+                self.block_indexes[insn.destination]
+            ))
+
+        elif kind == ir.BRANCH:
+            code.append('return {} if {} else {}'.format(
+                self.block_indexes[insn.dest_true],
+                self.checked(insn.condition, checks),
+                self.block_indexes[insn.dest_false],
+            ))
+
+        elif kind == ir.RET:
+            if self.function.return_type != self.function.context.void_type:
+                code.append('v[-1] = {}'.format(
+                    self.operand(insn.return_value)
+                ))
+            code.append('return -1')
+
+        elif kind == ir.UNDEF:
+            # Like RET, UNDEF ends the execution (see
+            # BasicBlock.get_successors), but the returned value is undefined.
+            code.append('v[-1] = None')
+            code.append('return -1')
+
+        else:
+            raise NotImplementedError(
+                'Cannot compile {} instructions'.format(ir.NAMES[kind])
+            )
+
+        return code
+
+
+def compile_function(function):
+    """Return a CompiledFunction for `function`."""
+    return CompiledFunction(function)
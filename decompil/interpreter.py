@@ -1,9 +1,14 @@
+import copy
+import itertools
 import sys
 
 from decompil import ir, utils
+from decompil.memory import Memory
 
 
 class LiveValue:
+    __slots__ = ('type', 'value')
+
     def __init__(self, type, value=None):
         assert value is None or isinstance(value, int)
         assert isinstance(type, (ir.IntType, ir.PointerType, ir.FunctionType))
@@ -44,13 +49,51 @@ class LiveValue:
         )
 
 
-class Interpreter:
+class Snapshot:
+    """
+    Full state of an Interpreter at some point of the execution (see
+    Interpreter.snapshot).
+    """
 
-    def __init__(self, function, registers):
+    __slots__ = (
+        'registers', 'values', 'memory',
+        'current_bb', 'index', 'last_bb', 'return_value', 'steps',
+    )
+
+    def __init__(self, registers, values, memory,
+                 current_bb, index, last_bb, return_value, steps):
+        self.registers = registers
+        self.values = values
+        self.memory = memory
+        self.current_bb = current_bb
+        self.index = index
+        self.last_bb = last_bb
+        self.return_value = return_value
+        self.steps = steps
+
+
+class Interpreter:
+    """
+    Reference interpreter. The function is executed on creation, unless
+    `max_steps` or `until` stop it earlier (see `process`): execution can then
+    be resumed with `process`, saved with `snapshot` and forked with `fork`.
+    """
+
+    def __init__(self, function, registers, memory=None, profile=None,
+                 max_steps=None, until=None):
         self.context = function.context
         self.function = function
         self.return_value = None
 
+        # When profiling, use handlers that also count what is executed (see
+        # decompil.profiler.Profile), so that there is no cost otherwise.
+        self.profile = profile
+        if profile is None:
+            self.handlers = self.HANDLERS
+        else:
+            self.handlers = profile.instrument_handlers(self.HANDLERS)
+            profile.runs += 1
+
         # Mapping: register -> current register live value
         self.registers = registers
 
@@ -58,19 +101,25 @@ class Interpreter:
         # TODO: remove values as they it becomes invalid to used them.
         self.values = {}
 
-        # Mapping: int (pointers) -> LiveValue (pointed values)
-        # TODO: handle a real memory space, with "unaligned" accesses, etc.
-        self.memory = {}
-        # Next address ALLOCA will return. TODO: not sure it is a good idea
-        # since generated numbers may conflict with "statically allocated
-        # storage". Anyway, this interpreter is for testing synthetic
-        # testcases, so maybe we can live with it.
-        self.next_addr = 1
+        # Memory object (see decompil.memory). By default, only ALLOCA'd
+        # storage is available.
+        self.memory = Memory() if memory is None else memory
 
         self.last_bb = None
         self.current_bb = function.entry
+        # Index in current_bb of the next instruction to execute
+        self.index = 0
+        # Total number of executed instructions
+        self.steps = 0
+        # Whether `process` already ran, so that next calls resume execution
+        self.started = False
 
-        self.process()
+        self.process(max_steps, until)
+
+    @property
+    def finished(self):
+        """Whether the function has returned."""
+        return self.current_bb is None
 
     def print_regs(self, outf=sys.stdout):
         regs = {reg.name: value.value for reg, value in self.registers.items()}
@@ -78,23 +127,104 @@ class Interpreter:
             print('{}: {}'.format(reg, regs[reg]), end=', ', file=outf)
         print('', file=outf)
 
-    def process(self):
-        next_bb = None
+    def process(self, max_steps=None, until=None):
+        """
+        Execute instructions until the function returns, until `max_steps`
+        instructions are executed or until execution enters the `until` basic
+        block through an edge. Return the number of executed instructions.
+        """
+        steps = 0
+        handlers = self.handlers
+        profile = self.profile
+        if profile is not None and self.started and self.current_bb:
+            profile.suffix_counts[(self.current_bb, self.index)] += 1
 
         while self.current_bb:
-            for insn in self.current_bb:
-                if isinstance(insn, ir.ControlFlowInstruction):
-                    ctrl_flow = self.HANDLERS[insn.kind](self, insn)
-                    next_bb = ctrl_flow
+            instructions = self.current_bb.instructions
+            start = self.index
+            end = len(instructions)
+            if max_steps is not None:
+                end = min(end, start + max_steps - steps)
+
+            # Like for compiled functions, basic blocks without terminator end
+            # the execution.
+            next_bb = None
+            index = start
+            for index, insn in enumerate(
+                itertools.islice(instructions, start, end), start + 1
+            ):
+                if isinstance(
+                    insn, (ir.ControlFlowInstruction, ir.UndefInstruction)
+                ):
+                    next_bb = handlers[insn.kind](self, insn)
                     if not next_bb:
                         break
                 elif isinstance(insn, ir.ComputingInstruction):
-                    self.values[insn] = self.HANDLERS[insn.kind](self, insn)
+                    self.values[insn] = handlers[insn.kind](self, insn)
                 else:
-                    self.HANDLERS[insn.kind](self, insn)
+                    handlers[insn.kind](self, insn)
+            else:
+                if end < len(instructions):
+                    # The step budget is exhausted in the middle of the basic
+                    # block.
+                    steps += end - start
+                    self.index = end
+                    break
+            steps += index - start
 
             self.last_bb = self.current_bb
             self.current_bb = next_bb
+            self.index = 0
+            if next_bb is not None and next_bb is until:
+                break
+
+        # The profile assumes that entered basic blocks are executed up to
+        # the end: tell it where execution actually stopped.
+        self.started = True
+        if profile is not None and self.current_bb:
+            profile.suffix_counts[(self.current_bb, self.index)] -= 1
+        self.steps += steps
+        return steps
+
+    def snapshot(self):
+        """
+        Return a Snapshot of the current state. Live values are immutable, so
+        only containers are copied.
+        """
+        return Snapshot(
+            dict(self.registers), dict(self.values), self.memory.copy(),
+            self.current_bb, self.index, self.last_bb, self.return_value,
+            self.steps
+        )
+
+    def restore(self, snapshot):
+        """
+        Go back to the state in `snapshot`, which can be restored again later.
+        The registers mapping is updated in place. The profile, if any, is not
+        rolled back: it keeps counting what is executed.
+        """
+        self.registers.clear()
+        self.registers.update(snapshot.registers)
+        self.values = dict(snapshot.values)
+        self.memory = snapshot.memory.copy()
+        self.current_bb = snapshot.current_bb
+        self.index = snapshot.index
+        self.last_bb = snapshot.last_bb
+        self.return_value = snapshot.return_value
+        self.steps = snapshot.steps
+
+    def fork(self, snapshot=None):
+        """
+        Return a new interpreter for the same function that starts from
+        `snapshot`, or from the current state if not provided. It gets its own
+        registers mapping and memory.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        result = copy.copy(self)
+        result.registers = {}
+        result.restore(snapshot)
+        return result
 
     def get_value(self, ir_value):
         if isinstance(ir_value.value, ir.ComputingInstruction):
@@ -257,26 +387,13 @@ class Interpreter:
         return LiveValue(insn.type, left > right)
 
     def handle_load(self, insn):
-        addr_value = self.get_value(insn.source)
-        addr = addr_value.as_unsigned
-
-        # Currently, we handle only ALLOCA'd pointers.
-        assert addr in self.memory
-        slot = self.memory[addr]
-        assert slot.type == addr_value.type.pointed
-
-        return slot
+        addr = self.get_value(insn.source).as_unsigned
+        return LiveValue(insn.type, self.memory.load(addr, insn.type))
 
     def handle_store(self, insn):
-        addr_value = self.get_value(insn.destination)
-        addr = addr_value.as_unsigned
-
-        # Currently, we handle only ALLOCA'd pointers.
-        assert (
-            addr in self.memory
-            and self.memory[addr].type == addr_value.type.pointed
-        )
-        self.memory[addr] = LiveValue.from_value(insn.value)
+        addr = self.get_value(insn.destination).as_unsigned
+        value = self.get_value(insn.value)
+        self.memory.store(addr, value.type, value.value)
 
     def handle_rload(self, insn):
         return self.registers.get(insn.source, LiveValue(insn.source.type))
@@ -285,21 +402,25 @@ class Interpreter:
         self.registers[insn.destination] = self.get_value(insn.value)
 
     def handle_alloca(self, insn):
-        addr = self.next_addr
-        self.next_addr += 1
-
-        self.memory[addr] = LiveValue(insn.stored_type)
+        addr = self.memory.alloca(insn.stored_type)
         return LiveValue(insn.stored_type.pointer, addr)
 
     def handle_select(self, insn):
         cond = self.get_value(insn.condition)
-        return insn.true_value if cond.value else insn.false_value
+        return self.get_value(
+            insn.true_value if cond.value else insn.false_value
+        )
 
     def handle_copy(self, insn):
         return self.get_value(insn.value)
 
     def handle_undef(self, insn):
-        raise NotImplementedError()
+        # Like RET, UNDEF ends the execution (see BasicBlock.get_successors),
+        # but the returned value is undefined.
+        return_type = self.function.return_type
+        if return_type != self.context.void_type:
+            self.return_value = LiveValue(return_type)
+        return None
 
     HANDLERS = {
         ir.JUMP: handle_jump,
@@ -345,13 +466,46 @@ class Interpreter:
         ir.RSTORE: handle_rstore,
         ir.ALLOCA: handle_alloca,
 
+        ir.SELECT: handle_select,
         ir.COPY: handle_copy,
 
         ir.UNDEF: handle_undef,
     }
 
 
-def run(function, registers):
-    interp = Interpreter(function, registers)
-    interp.process()
+def run(function, registers, memory=None, profile=None):
+    """
+    Execute `function` with the reference Interpreter. `registers` (mapping:
+    register -> LiveValue) is updated in place and `memory` is a memory
+    object (see decompil.memory). Return the returned LiveValue, if any. If
+    provided, `profile` (see decompil.profiler.Profile) records what is
+    executed.
+    """
+    interp = Interpreter(function, registers, memory, profile)
     return interp.return_value
+
+
+def run_compiled(function, registers, memory=None, profile=None):
+    """
+    Like `run`, but through a CompiledFunction (see decompil.compiler), which
+    is much faster and also supports the expression form.
+
+    The CompiledFunction is cached in the analysis manager of `function`, so
+    it is built again only after an optimization modified `function`. Code
+    that modifies it otherwise must invalidate its analyses.
+    """
+    from decompil.compiler import compile_function
+    compiled = function.analyses.get(compile_function)
+    return compiled.run(registers, memory, profile)
+
+
+def run_batch(function, registers, count=None):
+    """
+    Execute `function` for many register states at once. `registers` is a
+    mapping (register -> list of integers or None, one per state), which is
+    updated in place. Return the list of returned integers, if any.
+
+    See decompil.batch.BatchedFunction for details.
+    """
+    from decompil.batch import compile_batched_function
+    return compile_batched_function(function).run(registers, count)
@@ -9,18 +9,58 @@ class Context:
 
         self.pointer_width = pointer_width
 
-        self.void_type = VoidType(self)
-        self.boolean_type = IntType(self, 1)
-        self.byte_type = IntType(self, 8)
-        self.half_type = IntType(self, 16)
-        self.word_type = IntType(self, 32)
-        self.double_type = IntType(self, 64)
+        # Mapping: (type class, arguments) -> type. Each distinct type exists
+        # only once, so types can be compared by identity.
+        self.types = {}
+
+        self.void_type = self.get_type(VoidType)
+        self.boolean_type = self.create_int_type(1)
+        self.byte_type = self.create_int_type(8)
+        self.half_type = self.create_int_type(16)
+        self.word_type = self.create_int_type(32)
+        self.double_type = self.create_int_type(64)
+
+        # Registers that have storage, in Register.index order.
+        self.indexed_registers = []
+
+    def add_register(self, register):
+        """Give `register` the next dense index (see Register.index)."""
+        register.index = len(self.indexed_registers)
+        self.indexed_registers.append(register)
+        return register
+
+    def get_register_index(self, register):
+        """
+        Return the dense index of `register`, giving it one if it has none
+        yet. Composite registers have no index.
+        """
+        if register.index is None:
+            assert register.components is None, (
+                'No storage for composite register {}'.format(register)
+            )
+            self.add_register(register)
+        return register.index
+
+    def get_type(self, cls, *args):
+        """
+        Return the only instance of `cls` for `args`, creating it if needed.
+        """
+        key = (cls, ) + args
+        try:
+            return self.types[key]
+        except KeyError:
+            result = cls(self, *args)
+            self.types[key] = result
+            return result
 
     def create_int_type(self, width):
-        return IntType(self, width)
+        return self.get_type(IntType, width)
 
     def create_pointer_type(self, pointed):
-        return PointerType(self, pointed)
+        return self.get_type(PointerType, pointed)
+
+    def create_function_type(self, return_type, arg_types):
+        return self.get_type(FunctionType, return_type, tuple(arg_types))
 
     def create_function(self, address):
         func = Function(self, address)
@@ -40,6 +80,10 @@ class Context:
 
 
 class Function:
+    __slots__ = (
+        'context', 'address', 'basic_blocks', 'return_type', 'arg_types',
+        'form', '_bb_indexes', '_insn_indexes', '_analyses',
+    )
 
     # The intermediate language is turned into various forms during the
     # decompilation process:
@@ -60,6 +104,57 @@ class Function:
 
         self.form = self.FORM_PURE
 
+        # Dense numbering for basic blocks and instructions, used to name
+        # them. These mappings (basic block -> index and instruction -> index)
+        # are computed lazily and reset to None as soon as the corresponding
+        # containers change.
+        self._bb_indexes = None
+        self._insn_indexes = None
+
+        # Cache for analysis results, created on demand.
+        self._analyses = None
+
+    @property
+    def analyses(self):
+        """Return the analysis manager for this function."""
+        if self._analyses is None:
+            from decompil.analysis.manager import AnalysisManager
+            self._analyses = AnalysisManager(self)
+        return self._analyses
+
+    def invalidate_numbering(self, basic_blocks=True):
+        """
+        Discard the instruction numbering and, if `basic_blocks`, the basic
+        block numbering.
+        """
+        if basic_blocks:
+            self._bb_indexes = None
+        self._insn_indexes = None
+
+    @property
+    def bb_indexes(self):
+        """Return a mapping: basic block -> index in this function."""
+        if self._bb_indexes is None:
+            self._bb_indexes = {
+                bb: i for i, bb in enumerate(self.basic_blocks)
+            }
+        return self._bb_indexes
+
+    @property
+    def insn_indexes(self):
+        """
+        Return a mapping: instruction -> index in this function. Inlined
+        instructions are not numbered.
+        """
+        if self._insn_indexes is None:
+            self._insn_indexes = indexes = {}
+            i = 0
+            for bb in self.basic_blocks:
+                for insn in bb.instructions:
+                    indexes[insn] = i
+                    i += 1
+        return self._insn_indexes
+
     def create_entry_basic_block(self):
         """
         Create an empty basic block and make it the entry point for this
@@ -67,19 +162,37 @@ class Function:
         """
         bb = BasicBlock(self)
         self.basic_blocks.insert(0, bb)
+        self.invalidate_numbering()
         return bb
 
     def create_basic_block(self):
         bb = BasicBlock(self)
         self.basic_blocks.append(bb)
+        self.invalidate_numbering()
         return bb
 
     def remove(self, index):
-        self.basic_blocks.pop(index)
+        bb = self.basic_blocks.pop(index)
+        for insn in bb.instructions:
+            bb.detach(insn)
+        self.invalidate_numbering()
+
+    def remove_basic_blocks(self, basic_blocks):
+        """
+        Remove all basic blocks in the `basic_blocks` set in a single pass.
+        """
+        kept = []
+        removed = []
+        for bb in self.basic_blocks:
+            (removed if bb in basic_blocks else kept).append(bb)
+        self.basic_blocks = kept
+        for bb in removed:
+            for insn in bb.instructions:
+                bb.detach(insn)
+        self.invalidate_numbering()
 
     def replace_value(self, old_value, new_value):
-        for bb in self:
-            bb.replace_value(old_value, new_value)
+        _replace_uses(old_value, new_value, lambda insn: True, self)
 
     def __iter__(self):
         return iter(self.basic_blocks)
@@ -112,26 +225,96 @@ class Function:
 
 
 class BasicBlock:
+    __slots__ = ('function', 'instructions', 'predecessors')
 
     def __init__(self, function):
         self.function = function
         self.instructions = []
 
+        # Mapping: basic block -> number of control flow edges from it to this
+        # one. It is maintained as JUMP/BRANCH instructions are attached to
+        # and detached from basic blocks, so it is always up to date.
+        self.predecessors = {}
+
     def insert(self, index, insn):
         self.instructions.insert(index, insn)
+        self.attach(insn)
+        self.function.invalidate_numbering(basic_blocks=False)
 
     def replace(self, index, insn):
         old_insn = self.instructions[index]
         self.instructions[index] = insn
+        self.detach(old_insn)
+        self.attach(insn)
+        self.function.invalidate_numbering(basic_blocks=False)
 
     def remove(self, index):
-        self.instructions.pop(index)
+        insn = self.instructions.pop(index)
+        self.detach(insn)
+        self.function.invalidate_numbering(basic_blocks=False)
+
+    def remove_instructions(self, insns):
+        """Remove all instructions in the `insns` set in a single pass."""
+        kept = []
+        removed = []
+        for insn in self.instructions:
+            (removed if insn in insns else kept).append(insn)
+        self.instructions = kept
+        for insn in removed:
+            self.detach(insn)
+        self.function.invalidate_numbering(basic_blocks=False)
+
+    def attach(self, insn):
+        """
+        Make `insn`, which was just inserted in this basic block, belong to
+        it. If it was in another basic block, it is moved: its uses are left
+        untouched.
+        """
+        old_bb = insn.basic_block
+        insn.basic_block = self
+        if not insn.registered:
+            insn.register()
+        if insn.kind in (JUMP, BRANCH):
+            for dest in insn.destinations:
+                if old_bb is not None:
+                    dest.remove_predecessor(old_bb)
+                dest.add_predecessor(self)
+
+    def detach(self, insn):
+        """
+        Update `insn` after it was taken out of this basic block. Inlined
+        instructions are still part of the function, so their uses are kept.
+        """
+        # If `insn` was already moved to another basic block, there is nothing
+        # to do.
+        if insn.basic_block is not self:
+            return
+        insn.basic_block = None
+        if insn.registered and not (
+            isinstance(insn, ComputingInstruction) and insn.inline
+        ):
+            insn.unregister()
+        if insn.kind in (JUMP, BRANCH):
+            for dest in insn.destinations:
+                dest.remove_predecessor(self)
+
+    def add_predecessor(self, bb):
+        """Record a new control flow edge from `bb` to this basic block."""
+        self.predecessors[bb] = self.predecessors.get(bb, 0) + 1
+
+    def remove_predecessor(self, bb):
+        """Undo `add_predecessor`."""
+        count = self.predecessors[bb] - 1
+        if count:
+            self.predecessors[bb] = count
+        else:
+            del self.predecessors[bb]
 
     def replace_value(self, old_value, new_value):
-        def helper(value):
-            return new_value if value == old_value else value
-        for insn in self:
-            insn.map_inputs(helper)
+        _replace_uses(
+            old_value, new_value, lambda insn: insn.basic_block is self,
+            self
+        )
 
     @property
     def successors(self):
@@ -143,10 +326,8 @@ class BasicBlock:
             return []
 
         last_insn = self.instructions[-1]
-        if last_insn.kind == JUMP:
-            return [last_insn.destination]
-        elif last_insn.kind == BRANCH:
-            return [last_insn.dest_true, last_insn.dest_false]
+        if last_insn.kind in (JUMP, BRANCH):
+            return list(last_insn.destinations)
         elif last_insn.kind in (RET, UNDEF):
             return []
         else:
@@ -168,10 +349,7 @@ class BasicBlock:
 
     @property
     def index(self):
-        for i, bb in enumerate(self.function.basic_blocks):
-            if bb == self:
-                return i
-        assert False
+        return self.function.bb_indexes[self]
 
     @property
     def name(self):
@@ -181,10 +359,7 @@ class BasicBlock:
         return '<BasicBlock {}>'.format(self.name)
 
     def format(self):
-        # Yes... when serializing a whole function, this is computed once per
-        # basic block instead of once for the function... But do we care?
-        from decompil.analysis.predecessors import get_predecessors
-        preds = get_predecessors(self.function, allow_incomplete=True)[self]
+        preds = self.predecessors
         indentation = (Text, '    ')
 
         result = self.format_label() + [
@@ -222,6 +397,15 @@ class BasicBlock:
 
 
 class Type:
+    """
+    Base class for types.
+
+    Types must be created through their context (see Context.get_type) so that
+    equal types are the same object: they compare and hash by identity.
+    """
+
+    __slots__ = ('context', 'width')
+
     def __init__(self, context, width):
         self.context = context
         self.width = width
@@ -232,64 +416,59 @@ class Type:
     @property
     def pointer(self):
         """Return a type that points to `self`. """
-        return PointerType(self.context, self)
+        return self.context.create_pointer_type(self)
 
 
 class VoidType(Type):
+    __slots__ = ()
+
     def __init__(self, context):
         super(VoidType, self).__init__(context, None)
 
-    def __eq__(self, other):
-        return isinstance(other, VoidType)
-
     def format(self):
         return [(Keyword.Type, 'void')]
 
 
 class IntType(Type):
+    __slots__ = ('constants', )
+
     def __init__(self, context, width):
         super(IntType, self).__init__(context, width)
         assert width > 0
+        # Mapping: integer -> Value, so that each constant exists only once.
+        self.constants = {}
 
     def create(self, i):
-        assert -(2 ** (self.width - 1)) <= i < 2 ** self.width
-        return Value(self, i)
-
-    def __eq__(self, other):
-        return isinstance(other, IntType) and self.width == other.width
+        try:
+            return self.constants[i]
+        except KeyError:
+            assert -(2 ** (self.width - 1)) <= i < 2 ** self.width
+            value = Value(self, i)
+            self.constants[i] = value
+            return value
 
     def format(self):
         return [(Keyword.Type, 'i{}'.format(self.width))]
 
 
 class PointerType(Type):
+    __slots__ = ('pointed', )
+
     def __init__(self, context, pointed):
         super(PointerType, self).__init__(context, context.pointer_width)
         self.pointed = pointed
 
-    def __eq__(self, other):
-        return isinstance(other, PointerType) and self.pointed == other.pointed
-
     def format(self):
         return self.pointed.format() + [(Punctuation, '*')]
 
 
 class FunctionType(Type):
-    def __init__(self, context, return_type, arg_types):
-        super(FunctionType, self).__init__(context, self.context.pointer_width)
-        self.return_type == return_type
-        self.arg_types == self.arg_types
-
-    @property
-    def width(self):
-        return self.context.pointer_size
+    __slots__ = ('return_type', 'arg_types')
 
-    def __eq__(self, other):
-        return (
-            isinstance(other, FunctionType)
-            and self.return_type == other.return_type
-            and self.arg_types == other.arg_types
-        )
+    def __init__(self, context, return_type, arg_types):
+        super(FunctionType, self).__init__(context, context.pointer_width)
+        self.return_type = return_type
+        self.arg_types = tuple(arg_types)
 
     def format(self):
         result = self.return_type.format() + [(Punctuation, '(')]
@@ -302,6 +481,8 @@ class FunctionType(Type):
 
 
 class Value:
+    __slots__ = ('type', 'value')
+
     def __init__(self, type, value):
         self.type = type
         self.value = value
@@ -338,31 +519,96 @@ class Value:
 
 
 class Register:
+    """
+    Base class for architecture registers.
+
+    Registers with storage of their own get a dense `index` in their context,
+    either explicitly (see Context.add_register) or the first time one is
+    needed (see Context.get_register_index). Composite registers have none:
+    instead, `components` is a list of (register, shift) pairs and their
+    value is the sum of the component values, each shifted left by `shift`.
+    """
+    __slots__ = ()
+
+    index = None
+    components = None
+
     def format(self):
         raise NotImplementedError()
 
 
+def _register_use(value, user):
+    """Record that `user` uses `value` (once more)."""
+    if value is not None and isinstance(value.value, ComputingInstruction):
+        uses = value.value.uses
+        uses[user] = uses.get(user, 0) + 1
+
+
+def _unregister_use(value, user):
+    """Undo `_register_use`."""
+    if value is not None and isinstance(value.value, ComputingInstruction):
+        uses = value.value.uses
+        count = uses[user] - 1
+        if count:
+            uses[user] = count
+        else:
+            del uses[user]
+
+
+def _replace_uses(old_value, new_value, user_filter, container):
+    """
+    Replace `old_value` with `new_value` in all instructions accepted by
+    `user_filter` in `container` (a function or a basic block).
+    """
+    def helper(value):
+        return (
+            new_value
+            if value is not None and value == old_value else
+            value
+        )
+
+    if isinstance(old_value.value, ComputingInstruction):
+        users = [
+            insn for insn in old_value.value.uses
+            if user_filter(insn)
+        ]
+    else:
+        # Constants have no use list: look everywhere.
+        users = (
+            [insn for bb in container for insn in bb]
+            if isinstance(container, Function) else
+            list(container)
+        )
+    for insn in users:
+        insn.map_inputs(helper)
+
+
 class BaseInstruction:
+    __slots__ = ('function', 'kind', 'origin', 'basic_block', 'registered')
 
     def __init__(self, function, kind, origin=None):
         self.function = function
         self.kind = kind
         self.origin = origin
 
+        # Basic block that contains this instruction. None if it is in no
+        # basic block, for instance because it is inlined.
+        self.basic_block = None
+        # Whether this instruction is in the use lists of its inputs, i.e.
+        # whether it is part of its function (either directly in a basic block
+        # or inlined in such an instruction).
+        self.registered = False
+
     @property
     def context(self):
         return self.function.context
 
     @property
     def name(self):
-        i = 0
-        for bb in self.function.basic_blocks:
-            for insn in bb.instructions:
-                if insn == self:
-                    return '%{}'.format(i)
-                i += 1
-        # assert False
-        return '%??? ({})'.format(type(self).__name__)
+        try:
+            return '%{}'.format(self.function.insn_indexes[self])
+        except KeyError:
+            return '%??? ({})'.format(type(self).__name__)
 
     @property
     def type(self):
@@ -374,10 +620,27 @@ class BaseInstruction:
         assert type != self.context.void_type
         return Value(type, self)
 
+    def map_operands(self, func):
+        """
+        Replace each input value with `func(value)`. Subclasses must override
+        this. Unlike `map_inputs`, this does not update use lists.
+        """
+        raise NotImplementedError()
+
     def map_inputs(self, func):
         # TODO: since this enables the outer world to modify inputs, it would
         # be greate to be able to perform validation afterwards.
-        raise NotImplementedError()
+        if not self.registered:
+            self.map_operands(func)
+            return
+
+        def helper(value):
+            new_value = func(value)
+            if new_value is not value:
+                _unregister_use(value, self)
+                _register_use(new_value, self)
+            return new_value
+        self.map_operands(helper)
 
     @property
     def inputs(self):
@@ -385,9 +648,36 @@ class BaseInstruction:
         def helper(value):
             result.append(value)
             return value
-        self.map_inputs(helper)
+        self.map_operands(helper)
         return result
 
+    def register(self):
+        """Add this instruction to the use lists of its inputs."""
+        assert not self.registered
+        self.registered = True
+        for value in self.inputs:
+            _register_use(value, self)
+
+    def unregister(self):
+        """
+        Remove this instruction from the use lists of its inputs. As they
+        become dead, do the same for instructions inlined in it.
+        """
+        assert self.registered
+        queue = [self]
+        while queue:
+            insn = queue.pop()
+            insn.registered = False
+            for value in insn.inputs:
+                _unregister_use(value, insn)
+                if (
+                    value is not None
+                    and isinstance(value.value, ComputingInstruction)
+                    and value.value.inline
+                    and value.value.registered
+                ):
+                    queue.append(value.value)
+
     def format_instruction(self):
         # TODO: remove this
         print(repr(self))
@@ -486,6 +776,10 @@ NAMES = {
 
 
 class ControlFlowInstruction(BaseInstruction):
+    __slots__ = (
+        'destination', 'condition', 'dest_true', 'dest_false',
+        'callee', 'args', 'return_value',
+    )
     KINDS = (JUMP, BRANCH, CALL, RET)
 
     def __init__(self, function, kind, *operands, **kwargs):
@@ -504,7 +798,8 @@ class ControlFlowInstruction(BaseInstruction):
             assert isinstance(self.callee.type, FunctionType)
             self.args = list(operands[1:])
             assert (
-                self.callee.type.arg_types == [arg.type for arg in self.args]
+                self.callee.type.arg_types
+                == tuple(arg.type for arg in self.args)
             )
 
         elif kind == RET:
@@ -521,7 +816,17 @@ class ControlFlowInstruction(BaseInstruction):
         else:
             return self.context.void_type
 
-    def map_inputs(self, func):
+    @property
+    def destinations(self):
+        """Return the basic blocks this instruction can jump to."""
+        if self.kind == JUMP:
+            return (self.destination, )
+        elif self.kind == BRANCH:
+            return (self.dest_true, self.dest_false)
+        else:
+            return ()
+
+    def map_operands(self, func):
         if self.kind == BRANCH:
             self.condition = func(self.condition)
         elif self.kind == CALL:
@@ -579,6 +884,7 @@ class ControlFlowInstruction(BaseInstruction):
 
 
 class ComputingInstruction(BaseInstruction):
+    __slots__ = ('inline', 'uses', '_value')
     KINDS = ()
 
     def __init__(self, function, kind, *args, **kwargs):
@@ -590,8 +896,24 @@ class ComputingInstruction(BaseInstruction):
         # the corresponding function is in the pure form.
         self.inline = False
 
+        # Mapping: instruction -> number of times it uses this one. Only
+        # registered instructions (see BaseInstruction.registered) appear
+        # here.
+        self.uses = {}
+
+        # Value for the result of this instruction. Created on demand by
+        # as_value.
+        self._value = None
+
+    @property
+    def as_value(self):
+        if self._value is None:
+            self._value = super(ComputingInstruction, self).as_value
+        return self._value
+
 
 class PhiInstruction(ComputingInstruction):
+    __slots__ = ('pairs', 'return_type')
     KINDS = (PHI, )
 
     def __init__(self, function, pairs, **kwargs):
@@ -617,12 +939,15 @@ class PhiInstruction(ComputingInstruction):
 
     def set_value(self, basic_block, value):
         assert value.type == self.return_type
-        for i, (bb, _) in enumerate(self.pairs):
+        for i, (bb, old_value) in enumerate(self.pairs):
             if bb == basic_block:
                 self.pairs[i] = (bb, value)
                 break
         else:
             assert False
+        if self.registered:
+            _unregister_use(old_value, self)
+            _register_use(value, self)
 
     def replace_predecessor(self, old_bb, new_bb):
         """
@@ -636,11 +961,25 @@ class PhiInstruction(ComputingInstruction):
         else:
             assert False
 
+    def remove_predecessor(self, old_bb):
+        """
+        Remove the `old_bb` predecessor, and the corresponding value, from
+        this node. `old_bb` is supposed to actually be a predecessor.
+        """
+        for i, (bb, value) in enumerate(self.pairs):
+            if bb == old_bb:
+                del self.pairs[i]
+                break
+        else:
+            assert False
+        if self.registered:
+            _unregister_use(value, self)
+
     @property
     def type(self):
         return self.return_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         for i, (basic_block, value) in enumerate(self.pairs):
             self.pairs[i] = (basic_block, func(value))
 
@@ -656,6 +995,7 @@ class PhiInstruction(ComputingInstruction):
 
 
 class ConversionInstruction(ComputingInstruction):
+    __slots__ = ('dest_type', 'value')
     KINDS = (ZEXT, SEXT, TRUNC, BITCAST)
 
     def __init__(self, function, kind, dest_type, value, **kwargs):
@@ -683,7 +1023,7 @@ class ConversionInstruction(ComputingInstruction):
     def type(self):
         return self.dest_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         self.value = func(self.value)
 
     def format_instruction(self):
@@ -695,6 +1035,7 @@ class ConversionInstruction(ComputingInstruction):
 
 
 class BinaryInstruction(ComputingInstruction):
+    __slots__ = ('left', 'right')
     KINDS = (
         ADD, SUB, MUL, SDIV, UDIV,
         LSHL, LSHR, ASHR, AND, OR, XOR,
@@ -733,7 +1074,7 @@ class BinaryInstruction(ComputingInstruction):
     def type(self):
         return self.left.type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         self.left = func(self.left)
         self.right = func(self.right)
 
@@ -746,6 +1087,7 @@ class BinaryInstruction(ComputingInstruction):
 
 
 class ConcatenateInstruction(ComputingInstruction):
+    __slots__ = ('operands', 'return_type')
     KINDS = (CAT, )
 
     def __init__(self, function, *operands, **kwargs):
@@ -758,17 +1100,18 @@ class ConcatenateInstruction(ComputingInstruction):
             assert isinstance(op.type, IntType)
             width += op.type.width
 
-        self.return_type = IntType(width)
+        self.return_type = self.context.create_int_type(width)
 
     @property
     def type(self):
         return self.return_type
 
-    def map_inputs(self, func):
-        self.operands = func(self.operands)
+    def map_operands(self, func):
+        self.operands = tuple(func(op) for op in self.operands)
 
 
 class ComparisonInstruction(ComputingInstruction):
+    __slots__ = ('left', 'right')
     KINDS = (EQ, NE, SLE, SLT, SGE, SGT, ULE, ULT, UGE, UGT)
 
     OPERATOR_IMAGES = {
@@ -795,7 +1138,7 @@ class ComparisonInstruction(ComputingInstruction):
     def type(self):
         return self.context.boolean_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         self.left = func(self.left)
         self.right = func(self.right)
 
@@ -808,6 +1151,7 @@ class ComparisonInstruction(ComputingInstruction):
 
 
 class LoadInstruction(ComputingInstruction):
+    __slots__ = ('source', 'return_type')
     KINDS = (LOAD, RLOAD)
 
     def __init__(self, function, kind, source, **kwargs):
@@ -826,7 +1170,7 @@ class LoadInstruction(ComputingInstruction):
     def type(self):
         return self.return_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         if self.kind == LOAD:
             self.source = func(self.source)
 
@@ -839,6 +1183,7 @@ class LoadInstruction(ComputingInstruction):
 
 
 class AllocaInstruction(ComputingInstruction):
+    __slots__ = ('stored_type', 'ptr_type')
     KINDS = (ALLOCA, )
 
     def __init__(self, function, stored_type, **kwargs):
@@ -850,7 +1195,7 @@ class AllocaInstruction(ComputingInstruction):
     def type(self):
         return self.ptr_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         pass
 
     def format_instruction(self):
@@ -861,6 +1206,7 @@ class AllocaInstruction(ComputingInstruction):
 
 
 class StoreInstruction(BaseInstruction):
+    __slots__ = ('destination', 'value')
     KINDS = (STORE, RSTORE)
 
     def __init__(self, function, kind, destination, value, **kwargs):
@@ -884,7 +1230,7 @@ class StoreInstruction(BaseInstruction):
     def type(self):
         return self.context.void_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         if self.kind == STORE:
             self.destination = func(self.destination)
         self.value = func(self.value)
@@ -904,6 +1250,7 @@ class StoreInstruction(BaseInstruction):
 
 
 class SelectInstruction(ComputingInstruction):
+    __slots__ = ('condition', 'true_value', 'false_value')
     KINDS = (SELECT, )
 
     def __init__(self, function, condition, true_value, false_value, **kwargs):
@@ -922,7 +1269,7 @@ class SelectInstruction(ComputingInstruction):
     def type(self):
         return self.true_value.type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         self.condition = func(self.condition)
         self.true_value = func(self.true_value)
         self.false_value = func(self.false_value)
@@ -941,6 +1288,7 @@ class SelectInstruction(ComputingInstruction):
 
 
 class CopyInstruction(ComputingInstruction):
+    __slots__ = ('value', )
     KINDS = (COPY, )
 
     def __init__(self, function, value, **kwargs):
@@ -951,7 +1299,7 @@ class CopyInstruction(ComputingInstruction):
     def type(self):
         return self.value.type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         self.value = func(self.value)
 
     def format_instruction(self):
@@ -962,6 +1310,7 @@ class CopyInstruction(ComputingInstruction):
 
 
 class UndefInstruction(BaseInstruction):
+    __slots__ = ()
     KINDS = (UNDEF, )
 
     def __init__(self, function, **kwargs):
@@ -971,7 +1320,7 @@ class UndefInstruction(BaseInstruction):
     def type(self):
         return self.context.void_type
 
-    def map_inputs(self, func):
+    def map_operands(self, func):
         pass
 
     def format_instruction(self):
@@ -0,0 +1,264 @@
+import array
+import io
+import mmap
+import sys
+
+
+class MemoryAccessError(Exception):
+    """Raised for accesses to unmapped or read-only memory."""
+    pass
+
+
+class Memory:
+    """
+    Memory for interpreted functions where only ALLOCA'd storage is
+    available.
+
+    All memory objects have the same interface: `load(addr, type)` returns
+    the integer stored at `addr`, or None if it is undefined, `store(addr,
+    type, value)` stores an integer (or None) and `alloca(type)` returns the
+    address of new storage. `type` is the type of the value being loaded or
+    stored.
+    """
+
+    def __init__(self):
+        # Mapping: address -> (type, integer value or None if undefined)
+        self.slots = {}
+        # Next address ALLOCA will return. TODO: not sure it is a good idea
+        # since generated numbers may conflict with "statically allocated
+        # storage". Anyway, this is for testing synthetic testcases, so maybe
+        # we can live with it.
+        self.next_addr = 1
+
+    def copy(self):
+        """Return an independent copy of this memory."""
+        result = Memory()
+        result.slots = dict(self.slots)
+        result.next_addr = self.next_addr
+        return result
+
+    def alloca(self, type):
+        addr = self.next_addr
+        self.next_addr += 1
+        self.slots[addr] = (type, None)
+        return addr
+
+    def load(self, addr, type):
+        try:
+            slot_type, value = self.slots[addr]
+        except KeyError:
+            raise MemoryAccessError('Unmapped address: {:#x}'.format(addr))
+        assert slot_type == type
+        return value
+
+    def store(self, addr, type, value):
+        try:
+            slot_type, _ = self.slots[addr]
+        except KeyError:
+            raise MemoryAccessError('Unmapped address: {:#x}'.format(addr))
+        assert slot_type == type
+        self.slots[addr] = (type, value)
+
+
+# Mapping: word width -> array typecode to use for it.
+WORD_TYPECODES = {
+    8: 'B',
+    16: 'H',
+    32: 'I',
+}
+
+
+class Region:
+    """
+    Contiguous range of `size` words that starts at address `start` in a
+    WordMemory.
+
+    Words are stored in a preallocated array. A parallel bytearray tells
+    which words are defined: all of them are undefined at first.
+    """
+
+    def __init__(self, name, start, size, word_width=16, read_only=False):
+        self.name = name
+        self.start = start
+        self.size = size
+        self.end = start + size
+        self.word_width = word_width
+        self.read_only = read_only
+
+        typecode = WORD_TYPECODES[word_width]
+        self.words = array.array(typecode, bytes(
+            array.array(typecode).itemsize * size
+        ))
+        # Mapping: word offset -> 1 if the word is defined, 0 otherwise
+        self.defined = bytearray(size)
+
+    def copy(self):
+        """Return an independent copy of this region."""
+        result = Region(
+            self.name, self.start, 0, self.word_width, self.read_only
+        )
+        result.size = self.size
+        result.end = self.end
+        result.words = self.words[:]
+        result.defined = self.defined[:]
+        return result
+
+    def load_data(self, data, offset=0, big_endian=True):
+        """
+        Copy the words in the `data` bytes-like object to this region,
+        starting at word `offset`, and mark them as defined. Words that do
+        not fit in the region are ignored. Return the number of copied words.
+        """
+        if not 0 <= offset <= self.size:
+            raise ValueError('Offset out of {}: {}'.format(self, offset))
+        words = array.array(self.words.typecode)
+        itemsize = words.itemsize
+        count = min(len(data) // itemsize, self.size - offset)
+        words.frombytes(memoryview(data)[:count * itemsize])
+        if big_endian != (sys.byteorder == 'big'):
+            words.byteswap()
+        self.words[offset:offset + count] = words
+        self.defined[offset:offset + count] = b'\x01' * count
+        return count
+
+    def load_file(self, fp, offset=0, big_endian=True):
+        """
+        Like load_data, but for the content of the `fp` file object, such as
+        a RAM dump. The file is memory-mapped when possible.
+        """
+        try:
+            fileno = fp.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            fileno = None
+        if fileno is not None:
+            try:
+                data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                pass
+            else:
+                with data:
+                    return self.load_data(data, offset, big_endian)
+        fp.seek(0)
+        return self.load_data(fp.read(), offset, big_endian)
+
+    def __repr__(self):
+        return '<Region {} {:#x}-{:#x}>'.format(
+            self.name, self.start, self.end - 1
+        )
+
+
+class WordMemory:
+    """
+    Word-addressed memory made of regions (see Region). Accesses outside of
+    all regions raise a MemoryAccessError.
+
+    Values wider than a word span several consecutive words, most
+    significant word first when `big_endian`. Loading a value that contains
+    an undefined word yields None.
+
+    ALLOCA'd storage is taken from the top of the `stack` region, if any.
+    """
+
+    def __init__(self, regions, word_width=16, big_endian=True, stack=None):
+        self.regions = sorted(regions, key=lambda region: region.start)
+        assert all(
+            region.word_width == word_width for region in self.regions
+        )
+        self.word_width = word_width
+        self.word_mask = (1 << word_width) - 1
+        self.big_endian = big_endian
+
+        self.stack = stack
+        self.stack_top = stack.end if stack else None
+
+        # Last region an access hit: accesses are often close to each other.
+        self.last_region = self.regions[0] if self.regions else None
+
+    def copy(self):
+        """Return an independent copy of this memory."""
+        regions = [region.copy() for region in self.regions]
+        stack = None
+        if self.stack is not None:
+            stack = regions[self.regions.index(self.stack)]
+        result = WordMemory(
+            regions, self.word_width, self.big_endian, stack
+        )
+        result.stack_top = self.stack_top
+        return result
+
+    def get_region(self, name):
+        """Return the region called `name`."""
+        for region in self.regions:
+            if region.name == name:
+                return region
+        raise KeyError(name)
+
+    def find_region(self, addr, count):
+        """
+        Return the region that contains the `count` words at `addr`, or raise
+        a MemoryAccessError.
+        """
+        region = self.last_region
+        if region and region.start <= addr and addr + count <= region.end:
+            return region
+        for region in self.regions:
+            if region.start <= addr and addr + count <= region.end:
+                self.last_region = region
+                return region
+        raise MemoryAccessError('Unmapped address: {:#x}'.format(addr))
+
+    def get_word_count(self, type):
+        return -(-type.width // self.word_width)
+
+    def load(self, addr, type):
+        count = self.get_word_count(type)
+        region = self.find_region(addr, count)
+        offset = addr - region.start
+        if count == 1:
+            if not region.defined[offset]:
+                return None
+            return region.words[offset] & ((1 << type.width) - 1)
+
+        if not all(region.defined[offset:offset + count]):
+            return None
+        words = region.words[offset:offset + count]
+        if not self.big_endian:
+            words.reverse()
+        result = 0
+        for word in words:
+            result = (result << self.word_width) | word
+        return result & ((1 << type.width) - 1)
+
+    def store(self, addr, type, value):
+        count = self.get_word_count(type)
+        region = self.find_region(addr, count)
+        if region.read_only:
+            raise MemoryAccessError(
+                'Write to read-only memory: {:#x}'.format(addr)
+            )
+        offset = addr - region.start
+        if value is None:
+            region.defined[offset:offset + count] = bytes(count)
+            return
+
+        if count == 1:
+            region.words[offset] = value & self.word_mask
+        else:
+            words = [
+                (value >> (i * self.word_width)) & self.word_mask
+                for i in range(count)
+            ]
+            if self.big_endian:
+                words.reverse()
+            region.words[offset:offset + count] = array.array(
+                region.words.typecode, words
+            )
+        region.defined[offset:offset + count] = b'\x01' * count
+
+    def alloca(self, type):
+        count = self.get_word_count(type)
+        if self.stack is None or self.stack_top - count < self.stack.start:
+            raise MemoryAccessError('No room left for ALLOCA')
+        self.stack_top -= count
+        return self.stack_top
@@ -1,9 +1,44 @@
+import functools
+
+
 class Optimization:
 
+    # Set of analyses (see decompil.analysis.manager) whose results are still
+    # valid after this optimization ran.
+    PRESERVED_ANALYSES = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Whatever the entry point (`run` or `process_function`), analyses
+        # this optimization does not preserve must be invalidated once it
+        # ran, so wrap the `process_function` subclasses define.
+        process = cls.__dict__.get('process_function')
+        if process is not None:
+            process_function = process.__func__
+
+            @functools.wraps(process_function)
+            def wrapper(cls, function):
+                result = process_function(cls, function)
+                function.analyses.invalidate(cls.PRESERVED_ANALYSES)
+                return result
+
+            cls.process_function = classmethod(wrapper)
+
     @classmethod
     def process_function(cls, function):
         raise NotImplementedError()
 
+    @classmethod
+    def run(cls, function):
+        """
+        Optimize `function`. Like `process_function`, this invalidates the
+        analyses this optimization does not preserve. Return what
+        `process_function` returns: some optimizations report how much they
+        changed the function.
+        """
+        return cls.process_function(function)
+
     @property
     @classmethod
     def name(cls):
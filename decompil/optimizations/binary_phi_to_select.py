@@ -1,6 +1,7 @@
 from collections import namedtuple
 
 from decompil import ir, optimizations
+from decompil.analysis.manager import CFG_ANALYSES
 from decompil.analysis.predecessors import get_predecessors
 
 
@@ -29,6 +30,8 @@ class BinaryPhiToSelect(optimizations.Optimization):
     # TODO: maybe allow this pass only in FORM_EXPR mode and create SELECT
     # nodes only when they don't violate SSA.
 
+    PRESERVED_ANALYSES = CFG_ANALYSES
+
     @classmethod
     def process_function(cls, function):
         self = cls(function)
@@ -36,7 +39,7 @@ class BinaryPhiToSelect(optimizations.Optimization):
 
     def __init__(self, function):
         self.function = function
-        self.predecessors = get_predecessors(function)
+        self.predecessors = function.analyses.get(get_predecessors)
 
     def _process(self):
         # We are lazy here and don't traverse instructions in depth.
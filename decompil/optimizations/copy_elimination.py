@@ -1,4 +1,5 @@
 from decompil import ir, optimizations
+from decompil.analysis.manager import CFG_ANALYSES
 
 
 class CopyElimination(optimizations.Optimization):
@@ -7,6 +8,8 @@ class CopyElimination(optimizations.Optimization):
     value.
     """
 
+    PRESERVED_ANALYSES = CFG_ANALYSES
+
     @staticmethod
     def get_original_value(value):
         """
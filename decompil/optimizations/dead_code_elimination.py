@@ -1,11 +1,62 @@
 from decompil import ir, optimizations
+from decompil.analysis.dominance import get_reverse_postorder
+from decompil.analysis.manager import CFG_ANALYSES
+
+
+def remove_phi_predecessor(basic_block, pred):
+    """
+    Remove `pred` from the PHI nodes in `basic_block`. PHI nodes that are left
+    with a single incoming value are replaced with this value.
+    """
+    trivial_phis = []
+    for insn in basic_block:
+        if insn.kind != ir.PHI:
+            break
+        insn.remove_predecessor(pred)
+        if len(insn.pairs) == 1 and insn.pairs[0][1].value is not insn:
+            trivial_phis.append(insn)
+
+    for phi in trivial_phis:
+        _, value = phi.pairs[0]
+        basic_block.function.replace_value(phi.as_value, value)
+    if trivial_phis:
+        basic_block.remove_instructions(set(trivial_phis))
+
+
+def remove_unreachable_basic_blocks(function):
+    """
+    Remove basic blocks that are not reachable from the entry of `function`
+    and update PHI nodes that reference them. Return whether some basic block
+    was removed.
+    """
+    reachable = set(get_reverse_postorder(function))
+    unreachable = set(
+        bb for bb in function
+        if bb not in reachable
+    )
+    if not unreachable:
+        return False
+
+    # Reachable basic blocks are about to lose unreachable predecessors:
+    # update their PHI nodes accordingly.
+    for bb in unreachable:
+        for succ in set(bb.get_successors(True)):
+            if succ not in unreachable:
+                remove_phi_predecessor(succ, bb)
+
+    function.remove_basic_blocks(unreachable)
+    return True
 
 
 class DeadCodeElimination(optimizations.Optimization):
     """
-    Remove all unused instructions and basic blocks.
+    Remove all unused instructions and unreachable basic blocks.
     """
 
+    # Dominance analyses only consider reachable basic blocks, so removing
+    # unreachable ones preserves them.
+    PRESERVED_ANALYSES = CFG_ANALYSES
+
     @classmethod
     def process_function(cls, function):
         self = cls(function)
@@ -16,6 +67,8 @@ class DeadCodeElimination(optimizations.Optimization):
         self.used_instructions = set()
 
     def _process(self):
+        remove_unreachable_basic_blocks(self.function)
+
         # First pass: compute the set of all used instructions. These are the
         # instructions that either:
         #  - return no value;
@@ -27,19 +80,28 @@ class DeadCodeElimination(optimizations.Optimization):
 
         # Second pass: remove all instructions that are not used.
         for basic_block in self.function:
-            to_remove = []
-            for i, insn in enumerate(basic_block):
-                if insn not in self.used_instructions:
-                    to_remove.append(i)
-            for i in reversed(to_remove):
-                basic_block.remove(i)
-
-        # TODO: remove unused basic blocks
+            unused = [
+                insn for insn in basic_block
+                if insn not in self.used_instructions
+            ]
+            if unused:
+                basic_block.remove_instructions(set(unused))
 
     def mark_used(self, insn):
-        if insn in self.used_instructions:
+        used = self.used_instructions
+        if insn in used:
             return
-        self.used_instructions.add(insn)
-        for value in insn.inputs:
-            if isinstance(value.value, ir.ComputingInstruction):
-                self.mark_used(value.value)
+        used.add(insn)
+
+        # Walk inputs with an explicit stack: expressions can be very deep.
+        stack = [insn]
+        while stack:
+            insn = stack.pop()
+            for value in insn.inputs:
+                if (
+                    value is not None
+                    and isinstance(value.value, ir.ComputingInstruction)
+                    and value.value not in used
+                ):
+                    used.add(value.value)
+                    stack.append(value.value)
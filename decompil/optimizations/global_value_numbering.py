@@ -0,0 +1,137 @@
+from decompil import ir, optimizations
+from decompil.analysis.dominance import get_dominator_tree
+from decompil.analysis.manager import CFG_ANALYSES
+
+
+class GlobalValueNumbering(optimizations.Optimization):
+    """
+    Replace computations with equivalent ones that dominate them.
+
+    Two instructions are equivalent when they have the same kind, the same
+    type and equivalent operands. The function must be in SSA form: register
+    and memory loads are never considered equivalent. Return the number of
+    removed instructions.
+    """
+
+    PRESERVED_ANALYSES = CFG_ANALYSES
+
+    # Kinds for operations whose operands can be swapped.
+    COMMUTATIVE_KINDS = (ir.ADD, ir.MUL, ir.AND, ir.OR, ir.XOR, ir.EQ, ir.NE)
+
+    @classmethod
+    def process_function(cls, function):
+        self = cls(function)
+        self._process()
+        return self.removed
+
+    def __init__(self, function):
+        self.function = function
+
+        # Mapping: instruction key (see get_key) -> instruction that computes
+        # it and that dominates the current basic block.
+        self.leaders = {}
+
+        # Number of instructions removed so far.
+        self.removed = 0
+
+    def _process(self):
+        # We are lazy here and don't traverse instructions in depth.
+        assert self.function.form == ir.Function.FORM_PURE
+
+        dom_tree = self.function.analyses.get(get_dominator_tree)
+
+        # Walk down the dominator tree with an explicit stack (see
+        # RegistersToSSA.rename): when a basic block is popped the second
+        # time, its keys must not be visible anymore.
+        stack = [(self.function.entry, None)]
+        while stack:
+            basic_block, keys = stack.pop()
+            if keys is None:
+                keys = self.number_basic_block(basic_block)
+                stack.append((basic_block, keys))
+                stack.extend(
+                    (dom_child, None)
+                    for dom_child in dom_tree.get_children(basic_block)
+                )
+            else:
+                for key in keys:
+                    del self.leaders[key]
+
+    def number_basic_block(self, basic_block):
+        """
+        Replace instructions in `basic_block` that have a leader. Return the
+        list of keys for the instructions that became leaders.
+        """
+        new_keys = []
+        redundant = set()
+        for insn in basic_block:
+            key = self.get_key(insn)
+            if key is None:
+                continue
+            leader = self.leaders.get(key)
+            if leader is None:
+                self.leaders[key] = insn
+                new_keys.append(key)
+            else:
+                self.function.replace_value(insn.as_value, leader.as_value)
+                redundant.add(insn)
+
+        if redundant:
+            basic_block.remove_instructions(redundant)
+            self.removed += len(redundant)
+        return new_keys
+
+    @staticmethod
+    def get_operand_key(value):
+        """
+        Return a key for an operand. Since equivalent instructions are
+        replaced with their leader as we go, instructions are their own key.
+        """
+        if value is None:
+            return None
+        elif isinstance(value.value, int):
+            return (value.type, value.value)
+        else:
+            return value.value
+
+    def get_key(self, insn):
+        """
+        Return a hashable key for the computation `insn` performs, or None if
+        it cannot be shared.
+        """
+        get_operand_key = self.get_operand_key
+
+        if isinstance(insn, (ir.BinaryInstruction, ir.ComparisonInstruction)):
+            operands = (
+                get_operand_key(insn.left), get_operand_key(insn.right)
+            )
+            if insn.kind in self.COMMUTATIVE_KINDS:
+                # Any stable order will do as long as it does not depend on
+                # the original operand order.
+                operands = frozenset(operands)
+            return (insn.kind, insn.type, operands)
+
+        elif isinstance(insn, ir.ConversionInstruction):
+            return (insn.kind, insn.type, get_operand_key(insn.value))
+
+        elif isinstance(insn, ir.SelectInstruction):
+            return (insn.kind, insn.type, (
+                get_operand_key(insn.condition),
+                get_operand_key(insn.true_value),
+                get_operand_key(insn.false_value),
+            ))
+
+        elif isinstance(insn, ir.ConcatenateInstruction):
+            return (insn.kind, insn.type, tuple(
+                get_operand_key(op) for op in insn.operands
+            ))
+
+        elif isinstance(insn, ir.PhiInstruction):
+            # PHI nodes are equivalent only in the same basic block.
+            return (insn.kind, insn.type, insn.basic_block, frozenset(
+                (basic_block, get_operand_key(value))
+                for basic_block, value in insn.pairs
+            ))
+
+        else:
+            return None
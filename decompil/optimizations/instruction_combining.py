@@ -0,0 +1,296 @@
+from decompil import ir, optimizations
+from decompil.analysis.manager import CFG_ANALYSES
+
+
+# How deep to look into operands when computing which bits can be non-zero or
+# when looking for a bit field.
+MAX_DEPTH = 8
+
+
+def _full_mask(width):
+    return (1 << width) - 1
+
+
+def _get_constant(value):
+    """
+    Return the (unsigned) integer for constant `value`, or None if it is not
+    a constant.
+    """
+    if isinstance(value.value, int):
+        return value.value & _full_mask(value.type.width)
+    else:
+        return None
+
+
+def _get_nonzero_bits(value, depth=MAX_DEPTH):
+    """Return a mask of the bits of `value` that may not be zero."""
+    full = _full_mask(value.type.width)
+    if isinstance(value.value, int):
+        return value.value & full
+    insn = value.value
+    if depth == 0 or insn.basic_block is None:
+        return full
+    depth -= 1
+
+    kind = insn.kind
+    if kind == ir.ZEXT:
+        return _full_mask(insn.value.type.width)
+    elif kind == ir.TRUNC:
+        return _get_nonzero_bits(insn.value, depth) & full
+    elif kind in (ir.LSHL, ir.LSHR):
+        shift = _get_constant(insn.right)
+        if shift is None:
+            return full
+        bits = _get_nonzero_bits(insn.left, depth)
+        if kind == ir.LSHL:
+            return (bits << shift) & full
+        else:
+            return bits >> shift
+    elif kind == ir.AND:
+        return (
+            _get_nonzero_bits(insn.left, depth)
+            & _get_nonzero_bits(insn.right, depth)
+        )
+    elif kind in (ir.OR, ir.XOR):
+        return (
+            _get_nonzero_bits(insn.left, depth)
+            | _get_nonzero_bits(insn.right, depth)
+        )
+    else:
+        return full
+
+
+def _extract_field(value, shift, type, depth=MAX_DEPTH):
+    """
+    Return an existing value (or a constant) equal to the `type`-wide bit
+    field of `value` that starts at bit `shift`. Return None if there is no
+    such value.
+    """
+    width = type.width
+    if shift + width > value.type.width:
+        return None
+    demanded = _full_mask(width) << shift
+    if not _get_nonzero_bits(value) & demanded:
+        return type.create(0)
+    if isinstance(value.value, int):
+        return type.create(_get_constant(value) >> shift & _full_mask(width))
+    if shift == 0 and value.type == type:
+        return value
+    insn = value.value
+    if depth == 0 or insn.basic_block is None:
+        return None
+    depth -= 1
+
+    kind = insn.kind
+    if kind in (ir.ZEXT, ir.TRUNC):
+        return _extract_field(insn.value, shift, type, depth)
+    elif kind in (ir.LSHL, ir.LSHR):
+        amount = _get_constant(insn.right)
+        if amount is None:
+            return None
+        if kind == ir.LSHR:
+            return _extract_field(insn.left, shift + amount, type, depth)
+        elif amount <= shift:
+            return _extract_field(insn.left, shift - amount, type, depth)
+        else:
+            return None
+    elif kind in (ir.OR, ir.XOR):
+        # Look for the only operand that has bits in the field.
+        if not _get_nonzero_bits(insn.left) & demanded:
+            return _extract_field(insn.right, shift, type, depth)
+        elif not _get_nonzero_bits(insn.right) & demanded:
+            return _extract_field(insn.left, shift, type, depth)
+        else:
+            return None
+    elif kind == ir.AND:
+        # Look for masks that keep the whole field.
+        for operand, mask in (
+            (insn.left, insn.right),
+            (insn.right, insn.left)
+        ):
+            mask = _get_constant(mask)
+            if mask is not None and mask & demanded == demanded:
+                return _extract_field(operand, shift, type, depth)
+        return None
+    else:
+        return None
+
+
+# Rules below get an instruction to simplify. They return either a value that
+# can replace it, True if they modified the instruction in place, or None if
+# they could not simplify it.
+
+def _combine_identity(insn):
+    """Operations with a neutral operand: x + 0, x | 0, x & -1, ..."""
+    if not isinstance(insn.type, ir.IntType):
+        return None
+    neutral = _full_mask(insn.type.width) if insn.kind == ir.AND else 0
+    if _get_constant(insn.right) == neutral:
+        return insn.left
+    elif (
+        insn.kind in (ir.ADD, ir.AND, ir.OR, ir.XOR)
+        and _get_constant(insn.left) == neutral
+    ):
+        return insn.right
+    else:
+        return None
+
+
+def _combine_disjoint_add(insn):
+    """Additions of values that have no bit in common are bitwise OR."""
+    if not isinstance(insn.type, ir.IntType):
+        return None
+    if _get_nonzero_bits(insn.left) & _get_nonzero_bits(insn.right):
+        return None
+    insn.kind = ir.OR
+    return True
+
+
+def _combine_conversions(insn):
+    """
+    Conversions to the same type, zext(zext(x)), sext(sext(x)),
+    trunc(trunc(x)) and trunc(zext(x)).
+    """
+    value = insn.value
+    if value.type == insn.dest_type and insn.kind != ir.BITCAST:
+        return value
+    inner = value.value
+    if (
+        isinstance(inner, int)
+        or inner.kind not in (ir.ZEXT, ir.SEXT, ir.TRUNC)
+    ):
+        return None
+
+    inner_value = inner.value
+    if inner.kind == insn.kind:
+        pass
+    elif insn.kind == ir.TRUNC and inner.kind in (ir.ZEXT, ir.SEXT):
+        if inner_value.type == insn.dest_type:
+            return inner_value
+        elif inner_value.type.width < insn.dest_type.width:
+            insn.kind = inner.kind
+    else:
+        return None
+    insn.map_inputs(lambda _: inner_value)
+    return True
+
+
+def _combine_field_extraction(insn):
+    """trunc(lshr(x, c)) when this bit field is a value already in `x`."""
+    value = insn.value
+    shift = 0
+    if (
+        not isinstance(value.value, int)
+        and value.value.kind == ir.LSHR
+        and _get_constant(value.value.right) is not None
+    ):
+        shift = _get_constant(value.value.right)
+        value = value.value.left
+    return _extract_field(value, shift, insn.dest_type)
+
+
+def _combine_shift_by_zero(insn):
+    return insn.left if _get_constant(insn.right) == 0 else None
+
+
+# Mapping: instruction kind -> rules to try for it, in order.
+RULES = {
+    ir.ADD: (_combine_identity, _combine_disjoint_add),
+    ir.SUB: (_combine_identity, ),
+    ir.AND: (_combine_identity, ),
+    ir.OR: (_combine_identity, ),
+    ir.XOR: (_combine_identity, ),
+    ir.LSHL: (_combine_shift_by_zero, ),
+    ir.LSHR: (_combine_shift_by_zero, ),
+    ir.ASHR: (_combine_shift_by_zero, ),
+    ir.ZEXT: (_combine_conversions, ),
+    ir.SEXT: (_combine_conversions, ),
+    ir.TRUNC: (_combine_conversions, _combine_field_extraction),
+}
+
+
+class InstructionCombining(optimizations.Optimization):
+    """
+    Simplify instructions using local patterns (see RULES) until none
+    applies, removing instructions that become unused on the way.
+
+    This mostly targets the bit field operations that merge and split
+    composite registers. Return the number of removed instructions.
+    """
+
+    PRESERVED_ANALYSES = CFG_ANALYSES
+
+    @classmethod
+    def process_function(cls, function):
+        self = cls(function)
+        self._process()
+        return len(self.removed)
+
+    def __init__(self, function):
+        self.function = function
+
+        # Instructions to (re-)process, and the set of them for fast lookup.
+        self.worklist = []
+        self.queued = set()
+
+        # Instructions that are not used anymore. They are taken out of use
+        # lists as soon as they are found, and out of basic blocks at the end.
+        self.removed = set()
+
+    def _process(self):
+        # We are lazy here and don't traverse instructions in depth.
+        assert self.function.form == ir.Function.FORM_PURE
+
+        for basic_block in reversed(self.function.basic_blocks):
+            for insn in reversed(basic_block.instructions):
+                self.push(insn)
+
+        while self.worklist:
+            insn = self.worklist.pop()
+            self.queued.remove(insn)
+            if insn not in self.removed:
+                self.combine(insn)
+
+        to_remove = {}
+        for insn in self.removed:
+            to_remove.setdefault(insn.basic_block, set()).add(insn)
+        for basic_block, insns in to_remove.items():
+            basic_block.remove_instructions(insns)
+
+    def push(self, insn):
+        if (
+            isinstance(insn, ir.ComputingInstruction)
+            and insn not in self.queued
+        ):
+            self.queued.add(insn)
+            self.worklist.append(insn)
+
+    def push_inputs(self, inputs):
+        for value in inputs:
+            if value is not None and not isinstance(value.value, int):
+                self.push(value.value)
+
+    def combine(self, insn):
+        if not insn.uses:
+            # Like in DeadCodeElimination, unused computations can go.
+            self.removed.add(insn)
+            insn.unregister()
+            self.push_inputs(insn.inputs)
+            return
+
+        for rule in RULES.get(insn.kind, ()):
+            inputs = insn.inputs
+            result = rule(insn)
+            if result is None:
+                continue
+
+            for user in insn.uses:
+                self.push(user)
+            if result is True:
+                # Inputs that are not used anymore must go.
+                self.push_inputs(inputs)
+                self.push(insn)
+            else:
+                self.function.replace_value(insn.as_value, result)
+                self.combine(insn)
+            return
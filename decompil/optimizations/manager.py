@@ -0,0 +1,184 @@
+import json
+import time
+
+from decompil.optimizations import (
+    binary_phi_to_select,
+    copy_elimination,
+    dead_code_elimination,
+    global_value_numbering,
+    instruction_combining,
+    merge_basic_block_sequences,
+    registers_to_ssa,
+    sparse_conditional_constant_propagation,
+    strip_unused_branches,
+    to_expr,
+)
+
+
+class FixedPoint:
+    """
+    Group of optimizations to run in sequence again and again, until they do
+    not change the function anymore or until `max_iterations` is reached.
+    """
+
+    def __init__(self, optimizations, max_iterations=8):
+        self.optimizations = tuple(optimizations)
+        self.max_iterations = max_iterations
+
+
+# Mapping: pipeline name -> sequence of optimizations and FixedPoint groups.
+PIPELINES = {
+    # Turn registers into SSA values and clean up what this leaves behind.
+    'ssa': (
+        registers_to_ssa.RegistersToSSA,
+        copy_elimination.CopyElimination,
+        dead_code_elimination.DeadCodeElimination,
+    ),
+
+    # Everything, up to expression trees.
+    'default': (
+        registers_to_ssa.RegistersToSSA,
+        copy_elimination.CopyElimination,
+        FixedPoint((
+            sparse_conditional_constant_propagation
+                .SparseConditionalConstantPropagation,
+            instruction_combining.InstructionCombining,
+            global_value_numbering.GlobalValueNumbering,
+            dead_code_elimination.DeadCodeElimination,
+        )),
+        binary_phi_to_select.BinaryPhiToSelect,
+        to_expr.ToExpr,
+        strip_unused_branches.StripUnusedBranches,
+        merge_basic_block_sequences.MergeBasicBlockSequences,
+        to_expr.ToExpr,
+    ),
+}
+
+
+def count_instructions(function):
+    """Return the number of instructions directly in `function`."""
+    return sum(len(basic_block) for basic_block in function)
+
+
+class PassManager:
+    """
+    Run a pipeline of optimizations on functions and record statistics about
+    each run: wall time and function size before and after.
+
+    `pipeline` is either a name from PIPELINES or a sequence of optimizations
+    and FixedPoint groups. If provided, `callback` is invoked after each
+    optimization run as `callback(function, step, optimization)`, where
+    `step` counts runs on this function starting from 1.
+
+    An optimization is considered to change the function when it returns a
+    true value (see Optimization.run) or when the number of instructions or
+    basic blocks changes.
+    """
+
+    def __init__(self, pipeline, callback=None):
+        if isinstance(pipeline, str):
+            self.name = pipeline
+            self.pipeline = PIPELINES[pipeline]
+        else:
+            self.name = None
+            self.pipeline = tuple(pipeline)
+        self.callback = callback
+
+        # List of dicts, one per optimization run (see run_optimization).
+        self.records = []
+
+        # Number of optimization runs on the current function.
+        self.step = 0
+
+    def run(self, function):
+        """Run the whole pipeline on `function`."""
+        self.step = 0
+        self.run_sequence(function, self.pipeline)
+
+    def run_sequence(self, function, pipeline, iteration=None):
+        """
+        Run the optimizations and groups in `pipeline` on `function`. Return
+        whether one of them changed it.
+        """
+        changed = False
+        for item in pipeline:
+            if isinstance(item, FixedPoint):
+                for i in range(item.max_iterations):
+                    if not self.run_sequence(
+                        function, item.optimizations, i
+                    ):
+                        break
+                    changed = True
+            else:
+                if self.run_optimization(function, item, iteration):
+                    changed = True
+        return changed
+
+    def run_optimization(self, function, optimization, iteration=None):
+        """
+        Run `optimization` on `function` and record statistics about it.
+        `iteration` is the fixed point iteration number, if any. Return
+        whether the optimization changed the function.
+        """
+        insns_before = count_instructions(function)
+        blocks_before = len(function)
+        start_time = time.perf_counter()
+        result = optimization.run(function)
+        duration = time.perf_counter() - start_time
+        insns_after = count_instructions(function)
+        blocks_after = len(function)
+
+        self.records.append({
+            'function': '{:x}'.format(function.address),
+            'pass': optimization.__name__,
+            'iteration': iteration,
+            'time': duration,
+            'instructions_before': insns_before,
+            'instructions_after': insns_after,
+            'basic_blocks_before': blocks_before,
+            'basic_blocks_after': blocks_after,
+            'result': result,
+        })
+
+        self.step += 1
+        if self.callback:
+            self.callback(function, self.step, optimization)
+
+        return bool(
+            result
+            or insns_before != insns_after
+            or blocks_before != blocks_after
+        )
+
+    def get_report(self):
+        """
+        Return statistics for all runs so far as a JSON-serializable dict:
+        per-run records and totals for each optimization.
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['pass'], {
+                'runs': 0,
+                'time': 0.0,
+                'instructions_removed': 0,
+                'basic_blocks_removed': 0,
+            })
+            total['runs'] += 1
+            total['time'] += record['time']
+            total['instructions_removed'] += (
+                record['instructions_before'] - record['instructions_after']
+            )
+            total['basic_blocks_removed'] += (
+                record['basic_blocks_before'] - record['basic_blocks_after']
+            )
+        return {
+            'pipeline': self.name,
+            'time': sum(record['time'] for record in self.records),
+            'totals': totals,
+            'runs': self.records,
+        }
+
+    def write_report(self, f):
+        """Write the report (see get_report) to the `f` file as JSON."""
+        json.dump(self.get_report(), f, indent=2, sort_keys=True)
+        f.write('\n')
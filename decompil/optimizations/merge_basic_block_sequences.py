@@ -13,7 +13,7 @@ class MergeBasicBlockSequences(optimizations.Optimization):
 
     def __init__(self, function):
         self.function = function
-        self.predecessors = get_predecessors(function)
+        self.predecessors = function.analyses.get(get_predecessors)
 
         # Set of indices for basic blocks to remove.
         self.to_remove = set()
@@ -62,14 +62,9 @@ class MergeBasicBlockSequences(optimizations.Optimization):
             first_bb = sequence.pop(0)
             last_bb = sequence[-1]
 
-            # Update the predecessors database so that the rest of the
-            # algorithm works properly and update references to `last_bb` in
-            # PHI nodes.
+            # Update references to `last_bb` in PHI nodes. Predecessors are
+            # updated as the terminator of `last_bb` moves to `first_bb`.
             for succ in last_bb.successors:
-                preds = self.predecessors[succ]
-                preds.remove(last_bb)
-                preds.add(first_bb)
-
                 for root_insn in succ:
                     for insn in get_inlined_insns(root_insn):
                         if insn.kind == ir.PHI:
@@ -6,6 +6,7 @@ from pygments.token import *
 
 from decompil import builder, ir, optimizations
 from decompil.analysis.dominance import get_dominance_frontiers
+from decompil.analysis.liveness import get_register_liveness
 from decompil.analysis.predecessors import get_predecessors
 
 
@@ -58,7 +59,7 @@ class RegistersToSSA(optimizations.Optimization):
 
     def __init__(self, function):
         self.function = function
-        self.predecessors = get_predecessors(function)
+        self.predecessors = function.analyses.get(get_predecessors)
         self.bld = builder.Builder()
 
         # Mapping: register -> set of all basic blocks that store a value in
@@ -75,6 +76,10 @@ class RegistersToSSA(optimizations.Optimization):
 
         self.dom_tree = None
 
+        # Registers liveness (see decompil.analysis.liveness), computed in
+        # _process.
+        self.liveness = None
+
     def _process(self):
         self.store_sites = self.get_store_sites(self.function)
         self.stored_registers = collections.defaultdict(set)
@@ -94,6 +99,7 @@ class RegistersToSSA(optimizations.Optimization):
             for ss in reg_store_sites:
                 self.stored_registers[ss].add(register)
         self.bld.build_jump(old_entry)
+        self.function.analyses.invalidate()
 
         # Force registers reloading after barrier instructions.
         for basic_block in self.function:
@@ -108,7 +114,10 @@ class RegistersToSSA(optimizations.Optimization):
                     break
 
         # Enter the regular renaming algorithm...
-        self.dom_tree, dom_frontiers = get_dominance_frontiers(self.function)
+        self.dom_tree, dom_frontiers = self.function.analyses.get(
+            get_dominance_frontiers
+        )
+        self.liveness = self.function.analyses.get(get_register_liveness)
 
         # For each register, create phi nodes in basic blocks that need some.
         for register, reg_store_sites in self.store_sites.items():
@@ -116,8 +125,7 @@ class RegistersToSSA(optimizations.Optimization):
 
         # Now perform the renaming itself. Skip the new entry point: it does
         # not need renaming (most importantly, it's invalid to rename it).
-        for basic_block in self.dom_tree.get_children(new_entry):
-            self.transform_reg_insns(basic_block)
+        self.rename(self.dom_tree.get_children(new_entry))
 
     def create_phi_nodes(self, register, store_sites, dom_frontiers):
         """
@@ -133,7 +141,14 @@ class RegistersToSSA(optimizations.Optimization):
             # Create phi nodes in nodes that belong to their dominance frontier
             # and remember them. Do this transitively.
             for basic_block in dom_frontiers[store_site]:
-                if basic_block not in visited_bb:
+                if basic_block in visited_bb:
+                    continue
+                visited_bb.add(basic_block)
+                # Do not create phi nodes where `register` is dead: they would
+                # be useless. Only new phi nodes are new definitions, so only
+                # basic blocks that get one must have their own frontier
+                # processed.
+                if self.liveness.is_live_in(basic_block, register):
                     self.bld.position_at_start(basic_block)
                     self.bld.build_phi([
                         (
@@ -142,12 +157,40 @@ class RegistersToSSA(optimizations.Optimization):
                         )
                         for bb_pred in self.predecessors[basic_block]
                     ])
-                    visited_bb.add(basic_block)
                     if register not in self.stored_registers[basic_block]:
                         queue.add(basic_block)
 
+    def rename(self, basic_blocks):
+        """
+        Rename register loads and stores in `basic_blocks` and in all the basic
+        blocks they dominate.
+        """
+        # Walk down the dominator tree with an explicit stack. Each item is a
+        # basic block and, once it is processed, the mapping returned by
+        # transform_reg_insns: when we pop it again, we are done with the
+        # basic blocks it dominates, so we can hide its definitions.
+        stack = [(basic_block, None) for basic_block in basic_blocks]
+        while stack:
+            basic_block, def_introduced = stack.pop()
+            if def_introduced is None:
+                stack.append(
+                    (basic_block, self.transform_reg_insns(basic_block))
+                )
+                stack.extend(
+                    (dom_child, None)
+                    for dom_child in self.dom_tree.get_children(basic_block)
+                )
+            else:
+                for register, def_count in def_introduced.items():
+                    del self.def_stacks[register][-def_count:]
+
     def transform_reg_insns(self, basic_block):
-        def_introduced = collections.defaultdict(lambda: 0)
+        """
+        Rename register loads and stores in `basic_block` and propagate the
+        resulting values to phi nodes in its successors. Return a mapping:
+        register -> number of definitions pushed on its definition stack.
+        """
+        def_introduced = collections.defaultdict(int)
         def introduce_def(reg, value):
             self.def_stacks[reg].append(value)
             def_introduced[reg] += 1
@@ -175,11 +218,8 @@ class RegistersToSSA(optimizations.Optimization):
                     self.def_stacks[insn.source][-1]
                 )
                 basic_block.replace(i, new_insn)
-                # TODO: for efficiency purposes, instead of looking for the old
-                # value in the whole function, we could instead do so only in
-                # the children from the dominator tree and their successors:
-                # these are the only places where it is legitimate to reference
-                # the value.
+                # Thanks to use lists, this visits only the users of the old
+                # value, which are all in the dominated region.
                 basic_block.function.replace_value(
                     insn.as_value, new_insn.as_value
                 )
@@ -216,20 +256,16 @@ class RegistersToSSA(optimizations.Optimization):
                 basic_block.remove(i)
 
         # Propagate the corresponding values to the phi nodes in the
-        # successors.
+        # successors. They are all at the beginning of basic blocks.
         for bb_succ in basic_block.successors:
             for insn in bb_succ:
+                if insn.kind != ir.PHI:
+                    break
                 register = self.search_dummy_arg(basic_block, insn)
                 if register:
                     insn.set_value(basic_block, self.def_stacks[register][-1])
 
-        # Recurse down the dominator tree.
-        for dom_child in self.dom_tree.get_children(basic_block):
-            self.transform_reg_insns(dom_child)
-
-        # Hide all definitions created here from the caller.
-        for register, def_count in def_introduced.items():
-            self.def_stacks[register] = self.def_stacks[register][:-def_count]
+        return def_introduced
 
     def search_dummy_arg(self, bb, insn):
         """
@@ -0,0 +1,356 @@
+from decompil import ir, optimizations
+from decompil.optimizations.dead_code_elimination import (
+    remove_phi_predecessor, remove_unreachable_basic_blocks
+)
+
+
+# Values are tracked bit by bit: an abstract value is a (mask, bits) couple
+# where `mask` tells which bits are known and `bits` gives their value (bits
+# outside `mask` are always zero). A constant is a value whose bits are all
+# known. Values that are not computed yet are represented as None.
+OVERDEFINED = (0, 0)
+
+
+def _full_mask(width):
+    return (1 << width) - 1
+
+
+def _to_signed(value, width):
+    if value & (1 << (width - 1)):
+        return value - (1 << width)
+    else:
+        return value
+
+
+def _meet(left, right):
+    """Return what is known about a value that is `left` or `right`."""
+    if left is None:
+        return right
+    elif right is None:
+        return left
+    left_mask, left_bits = left
+    right_mask, right_bits = right
+    mask = left_mask & right_mask & ~(left_bits ^ right_bits)
+    return (mask, left_bits & mask)
+
+
+def _fold_binary(kind, width, right_width, left, right):
+    full = _full_mask(width)
+    # Shift amounts can have any width.
+    right_full = right[0] == _full_mask(right_width)
+    left_mask, left_bits = left
+    right_mask, right_bits = right
+
+    if kind == ir.AND:
+        ones = left_bits & right_bits
+        zeros = (left_mask & ~left_bits) | (right_mask & ~right_bits)
+        return (ones | zeros, ones)
+    elif kind == ir.OR:
+        ones = left_bits | right_bits
+        zeros = (left_mask & ~left_bits) & (right_mask & ~right_bits)
+        return (ones | zeros, ones)
+    elif kind == ir.XOR:
+        mask = left_mask & right_mask
+        return (mask, (left_bits ^ right_bits) & mask)
+
+    if kind in (ir.LSHL, ir.LSHR, ir.ASHR) and right_full:
+        if right_bits >= width:
+            if kind == ir.ASHR:
+                sign = 1 << (width - 1)
+                if not left_mask & sign:
+                    return OVERDEFINED
+                return (full, full if left_bits & sign else 0)
+            return (full, 0)
+        shift = right_bits
+        if kind == ir.LSHL:
+            return (
+                ((left_mask << shift) | _full_mask(shift)) & full,
+                (left_bits << shift) & full
+            )
+        high_bits = full & ~(full >> shift)
+        if kind == ir.LSHR:
+            return (left_mask >> shift | high_bits, left_bits >> shift)
+        sign = 1 << (width - 1)
+        if not left_mask & sign:
+            return ((left_mask >> shift) & (full >> shift), left_bits >> shift)
+        return (
+            left_mask >> shift | high_bits,
+            left_bits >> shift | (high_bits if left_bits & sign else 0)
+        )
+
+    # Other operations need all operand bits.
+    if left_mask != full or not right_full:
+        return OVERDEFINED
+    if kind == ir.ADD:
+        result = left_bits + right_bits
+    elif kind == ir.SUB:
+        result = left_bits - right_bits
+    elif kind == ir.MUL:
+        result = left_bits * right_bits
+    elif kind in (ir.SDIV, ir.UDIV) and right_bits == 0:
+        return OVERDEFINED
+    elif kind == ir.SDIV:
+        result = (
+            _to_signed(left_bits, width) // _to_signed(right_bits, width)
+        )
+    elif kind == ir.UDIV:
+        result = left_bits // right_bits
+    else:
+        return OVERDEFINED
+    return (full, result & full)
+
+
+def _fold_comparison(kind, width, left, right):
+    full = _full_mask(width)
+    left_mask, left_bits = left
+    right_mask, right_bits = right
+
+    if left_mask != full or right_mask != full:
+        # Values whose known bits differ cannot be equal.
+        if (
+            kind in (ir.EQ, ir.NE)
+            and (left_bits ^ right_bits) & left_mask & right_mask
+        ):
+            return (1, int(kind == ir.NE))
+        return OVERDEFINED
+
+    if kind in (ir.SLE, ir.SLT, ir.SGE, ir.SGT):
+        left_bits = _to_signed(left_bits, width)
+        right_bits = _to_signed(right_bits, width)
+    if kind == ir.EQ:
+        result = left_bits == right_bits
+    elif kind == ir.NE:
+        result = left_bits != right_bits
+    elif kind in (ir.SLE, ir.ULE):
+        result = left_bits <= right_bits
+    elif kind in (ir.SLT, ir.ULT):
+        result = left_bits < right_bits
+    elif kind in (ir.SGE, ir.UGE):
+        result = left_bits >= right_bits
+    elif kind in (ir.SGT, ir.UGT):
+        result = left_bits > right_bits
+    else:
+        assert False
+    return (1, int(result))
+
+
+def _fold_conversion(kind, src_width, dest_width, value):
+    mask, bits = value
+    ext_bits = _full_mask(dest_width) & ~_full_mask(src_width)
+    if kind == ir.ZEXT:
+        return (mask | ext_bits, bits)
+    elif kind == ir.SEXT:
+        sign = 1 << (src_width - 1)
+        if not mask & sign:
+            return (mask, bits)
+        return (mask | ext_bits, bits | (ext_bits if bits & sign else 0))
+    elif kind == ir.TRUNC:
+        dest_full = _full_mask(dest_width)
+        return (mask & dest_full, bits & dest_full)
+    elif kind == ir.BITCAST:
+        return value
+    else:
+        assert False
+
+
+class SparseConditionalConstantPropagation(optimizations.Optimization):
+    """
+    Propagate constants along the SSA graph and the control flow edges that
+    can be executed, then replace constant values and resolve branches.
+
+    Values are tracked bit by bit rather than as whole constants. This way,
+    testing a status register bit right after it is set or cleared folds even
+    though the rest of the register is unknown.
+    """
+
+    @classmethod
+    def process_function(cls, function):
+        self = cls(function)
+        self._process()
+
+    def __init__(self, function):
+        self.function = function
+
+        # Mapping: computing instruction -> (mask, bits) abstract value.
+        # Instructions that are not evaluated yet are not present.
+        self.values = {}
+
+        # Basic blocks and (source, destination) control flow edges that are
+        # known to be executable. The edge to the entry point has no source.
+        self.executable_blocks = set()
+        self.executable_edges = set()
+
+        # Control flow edges and instructions to (re-)process.
+        self.cfg_worklist = []
+        self.ssa_worklist = []
+
+    def _process(self):
+        # We are lazy here and don't traverse instructions in depth.
+        assert self.function.form == ir.Function.FORM_PURE
+
+        self.propagate()
+        self.rewrite()
+
+    def propagate(self):
+        self.cfg_worklist.append((None, self.function.entry))
+        while self.cfg_worklist or self.ssa_worklist:
+            while self.cfg_worklist:
+                edge = self.cfg_worklist.pop()
+                if edge in self.executable_edges:
+                    continue
+                self.executable_edges.add(edge)
+
+                _, basic_block = edge
+                if basic_block in self.executable_blocks:
+                    # Only PHI nodes can learn something from a new edge.
+                    for insn in basic_block:
+                        if insn.kind != ir.PHI:
+                            break
+                        self.visit(insn)
+                else:
+                    self.executable_blocks.add(basic_block)
+                    for insn in basic_block:
+                        self.visit(insn)
+
+            while self.ssa_worklist:
+                insn = self.ssa_worklist.pop()
+                if insn.basic_block in self.executable_blocks:
+                    self.visit(insn)
+
+    def visit(self, insn):
+        if insn.kind == ir.JUMP:
+            self.cfg_worklist.append((insn.basic_block, insn.destination))
+        elif insn.kind == ir.BRANCH:
+            condition = self.get_value(insn.condition)
+            if condition is None:
+                return
+            mask, bits = condition
+            if not mask or bits:
+                self.cfg_worklist.append((insn.basic_block, insn.dest_true))
+            if not mask or not bits:
+                self.cfg_worklist.append((insn.basic_block, insn.dest_false))
+        elif isinstance(insn, ir.ComputingInstruction):
+            value = self.evaluate(insn)
+            if value is None:
+                return
+            old_value = self.values.get(insn)
+            # Make sure values only lose precision, so that this terminates.
+            value = _meet(old_value, value)
+            if value != old_value:
+                self.values[insn] = value
+                self.ssa_worklist.extend(insn.uses)
+
+    def get_value(self, value):
+        """Return the abstract value for `value` (an ir.Value)."""
+        if isinstance(value.value, int):
+            return (_full_mask(value.type.width), value.value)
+        elif value.value.basic_block is None:
+            # Instructions out of basic blocks (for instance phi arguments
+            # that RegistersToSSA could not resolve) can be anything.
+            return OVERDEFINED
+        else:
+            return self.values.get(value.value)
+
+    def evaluate(self, insn):
+        """Return the abstract value `insn` computes."""
+        kind = insn.kind
+
+        if kind == ir.PHI:
+            result = None
+            for basic_block, value in insn.pairs:
+                if (basic_block, insn.basic_block) in self.executable_edges:
+                    result = _meet(result, self.get_value(value))
+            return result
+
+        elif kind == ir.COPY:
+            return self.get_value(insn.value)
+
+        elif kind == ir.SELECT:
+            condition = self.get_value(insn.condition)
+            if condition is None:
+                return None
+            mask, bits = condition
+            if mask:
+                return self.get_value(
+                    insn.true_value if bits else insn.false_value
+                )
+            return _meet(
+                self.get_value(insn.true_value),
+                self.get_value(insn.false_value)
+            )
+
+        elif isinstance(insn, ir.BinaryInstruction):
+            left = self.get_value(insn.left)
+            right = self.get_value(insn.right)
+            if left is None or right is None:
+                return None
+            return _fold_binary(
+                kind, insn.type.width, insn.right.type.width, left, right
+            )
+
+        elif isinstance(insn, ir.ComparisonInstruction):
+            left = self.get_value(insn.left)
+            right = self.get_value(insn.right)
+            if left is None or right is None:
+                return None
+            return _fold_comparison(kind, insn.left.type.width, left, right)
+
+        elif isinstance(insn, ir.ConversionInstruction):
+            value = self.get_value(insn.value)
+            if value is None:
+                return None
+            return _fold_conversion(
+                kind, insn.value.type.width, insn.dest_type.width, value
+            )
+
+        else:
+            return OVERDEFINED
+
+    def rewrite(self):
+        for basic_block in self.function:
+            if basic_block not in self.executable_blocks:
+                continue
+
+            # Replace constant values with actual constants.
+            constants = set()
+            for insn in basic_block:
+                if not isinstance(insn, ir.ComputingInstruction):
+                    continue
+                value = self.values.get(insn)
+                insn_type = insn.type
+                if (
+                    value is None
+                    or not isinstance(insn_type, ir.IntType)
+                    or value[0] != _full_mask(insn_type.width)
+                ):
+                    continue
+                self.function.replace_value(
+                    insn.as_value, insn_type.create(value[1])
+                )
+                constants.add(insn)
+            if constants:
+                basic_block.remove_instructions(constants)
+
+            # Turn branches whose condition is known into jumps. Basic blocks
+            # can be empty, or have no terminator.
+            if not basic_block or basic_block[-1].kind != ir.BRANCH:
+                continue
+            last_insn = basic_block[-1]
+            condition = self.get_value(last_insn.condition)
+            if condition is None or not condition[0]:
+                continue
+            if condition[1]:
+                taken, not_taken = last_insn.dest_true, last_insn.dest_false
+            else:
+                taken, not_taken = last_insn.dest_false, last_insn.dest_true
+            if not_taken != taken:
+                remove_phi_predecessor(not_taken, basic_block)
+            basic_block.replace(
+                len(basic_block) - 1,
+                ir.ControlFlowInstruction(
+                    self.function, ir.JUMP, taken, origin=last_insn.origin
+                )
+            )
+
+        # Basic blocks that were not executable are now unreachable.
+        remove_unreachable_basic_blocks(self.function)
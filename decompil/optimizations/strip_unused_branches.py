@@ -24,7 +24,7 @@ class StripUnusedBranches(optimizations.Optimization):
 
     def __init__(self, function):
         self.function = function
-        self.predecessors = get_predecessors(function)
+        self.predecessors = function.analyses.get(get_predecessors)
 
     def _process(self):
         # Set of indices for basic blocks to remove.
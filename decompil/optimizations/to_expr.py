@@ -1,20 +1,44 @@
 from decompil import ir, optimizations
-from decompil.analysis.uses import get_uses
-from decompil.analysis.utils import get_inlined_insns
+from decompil.analysis.manager import CFG_ANALYSES
+
+
+# Marker for expressions that contain PHI nodes from several basic blocks (see
+# ToExpr.phi_blocks).
+MIXED_PHI_BLOCKS = object()
 
 
 class ToExpr(optimizations.Optimization):
+    """
+    Inline all computing instructions whose result is used only once into the
+    instruction that uses it, turning the function into the expression form.
+    """
+
+    PRESERVED_ANALYSES = CFG_ANALYSES
 
     @classmethod
     def process_function(cls, function):
-        # Inline all computing instructions whose result is used only once.
-        uses = get_uses(function)
+        self = cls(function)
+        self._process()
+
+    def __init__(self, function):
+        self.function = function
 
-        for bb in function:
+        # Mapping: processed instruction -> basic block that contains all the
+        # PHI nodes in its expression (the instruction included), None if
+        # there is no PHI node and MIXED_PHI_BLOCKS if they come from several
+        # basic blocks.
+        self.phi_blocks = {}
+
+    def _process(self):
+        for bb in self.function:
             # Inlining is done in two steps: tag the instruction as such and
             # remove it from its basic block.
-            to_remove = []
-            for i, insn in enumerate(bb):
+            to_remove = set()
+            for insn in bb:
+                if not isinstance(insn, ir.ComputingInstruction):
+                    continue
+                phi_block = self.get_phi_block(insn)
+
                 # Do not inline:
                 #   - instructions that are used more than once;
                 #   - LOAD/RLOAD ones;
@@ -22,43 +46,74 @@ class ToExpr(optimizations.Optimization):
                 # TODO: for LOAD/RLOAD instruction, *maybe* it would be
                 # interesting to enable inlining when we know the register has
                 # not changed at the destination.
-                if len(uses[insn]) != 1 or insn.kind in (ir.LOAD, ir.RLOAD):
+                if insn.kind in (ir.LOAD, ir.RLOAD) or len(insn.uses) != 1:
+                    continue
+                (consumer, count), = insn.uses.items()
+                if count != 1 or consumer is insn:
                     continue
-                consumer = list(uses[insn])[0]
 
-                phi_nodes = cls.get_phi_nodes(insn)
-                if any(
-                    cls.get_container_bb(function, node) != bb
-                    for node in phi_nodes
+                # PHI nodes must stay in their basic block. Note that
+                # consumers that are already inlined are not in any basic
+                # block.
+                if (
+                    phi_block is not None
+                    and phi_block is not consumer.basic_block
                 ):
                     continue
 
                 insn.inline = True
-                to_remove.append(i)
+                to_remove.add(insn)
 
-            for i in reversed(to_remove):
-                bb.remove(i)
+            if to_remove:
+                bb.remove_instructions(to_remove)
 
-        function.form = function.FORM_EXPR
+        self.function.form = self.function.FORM_EXPR
 
-    @classmethod
-    def get_container_bb(cls, function, insn):
+    def get_phi_block(self, insn):
         """
-        Return the basic block that contains `insn`. Don't dive into
-        expressions.
+        Return the basic block that contains the PHI nodes in the expression
+        for `insn` (see `phi_blocks`).
         """
-        for bb in function:
-            if insn in bb:
-                return bb
-        else:
-            assert False
+        # Instructions inlined by a previous run are not processed yet. Use
+        # an explicit stack since expressions can be arbitrarily deep. PHI
+        # nodes inlined by a previous run are no longer in a basic block, but
+        # they stayed in the basic block of `insn`.
+        stack = [insn]
+        while stack:
+            top = stack[-1]
+            inlined = self.get_inlined_inputs(top)
+            pending = [
+                input_insn
+                for input_insn in inlined
+                if input_insn not in self.phi_blocks
+            ]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
 
-    @classmethod
-    def get_phi_nodes(cls, insn):
-        """
-        Return all PHI nodes inlined in `insn` (root instruction included).
-        """
-        return set(
-            insn for insn in get_inlined_insns(insn)
-            if insn.kind == ir.PHI
-        )
+            if top.kind == ir.PHI:
+                result = top.basic_block or insn.basic_block
+            else:
+                result = None
+            for input_insn in inlined:
+                phi_block = self.phi_blocks[input_insn]
+                if result is None:
+                    result = phi_block
+                elif phi_block is not None and phi_block is not result:
+                    result = MIXED_PHI_BLOCKS
+                    break
+            self.phi_blocks[top] = result
+        return self.phi_blocks[insn]
+
+    @staticmethod
+    def get_inlined_inputs(insn):
+        return [
+            value.value
+            for value in insn.inputs
+            if (
+                value is not None
+                and isinstance(value.value, ir.ComputingInstruction)
+                and value.value.inline
+            )
+        ]
@@ -0,0 +1,109 @@
+import collections
+import json
+
+from decompil import ir
+from decompil.analysis.utils import get_inlined_insns
+
+
+class Profile:
+    """
+    Execution counts for a function: how many times it ran and how many times
+    each CFG edge was taken.
+
+    Basic blocks are entered either when the function starts or through an
+    edge, and all the instructions in a basic block usually run when it is
+    entered, so block and instruction kind counts are derived from these.
+    Interpreters that stop in the middle of a basic block (see
+    Interpreter.process) record it in `suffix_counts`.
+
+    Pass a profile to Interpreter or to CompiledFunction to fill it. Several
+    runs, even through different interpreters, can share a profile. Profiles
+    count what is actually executed: they are not rolled back when an
+    interpreter restores a snapshot, and forks of an interpreter share its
+    profile.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.runs = 0
+
+        # Mapping: (source basic block, destination basic block) -> number of
+        # times the edge was taken
+        self.edge_counts = collections.Counter()
+
+        # Mapping: (basic block, instruction index) -> number to add to the
+        # execution counts of the instructions from this index to the end of
+        # the basic block. Execution that stops at this index decrements it
+        # and execution that resumes there increments it.
+        self.suffix_counts = collections.Counter()
+
+    @property
+    def block_counts(self):
+        """Mapping: basic block -> number of times it was entered."""
+        result = collections.Counter()
+        if self.runs:
+            result[self.function.entry] = self.runs
+        for (_, dest), count in self.edge_counts.items():
+            result[dest] += count
+        return result
+
+    @property
+    def kind_counts(self):
+        """
+        Mapping: instruction kind -> number of times instructions of this kind
+        were executed.
+        """
+        result = collections.Counter()
+        for bb, count in self.block_counts.items():
+            for root_insn in bb:
+                for insn in get_inlined_insns(root_insn):
+                    result[insn.kind] += count
+        for (bb, index), count in self.suffix_counts.items():
+            for root_insn in bb.instructions[index:]:
+                for insn in get_inlined_insns(root_insn):
+                    result[insn.kind] += count
+        # Drop the kinds that were never executed.
+        return +result
+
+    def instrument_handlers(self, handlers):
+        """
+        Return a copy of the `handlers` table (see Interpreter.HANDLERS) in
+        which control flow handlers count the edges they take.
+        """
+        result = dict(handlers)
+        edge_counts = self.edge_counts
+
+        def instrument(handler):
+            def counting_handler(interpreter, insn):
+                next_bb = handler(interpreter, insn)
+                if next_bb:
+                    edge_counts[(insn.basic_block, next_bb)] += 1
+                return next_bb
+            return counting_handler
+
+        for kind in (ir.JUMP, ir.BRANCH):
+            result[kind] = instrument(handlers[kind])
+        return result
+
+    def get_report(self):
+        """Return the counts as a JSON-serializable dict."""
+        return {
+            'function': '{:x}'.format(self.function.address),
+            'runs': self.runs,
+            'blocks': {
+                bb.name: count for bb, count in self.block_counts.items()
+            },
+            'edges': [
+                {'from': source.name, 'to': dest.name, 'count': count}
+                for (source, dest), count in self.edge_counts.items()
+            ],
+            'kinds': {
+                ir.NAMES[kind]: count
+                for kind, count in self.kind_counts.items()
+            },
+        }
+
+    def write_report(self, f):
+        """Write the report (see get_report) to the `f` file as JSON."""
+        json.dump(self.get_report(), f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,103 @@
+from decompil.interpreter import LiveValue
+
+
+class RegisterFile:
+    """
+    Values of the registers in a context, stored in a list indexed by
+    Register.index. Values are integers, or None when undefined. The list
+    grows when registers get an index after the register file is created
+    (see Context.get_register_index).
+
+    Composite registers are views on their components: reading one combines
+    the component values and writing one splits the value into them, the
+    same way gcdsp.Register.build_load/build_store do in the IR.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        registers = context.indexed_registers
+        self.values = [None] * len(registers)
+        # Mapping: register index -> mask for the width of the register
+        self.masks = [(1 << reg.type.width) - 1 for reg in registers]
+
+    @classmethod
+    def from_live_values(cls, context, registers):
+        """
+        Return a register file that holds the values in `registers`
+        (mapping: register -> LiveValue).
+        """
+        result = cls(context)
+        for reg, value in registers.items():
+            result.set(reg, value.value)
+        return result
+
+    def update_live_values(self, registers):
+        """
+        Update the `registers` mapping (register -> LiveValue) in place with
+        the values of all registers that have storage, and of the composite
+        registers it already contains.
+        """
+        for reg, value in zip(self.context.indexed_registers, self.values):
+            old_value = registers.get(reg)
+            if (None if old_value is None else old_value.value) != value:
+                registers[reg] = LiveValue(reg.type, value)
+        for reg in list(registers):
+            if reg.components is not None:
+                registers[reg] = LiveValue(reg.type, self.get(reg))
+
+    def resize(self):
+        """
+        Make room for the registers that got an index since this register
+        file was created.
+        """
+        registers = self.context.indexed_registers
+        if len(self.masks) < len(registers):
+            # Copies share masks: do not modify them in place.
+            self.masks = self.masks + [
+                (1 << reg.type.width) - 1
+                for reg in registers[len(self.masks):]
+            ]
+        if len(self.values) < len(registers):
+            self.values.extend([None] * (len(registers) - len(self.values)))
+
+    def get_index(self, register):
+        """Return the index of `register` in `values`."""
+        index = self.context.get_register_index(register)
+        if index >= len(self.values):
+            self.resize()
+        return index
+
+    def copy(self):
+        """Return an independent copy of this register file."""
+        result = RegisterFile.__new__(RegisterFile)
+        result.context = self.context
+        result.values = self.values[:]
+        result.masks = self.masks
+        return result
+
+    def get(self, register):
+        """Return the value of `register`."""
+        if register.components is None:
+            return self.values[self.get_index(register)]
+        result = 0
+        for reg, shift in register.components:
+            value = self.get(reg)
+            if value is None:
+                return None
+            result += value << shift
+        return result & ((1 << register.type.width) - 1)
+
+    def set(self, register, value):
+        """Set the value of `register` to `value` (None for undefined)."""
+        if register.components is None:
+            index = self.get_index(register)
+            self.values[index] = (
+                None if value is None else value & self.masks[index]
+            )
+        elif value is None:
+            for reg, _ in register.components:
+                self.set(reg, None)
+        else:
+            value &= (1 << register.type.width) - 1
+            for reg, shift in register.components:
+                self.set(reg, value >> shift)
@@ -47,7 +47,12 @@ def tokens_to_dot(tokens, style=None):
     return '<{}>'.format(''.join(result))
 
 
-def function_to_dot(func, style=None):
+def function_to_dot(func, style=None, profile=None):
+    """
+    Return a Graphviz document for the CFG of `func`. If provided, execution
+    counts from `profile` (see decompil.profiler.Profile) are shown on basic
+    blocks and edges, and hot edges are drawn thicker.
+    """
     if not style:
         style = DEFAULT_STYLE
     result = [
@@ -65,18 +70,37 @@ def function_to_dot(func, style=None):
         ''
     )
 
+    if profile is not None:
+        block_counts = profile.block_counts
+        edge_counts = profile.edge_counts
+        max_count = max(edge_counts.values(), default=0) or 1
+
     def bb_name(bb):
         return bb.name.lstrip('%')
 
     for bb in func:
         name = bb_name(bb)
-        result.append('{} [shape=box,fontname=monospace,{},label={}];'.format(
-            name, color_attr, tokens_to_dot(bb.format(), style),
-        ))
+        count_attr = (
+            ',xlabel="{}"'.format(block_counts[bb])
+            if profile is not None else
+            ''
+        )
+        result.append(
+            '{} [shape=box,fontname=monospace,{},label={}{}];'.format(
+                name, color_attr, tokens_to_dot(bb.format(), style),
+                count_attr
+            )
+        )
         for succ in bb.get_successors(True):
-            result.append('{} -> {};'.format(
-                name, bb_name(succ)
-            ))
+            if profile is not None:
+                count = edge_counts[(bb, succ)]
+                result.append('{} -> {} [label="{}",penwidth={:.2f}];'.format(
+                    name, bb_name(succ), count, 1 + 4 * count / max_count
+                ))
+            else:
+                result.append('{} -> {};'.format(
+                    name, bb_name(succ)
+                ))
 
     result.append('}')
     return '\n'.join(result)
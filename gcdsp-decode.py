@@ -9,15 +9,7 @@ from pygments.styles import get_style_by_name
 
 import decompil.builder
 from decompil.disassemblers import EntryDisassembler
-from decompil.optimizations import (
-    binary_phi_to_select,
-    copy_elimination,
-    dead_code_elimination,
-    merge_basic_block_sequences,
-    registers_to_ssa,
-    strip_unused_branches,
-    to_expr,
-)
+from decompil.optimizations.manager import PIPELINES, PassManager
 from decompil.utils import function_to_dot
 import gcdsp
 
@@ -60,6 +52,14 @@ parser.add_argument(
     '--dpi', default=None, type=int,
     help='When invoking dot, specifies a DPI for its output'
 )
+parser.add_argument(
+    '--pipeline', '-p', default='default', choices=sorted(PIPELINES),
+    help='Optimization pipeline to run (default: default)'
+)
+parser.add_argument(
+    '--report', '-r', default=None, type=argparse.FileType('w'),
+    help='If provided, write per-pass statistics to this file as JSON'
+)
 
 text_formatter = get_formatter_by_name('text')
 
@@ -70,17 +70,6 @@ def main(args):
     decoder = gcdsp.Decoder(getattr(args, 'rom-file'))
     EntryDisassembler(context, decoder, args.offset).process()
 
-    opt_pipeline = [
-        registers_to_ssa.RegistersToSSA,
-        copy_elimination.CopyElimination,
-        dead_code_elimination.DeadCodeElimination,
-        binary_phi_to_select.BinaryPhiToSelect,
-        to_expr.ToExpr,
-        strip_unused_branches.StripUnusedBranches,
-        merge_basic_block_sequences.MergeBasicBlockSequences,
-        to_expr.ToExpr,
-    ]
-
     def output_stage(name, function):
         if 'dot' in args.dumps:
             dot_document = function_to_dot(function, style=args.style)
@@ -102,22 +91,31 @@ def main(args):
                 f.write(pygments.format(function.format(), text_formatter))
                 f.write('\n')
 
+    def pass_done(function, step, opt):
+        if args.verbose:
+            print('Ran {} on {:x} ({:.3f}s)'.format(
+                opt.__name__, function.address,
+                pass_manager.records[-1]['time']
+            ))
+        if args.all_steps:
+            output_stage(
+                '{:x}-{}-{}'.format(function.address, step, opt.__name__),
+                function
+            )
+
+    pass_manager = PassManager(args.pipeline, pass_done)
     for func in context.functions.values():
         func_name = '{:x}'.format(func.address)
         if args.all_steps:
             output_stage('{}-0-original'.format(func_name), func)
-
-        for i, opt in enumerate(opt_pipeline, 1):
-            if args.verbose:
-                print('Running {}'.format(opt.__name__))
-            opt.process_function(func)
-            if args.all_steps:
-                output_stage(
-                    '{}-{}-{}'.format(func_name, i, opt.__name__), func)
+        pass_manager.run(func)
 
     if not args.all_steps:
         output_stage('{}-final'.format(func_name), func)
 
+    if args.report:
+        pass_manager.write_report(args.report)
+
 
 if __name__ == '__main__':
     main(parser.parse_args())
@@ -1,12 +1,16 @@
+import array
 import collections
 import inspect
-import struct
+import io
+import mmap
+import sys
 
 from pygments.token import *
 
 import decompil.builder
 import decompil.disassemblers
 import decompil.ir
+import decompil.memory
 
 
 class Context(decompil.ir.Context):
@@ -112,6 +116,45 @@ class Context(decompil.ir.Context):
             (regs[0x14], 0),
         ])
 
+    def create_memory(self, dram=None, coef=None):
+        """
+        Return a decompil.memory.WordMemory for the data address space:
+        DRAM, coefficient ROM and hardware registers. `dram` and `coef` are
+        optional file objects (RAM/ROM dumps) to initialize the corresponding
+        regions with.
+        """
+        return self._create_memory(DATA_REGIONS, dram=dram, coef=coef)
+
+    def create_instruction_memory(self, iram=None, irom=None):
+        """
+        Like create_memory, but for the instruction address space: IRAM and
+        IROM.
+        """
+        return self._create_memory(INSTRUCTION_REGIONS, iram=iram, irom=irom)
+
+    def _create_memory(self, regions_desc, **dumps):
+        regions = []
+        for name, start, size, read_only in regions_desc:
+            region = decompil.memory.Region(
+                name, start, size, read_only=read_only
+            )
+            if dumps.get(name) is not None:
+                region.load_file(dumps[name])
+            regions.append(region)
+        return decompil.memory.WordMemory(regions)
+
+
+# Memory maps, as sequences of (name, first address, size in words, read-only)
+DATA_REGIONS = (
+    ('dram', 0x0000, 0x1000, False),
+    ('coef', 0x1000, 0x0800, True),
+    ('hwregs', 0xff00, 0x0100, False),
+)
+INSTRUCTION_REGIONS = (
+    ('iram', 0x0000, 0x1000, False),
+    ('irom', 0x8000, 0x1000, True),
+)
+
 
 class Register(decompil.ir.Register):
     def __init__(self, context, name, width, components=None):
@@ -124,6 +167,10 @@ class Register(decompil.ir.Register):
             if components else
             None
         )
+        # Hardware registers are created first, so their index is their
+        # number (0x00-0x1f).
+        if components is None:
+            context.add_register(self)
 
     def build_load(self, builder):
         if self.components is None:
@@ -149,8 +196,9 @@ class Register(decompil.ir.Register):
             builder.build_rstore(self, value)
         else:
             for reg, shift in self.components:
+                val = value
                 if shift:
-                    val = builder.build_lshl(value, value.type.create(shift))
+                    val = builder.build_lshr(val, value.type.create(shift))
                 val = builder.build_trunc(reg.type, val)
                 builder.build_rstore(reg, val)
 
@@ -294,10 +342,151 @@ def load_insns():
 load_insns()
 
 
+class DispatchTable:
+    """
+    Dense mapping: 16-bit opcode -> first pattern of `patterns` that matches
+    it, or None if there is no such pattern.
+
+    Patterns are considered in list order, so when several of them match the
+    same opcode, the first one wins: this is exactly what a linear scan of
+    `patterns` would return.
+    """
+
+    SIZE = 1 << 16
+
+    def __init__(self, patterns):
+        self.entries = [None] * self.SIZE
+
+        # List of (kept pattern, shadowed pattern, number of opcodes) triples
+        # for all patterns that match opcodes already claimed by previous
+        # ones.
+        self.overlaps = []
+        # Patterns that are entirely shadowed by previous ones, so that they
+        # never match.
+        self.unreachable = []
+
+        for pat in patterns:
+            self.add(pat)
+
+    def add(self, pat):
+        shadowed = collections.OrderedDict()
+        free_bits = ~pat.opcode_mask & (self.SIZE - 1)
+        match_count = 0
+
+        # Enumerate all opcodes matched by `pat`, i.e. all the subsets of its
+        # free bits.
+        bits = free_bits
+        while True:
+            opcode = pat.opcode | bits
+            match_count += 1
+            other = self.entries[opcode]
+            if other is None:
+                self.entries[opcode] = pat
+            else:
+                shadowed[other] = shadowed.get(other, 0) + 1
+            if bits == 0:
+                break
+            bits = (bits - 1) & free_bits
+
+        for other, count in shadowed.items():
+            self.overlaps.append((other, pat, count))
+        if sum(shadowed.values()) == match_count:
+            self.unreachable.append(pat)
+
+    def __getitem__(self, opcode):
+        return self.entries[opcode]
+
+
+instructions_table = None
+instruction_extensions_table = None
+# Mapping: opcode -> (instruction pattern, extension pattern). The extension
+# pattern is None when the instruction is not extended.
+opcode_table = None
+def _init_dispatch_tables():
+    global instructions_table, instruction_extensions_table, opcode_table
+
+    instructions_table = DispatchTable(instructions)
+    instruction_extensions_table = DispatchTable(instruction_extensions)
+
+    # Share identical entries: there are far fewer distinct pairs than
+    # opcodes.
+    pairs = {}
+    opcode_table = []
+    for opcode in range(DispatchTable.SIZE):
+        insn_pat = instructions_table[opcode]
+        ext_pat = (
+            instruction_extensions_table[opcode]
+            if insn_pat is not None and insn_pat.is_extended else
+            None
+        )
+        pair = (insn_pat, ext_pat)
+        opcode_table.append(pairs.setdefault(pair, pair))
+_init_dispatch_tables()
+
+
+class RomImage:
+    """
+    Whole ROM, viewed as an array of big-endian 16-bit words.
+
+    A single image can be shared between several decoders.
+    """
+
+    def __init__(self, data):
+        self.size = len(data) // 2
+        # Whether there is a trailing byte that does not form a whole word.
+        self.incomplete = len(data) % 2 != 0
+
+        if sys.byteorder == 'big':
+            # No conversion is needed: just look at the data.
+            self.words = memoryview(data)[:2 * self.size].cast('H')
+        else:
+            self.words = array.array('H')
+            self.words.frombytes(memoryview(data)[:2 * self.size])
+            self.words.byteswap()
+
+    @classmethod
+    def from_file(cls, fp):
+        """
+        Create an image for the file object `fp`, memory-mapping it when
+        possible.
+        """
+        try:
+            fileno = fp.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            fileno = None
+        if fileno is not None:
+            try:
+                return cls(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ))
+            except ValueError:
+                # Empty files cannot be mapped.
+                pass
+        fp.seek(0)
+        return cls(fp.read())
+
+    def get_word(self, address):
+        """
+        Return the word at `address`, or None if it is past the end of the
+        ROM.
+        """
+        if address < self.size:
+            return self.words[address]
+        elif address == self.size and self.incomplete:
+            raise ValueError('Incomplete file')
+        else:
+            return None
+
+
 class Decoder(decompil.disassemblers.BaseDecoder):
 
-    def __init__(self, fp):
-        self.fp = fp
+    def __init__(self, rom):
+        """
+        `rom` is either a RomImage or a binary file object to create one
+        from.
+        """
+        if not isinstance(rom, RomImage):
+            rom = RomImage.from_file(rom)
+        self.rom = rom
+        self.get_word = rom.get_word
 
     def parse_insn(self, disassembler, builder, address):
 
@@ -305,7 +494,7 @@ class Decoder(decompil.disassemblers.BaseDecoder):
         next_address = address + 1
         if opcode is None:
             return None
-        insn_pat = self.lookup(opcode, instructions)
+        insn_pat, ext_pat = self.lookup(opcode)
 
         # Parse the extra operand, if any.
         if insn_pat.have_extra_operand:
@@ -318,7 +507,6 @@ class Decoder(decompil.disassemblers.BaseDecoder):
 
         # Parse the instruction extension, if any.
         if insn_pat.is_extended:
-            ext_pat = self.lookup(opcode, instruction_extensions)
             ext = ext_pat(opcode)
         else:
             ext = None
@@ -348,19 +536,12 @@ class Decoder(decompil.disassemblers.BaseDecoder):
             else:
                 yield address, insn
 
-    def get_word(self, address):
-        self.fp.seek(2 * address)
-        word = self.fp.read(2)
-        if len(word) == 0:
-            return None
-        elif len(word) == 2:
-            return struct.unpack('>H', word)[0]
-        else:
-            raise ValueError('Incomplete file')
-
-    def lookup(self, opcode, pattern_set):
-        for pat in pattern_set:
-            if opcode & pat.opcode_mask == pat.opcode:
-                return pat
-        else:
+    def lookup(self, opcode):
+        """
+        Return the instruction pattern and the extension pattern (None if the
+        instruction is not extended) for `opcode`.
+        """
+        insn_pat, ext_pat = opcode_table[opcode]
+        if insn_pat is None or (insn_pat.is_extended and ext_pat is None):
             raise ValueError('Invalid opcode: {:04x}'.format(opcode))
+        return insn_pat, ext_pat
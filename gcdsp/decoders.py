@@ -764,11 +764,11 @@ def build_store_prod(ctx, disas, bld, value):
 
     prod_l.build_store(bld, bld.build_trunc(ctx.half_type, value))
 
-    m1_val = bld.build_lshl(value, value.type.create(16))
+    m1_val = bld.build_lshr(value, value.type.create(16))
     m1_val = bld.build_trunc(ctx.half_type, m1_val)
     prod_m1.build_store(bld, m1_val)
 
-    h_val = bld.build_lshl(value, value.type.create(32))
+    h_val = bld.build_lshr(value, value.type.create(32))
     h_val = bld.build_trunc(ctx.byte_type, h_val)
     h_val = bld.build_zext(ctx.half_type, h_val)
     prod_h.build_store(bld, h_val)
@@ -175,3 +175,69 @@ def test_dominance_loop_simple(ctx, func, bld):
         bb_A: {bb_A},
         bb_B: set(),
     }
+
+
+@standard_testcase
+def test_dominance_if_shortcut(ctx, func, bld):
+    bb_A = func.create_basic_block()
+    bb_B = func.create_basic_block()
+    bb_C = func.create_basic_block()
+    reg_a_val = bld.build_rload(ctx.reg_a)
+    cond = bld.build_eq(reg_a_val, reg_a_val.type.create(0))
+    bld.build_branch(cond, bb_A, bb_B)
+
+    bld.position_at_end(bb_A)
+    bld.build_branch(cond, bb_B, bb_C)
+
+    bld.position_at_end(bb_B)
+    bld.build_jump(bb_C)
+
+    bld.position_at_end(bb_C)
+    bld.build_ret()
+
+    dom_tree, dom_frontiers = dominance.get_dominance_frontiers(func)
+    rev_dom_tree = tree_to_nodes(dom_tree)
+    assert rev_dom_tree == Node(func.entry, {
+        bb_A: Node(bb_A, {}),
+        bb_B: Node(bb_B, {}),
+        bb_C: Node(bb_C, {}),
+    })
+
+    assert dom_frontiers == {
+        func.entry: set(),
+        bb_A: {bb_B, bb_C},
+        bb_B: {bb_C},
+        bb_C: set(),
+    }
+
+
+@standard_testcase
+def test_dominance_queries(ctx, func, bld):
+    bb_A = func.create_basic_block()
+    bb_B = func.create_basic_block()
+    bb_C = func.create_basic_block()
+    reg_a_val = bld.build_rload(ctx.reg_a)
+    bld.build_branch(
+        bld.build_eq(reg_a_val, reg_a_val.type.create(0)),
+        bb_A, bb_B
+    )
+
+    bld.position_at_end(bb_A)
+    bld.build_jump(bb_C)
+
+    bld.position_at_end(bb_B)
+    bld.build_jump(bb_C)
+
+    bld.position_at_end(bb_C)
+    bld.build_ret()
+
+    dom_tree = dominance.get_dominator_tree(func)
+    assert dom_tree.get_idom(bb_C) == func.entry
+    assert dom_tree.get_idom(func.entry) is None
+    for bb in func:
+        assert dom_tree.dominates(func.entry, bb)
+        assert dom_tree.dominates(bb, bb)
+        assert not dom_tree.strictly_dominates(bb, bb)
+    assert not dom_tree.dominates(bb_A, bb_C)
+    assert not dom_tree.dominates(bb_A, bb_B)
+    assert not dom_tree.dominates(bb_C, func.entry)
@@ -0,0 +1,52 @@
+from testsuite.utils import *
+
+from decompil.analysis.liveness import get_register_liveness
+
+
+@standard_testcase
+def test_liveness_straight(ctx, func, bld):
+    """Test liveness across a store that kills a register."""
+    bb = bld.create_basic_block()
+    bld.build_rstore(ctx.reg_a, bld.build_rload(ctx.reg_b))
+    bld.build_jump(bb)
+
+    bld.position_at_end(bb)
+    bld.build_rstore(ctx.reg_b, bld.build_rload(ctx.reg_a))
+    bld.build_rstore(ctx.reg_c, bld.build_rload(ctx.reg_c))
+    bld.build_ret()
+
+    liveness = get_register_liveness(func)
+    assert liveness.get_live_in(bb) == {ctx.reg_a, ctx.reg_c}
+    assert liveness.get_live_in(func.entry) == {ctx.reg_b, ctx.reg_c}
+    assert liveness.get_live_out(func.entry) == {ctx.reg_a, ctx.reg_c}
+    assert liveness.is_live_in(func.entry, ctx.reg_c)
+    assert not liveness.is_live_in(func.entry, ctx.reg_a)
+    assert not liveness.is_live_in(func.entry, ctx.reg_d)
+
+
+@standard_testcase
+def test_liveness_loop(ctx, func, bld):
+    """Test that liveness flows around loops."""
+    bb_loop = bld.create_basic_block()
+    bb_exit = bld.create_basic_block()
+    bld.build_rstore(ctx.reg_a, ctx.reg_a.type.create(0))
+    bld.build_jump(bb_loop)
+
+    bld.position_at_end(bb_loop)
+    b_val = bld.build_rload(ctx.reg_b)
+    bld.build_rstore(ctx.reg_b, b_val)
+    bld.build_branch(
+        bld.build_eq(b_val, b_val.type.create(0)),
+        bb_loop, bb_exit
+    )
+
+    bld.position_at_end(bb_exit)
+    bld.build_rstore(ctx.reg_a, bld.build_rload(ctx.reg_b))
+    bld.build_rstore(ctx.reg_b, ctx.reg_b.type.create(0))
+    bld.build_ret()
+
+    liveness = get_register_liveness(func)
+    assert liveness.get_live_in(bb_exit) == {ctx.reg_b}
+    assert liveness.get_live_in(bb_loop) == {ctx.reg_b}
+    assert liveness.get_live_out(bb_loop) == {ctx.reg_b}
+    assert liveness.get_live_in(func.entry) == {ctx.reg_b}
@@ -0,0 +1,52 @@
+from testsuite.utils import *
+
+from decompil.analysis.dominance import get_dominance_frontiers
+from decompil.optimizations.dead_code_elimination import DeadCodeElimination
+from decompil.optimizations.merge_basic_block_sequences import (
+    MergeBasicBlockSequences
+)
+
+
+def build_sequence(ctx, bld):
+    next_bb = bld.create_basic_block()
+    bld.build_rstore(ctx.reg_a, bld.build_rload(ctx.reg_b))
+    bld.build_jump(next_bb)
+    bld.position_at_end(next_bb)
+    bld.build_ret()
+
+
+@standard_testcase
+def test_caching(ctx, func, bld):
+    """Test that analysis results are computed once."""
+    build_sequence(ctx, bld)
+    result = func.analyses.get(get_dominance_frontiers)
+    assert func.analyses.get(get_dominance_frontiers) is result
+
+
+@standard_testcase
+def test_invalidation(ctx, func, bld):
+    """Test that optimizations invalidate only what they do not preserve."""
+    build_sequence(ctx, bld)
+    result = func.analyses.get(get_dominance_frontiers)
+
+    DeadCodeElimination.run(func)
+    assert func.analyses.get(get_dominance_frontiers) is result
+
+    MergeBasicBlockSequences.run(func)
+    dom_tree, _ = func.analyses.get(get_dominance_frontiers)
+    assert dom_tree.root.value is func.entry
+    assert len(dom_tree.nodes) == 1
+
+
+@standard_testcase
+def test_invalidation_process_function(ctx, func, bld):
+    """
+    Test that optimizations invalidate analyses even when they are not run
+    through Optimization.run.
+    """
+    build_sequence(ctx, bld)
+    func.analyses.get(get_dominance_frontiers)
+
+    MergeBasicBlockSequences.process_function(func)
+    dom_tree, _ = func.analyses.get(get_dominance_frontiers)
+    assert len(dom_tree.nodes) == 1
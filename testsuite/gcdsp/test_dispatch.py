@@ -0,0 +1,19 @@
+import gcdsp
+
+
+def test_unreachable_patterns():
+    """
+    Test that the only opcode pattern the dispatch tables can never return
+    is the LDAXM extension, which LDM shadows.
+    """
+    assert gcdsp.instructions_table.unreachable == []
+    table = gcdsp.instruction_extensions_table
+    assert [pat.name for pat in table.unreachable] == ['LDAXM']
+
+    ldaxm = table.unreachable[0]
+    assert [
+        kept.name for kept, pat, _ in table.overlaps if pat is ldaxm
+    ] == ['LDM']
+    for opcode, pat in enumerate(table.entries):
+        if opcode & ldaxm.opcode_mask == ldaxm.opcode:
+            assert pat is not None and pat is not ldaxm
@@ -0,0 +1,71 @@
+import io
+import tempfile
+
+import gcdsp
+
+
+DATA = b'\x12\x34\xab\xcd'
+
+
+def check_words(rom):
+    assert rom.size == 2
+    assert rom.get_word(0) == 0x1234
+    assert rom.get_word(1) == 0xabcd
+    assert rom.get_word(2) is None
+    assert rom.get_word(3) is None
+
+
+def check_incomplete(rom):
+    assert rom.get_word(1) == 0xabcd
+    try:
+        rom.get_word(2)
+    except ValueError as exc:
+        assert str(exc) == 'Incomplete file'
+    else:
+        assert False
+    assert rom.get_word(3) is None
+
+
+def test_mapped_file():
+    """Test that words are read from memory-mapped files."""
+    with tempfile.TemporaryFile() as f:
+        f.write(DATA)
+        f.flush()
+        rom = gcdsp.RomImage.from_file(f)
+        check_words(rom)
+        # Release the mapping before the file is closed.
+        del rom
+
+
+def test_in_memory_file():
+    """Test that words are read from files that cannot be mapped."""
+    check_words(gcdsp.RomImage.from_file(io.BytesIO(DATA)))
+
+
+def test_incomplete_file():
+    """Test that a trailing byte is reported when it is reached."""
+    check_incomplete(gcdsp.RomImage(DATA + b'\xff'))
+    check_incomplete(gcdsp.RomImage.from_file(io.BytesIO(DATA + b'\xff')))
+    with tempfile.TemporaryFile() as f:
+        f.write(DATA + b'\xff')
+        f.flush()
+        check_incomplete(gcdsp.RomImage.from_file(f))
+
+
+def test_empty_file():
+    """Test that empty files, which cannot be mapped, are empty ROMs."""
+    with tempfile.TemporaryFile() as f:
+        rom = gcdsp.RomImage.from_file(f)
+    assert rom.size == 0
+    assert rom.get_word(0) is None
+
+
+def test_shared_image():
+    """Test that several decoders can share a single image."""
+    rom = gcdsp.RomImage(DATA)
+    decoders = [gcdsp.Decoder(rom), gcdsp.Decoder(rom)]
+    for decoder in decoders:
+        assert decoder.rom is rom
+        assert decoder.get_word(1) == 0xabcd
+        # Decoding stops past the end of the ROM.
+        assert decoder.parse_insn(None, None, 2) is None
@@ -0,0 +1,105 @@
+from testsuite.utils import *
+
+from decompil import interpreter
+from decompil.batch import compile_batched_function
+from decompil.compiler import compile_function
+from decompil.interpreter import LiveValue
+
+
+@standard_testcase
+def test_same_as_compiled(ctx, func, bld):
+    """Test that each lane computes what a CompiledFunction computes."""
+    byte_type = ctx.create_int_type(8)
+    a_val = bld.build_rload(ctx.reg_a)
+    b_val = bld.build_rload(ctx.reg_b)
+    byte = bld.build_trunc(byte_type, a_val)
+    bld.build_rstore(ctx.reg_c, bld.build_add(
+        bld.build_sext(ctx.reg_c.type, byte),
+        bld.build_sdiv(a_val, b_val)
+    ))
+    bld.build_rstore(ctx.reg_d, bld.build_select(
+        bld.build_slt(a_val, b_val),
+        bld.build_ashr(a_val, ctx.reg_a.type.create(3)),
+        ctx.reg_d.type.create(-1)
+    ))
+    bld.build_ret()
+
+    inputs = ((0, 1), (0x1234, 0x80), (-5, 3), (7, -2), (-1, -1))
+    regs = {
+        ctx.reg_a: [a for a, _ in inputs],
+        ctx.reg_b: [b for _, b in inputs],
+    }
+    compile_batched_function(func).run(regs)
+
+    compiled = compile_function(func)
+    for i, (a, b) in enumerate(inputs):
+        lane_regs = {
+            ctx.reg_a: LiveValue(ctx.reg_a.type, a),
+            ctx.reg_b: LiveValue(ctx.reg_b.type, b),
+        }
+        compiled.run(lane_regs)
+        for reg, value in lane_regs.items():
+            assert regs[reg][i] == value.value
+
+
+@standard_testcase
+def test_split_lanes(ctx, func, bld):
+    """Test that lanes taking different paths in a loop are split."""
+    bb_loop = bld.create_basic_block()
+    bb_end = bld.create_basic_block()
+    reg_type = ctx.reg_a.type
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_jump(bb_loop)
+
+    # Compute the factorial of reg_a in reg_b, counting iterations in reg_c.
+    bld.position_at_end(bb_loop)
+    counter = bld.build_phi([(func.entry, a_val), (bb_loop, None)])
+    product = bld.build_phi([
+        (func.entry, reg_type.create(1)), (bb_loop, None)
+    ])
+    next_product = bld.build_mul(product, counter)
+    next_counter = bld.build_sub(counter, reg_type.create(1))
+    counter.value.set_value(bb_loop, next_counter)
+    product.value.set_value(bb_loop, next_product)
+    bld.build_rstore(ctx.reg_c, next_counter)
+    bld.build_branch(
+        bld.build_ugt(next_counter, reg_type.create(0)),
+        bb_loop, bb_end
+    )
+
+    bld.position_at_end(bb_end)
+    bld.build_rstore(ctx.reg_b, next_product)
+    bld.build_ret()
+
+    regs = {ctx.reg_a: [5, 1, 3, 0x10, 2]}
+    interpreter.run_batch(func, regs)
+    assert regs[ctx.reg_a] == [5, 1, 3, 0x10, 2]
+    assert regs[ctx.reg_b] == [120, 1, 6, 0x77758000, 2]
+    assert regs[ctx.reg_c] == [0] * 5
+
+
+@standard_testcase
+def test_undefined_registers(ctx, func, bld):
+    """Test that undefined values are propagated but never computed on."""
+    bld.build_rstore(ctx.reg_b, bld.build_rload(ctx.reg_a))
+    bld.build_rstore(ctx.reg_c, bld.build_add(
+        bld.build_rload(ctx.reg_a), ctx.reg_a.type.create(1)
+    ))
+    bld.build_ret()
+
+    batched = compile_batched_function(func)
+    regs = {}
+    try:
+        batched.run(regs, 3)
+    except AssertionError:
+        pass
+    else:
+        assert False
+
+    regs = {ctx.reg_a: [1, None]}
+    try:
+        batched.run(regs)
+    except AssertionError:
+        pass
+    else:
+        assert False
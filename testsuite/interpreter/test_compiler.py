@@ -0,0 +1,151 @@
+from testsuite.utils import *
+
+from decompil import interpreter
+from decompil.compiler import compile_function
+from decompil.interpreter import LiveValue
+from decompil.optimizations.to_expr import ToExpr
+
+
+@standard_testcase
+def test_same_as_interpreter(ctx, func, bld):
+    """Test that compiled functions compute what Interpreter computes."""
+    byte_type = ctx.create_int_type(8)
+    a_val = bld.build_rload(ctx.reg_a)
+    b_val = bld.build_rload(ctx.reg_b)
+    byte = bld.build_trunc(byte_type, a_val)
+    bld.build_rstore(ctx.reg_c, bld.build_add(
+        bld.build_sext(ctx.reg_c.type, byte),
+        bld.build_sdiv(a_val, b_val)
+    ))
+    bld.build_rstore(ctx.reg_d, bld.build_xor(
+        bld.build_ashr(a_val, ctx.reg_a.type.create(3)),
+        bld.build_zext(ctx.reg_d.type, bld.build_slt(a_val, b_val))
+    ))
+    bld.build_ret()
+
+    compiled = compile_function(func)
+    for a, b in ((0, 1), (0x1234, 0x80), (-5, 3), (7, -2), (-1, -1)):
+        regs = {
+            ctx.reg_a: LiveValue(ctx.reg_a.type, a),
+            ctx.reg_b: LiveValue(ctx.reg_b.type, b),
+        }
+        ref_regs = dict(regs)
+        interpreter.Interpreter(func, ref_regs)
+        compiled.run(regs)
+        assert regs == ref_regs
+
+
+@standard_testcase
+def test_phi_nodes_swap(ctx, func, bld):
+    """Test that PHI nodes in a basic block are evaluated all at once."""
+    bb_loop = bld.create_basic_block()
+    bb_end = bld.create_basic_block()
+    a_val = bld.build_rload(ctx.reg_a)
+    b_val = bld.build_rload(ctx.reg_b)
+    bld.build_jump(bb_loop)
+
+    bld.position_at_end(bb_loop)
+    first = bld.build_phi([(func.entry, a_val), (bb_loop, None)])
+    second = bld.build_phi([(func.entry, b_val), (bb_loop, None)])
+    first.value.set_value(bb_loop, second)
+    second.value.set_value(bb_loop, first)
+    counter = bld.build_phi([
+        (func.entry, ctx.reg_c.type.create(0)), (bb_loop, None)
+    ])
+    next_counter = bld.build_add(counter, counter.type.create(1))
+    counter.value.set_value(bb_loop, next_counter)
+    bld.build_branch(
+        bld.build_ult(next_counter, counter.type.create(2)),
+        bb_loop, bb_end
+    )
+
+    bld.position_at_end(bb_end)
+    bld.build_rstore(ctx.reg_c, first)
+    bld.build_rstore(ctx.reg_d, second)
+    bld.build_ret()
+
+    regs = {
+        ctx.reg_a: LiveValue(ctx.reg_a.type, 1),
+        ctx.reg_b: LiveValue(ctx.reg_b.type, 2),
+    }
+    interpreter.run_compiled(func, regs)
+    assert regs[ctx.reg_c] == LiveValue(ctx.reg_c.type, 2)
+    assert regs[ctx.reg_d] == LiveValue(ctx.reg_d.type, 1)
+
+
+@standard_testcase
+def test_expression_form(ctx, func, bld):
+    """Test that functions in the expression form can be compiled."""
+    a_val = bld.build_rload(ctx.reg_a)
+    value = bld.build_select(
+        bld.build_eq(a_val, a_val.type.create(0)),
+        a_val.type.create(10),
+        bld.build_mul(a_val, a_val.type.create(2))
+    )
+    bld.build_rstore(ctx.reg_b, bld.build_sub(value, a_val.type.create(1)))
+    bld.build_ret()
+
+    ToExpr.run(func)
+    assert len(func.entry) == 3
+    for a, b in ((0, 9), (3, 5)):
+        regs = {ctx.reg_a: LiveValue(ctx.reg_a.type, a)}
+        interpreter.run_compiled(func, regs)
+        assert regs[ctx.reg_b] == LiveValue(ctx.reg_b.type, b)
+
+
+@standard_testcase
+def test_run_compiled_cache(ctx, func, bld):
+    """
+    Test that run_compiled compiles functions again only after they are
+    optimized.
+    """
+    bld.build_rstore(ctx.reg_b, bld.build_add(
+        bld.build_rload(ctx.reg_a), ctx.reg_a.type.create(1)
+    ))
+    bld.build_ret()
+
+    regs = {ctx.reg_a: LiveValue(ctx.reg_a.type, 1)}
+    interpreter.run_compiled(func, regs)
+    compiled = func.analyses.get(compile_function)
+    interpreter.run_compiled(func, regs)
+    assert func.analyses.get(compile_function) is compiled
+
+    ToExpr.run(func)
+    assert func.analyses.get(compile_function) is not compiled
+    regs = {ctx.reg_a: LiveValue(ctx.reg_a.type, 1)}
+    interpreter.run_compiled(func, regs)
+    assert regs[ctx.reg_b] == LiveValue(ctx.reg_b.type, 2)
+
+
+@standard_testcase
+def test_undef(ctx, func, bld):
+    """Test that UNDEF instructions end the execution in both interpreters."""
+    bld.build_rstore(ctx.reg_b, bld.build_rload(ctx.reg_a))
+    bld.build_undef()
+
+    for run in (interpreter.run, interpreter.run_compiled):
+        regs = {ctx.reg_a: LiveValue(ctx.reg_a.type, 3)}
+        assert run(func, regs) is None
+        assert regs[ctx.reg_b] == LiveValue(ctx.reg_b.type, 3)
+
+
+@standard_testcase
+def test_unsupported(ctx, func, bld):
+    """
+    Test that unsupported instructions are reported at compile time, even in
+    basic blocks that never run.
+    """
+    bb_unused = bld.create_basic_block()
+    bld.build_ret()
+
+    bld.position_at_end(bb_unused)
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_cat(a_val, a_val)
+    bld.build_ret()
+
+    try:
+        compile_function(func)
+    except NotImplementedError as exc:
+        assert 'cat' in str(exc)
+    else:
+        assert False
@@ -0,0 +1,121 @@
+import tempfile
+
+from testsuite.utils import *
+
+from decompil import interpreter
+from decompil.compiler import compile_function
+from decompil.interpreter import LiveValue
+from decompil.memory import MemoryAccessError, Region, WordMemory
+
+
+def create_memory():
+    return WordMemory([
+        Region('ram', 0x0000, 0x100),
+        Region('rom', 0x1000, 0x100, read_only=True),
+    ])
+
+
+def test_word_memory():
+    """Test loads and stores of one and several words."""
+    ctx = Context()
+    half_type = ctx.create_int_type(16)
+    word_type = ctx.create_int_type(32)
+    memory = create_memory()
+
+    assert memory.load(0x10, half_type) is None
+    memory.store(0x10, word_type, 0x12345678)
+    assert memory.load(0x10, half_type) == 0x1234
+    assert memory.load(0x11, half_type) == 0x5678
+    assert memory.load(0x10, word_type) == 0x12345678
+
+    # A value that contains an undefined word is undefined.
+    assert memory.load(0x11, word_type) is None
+    memory.store(0x11, half_type, None)
+    assert memory.load(0x10, half_type) == 0x1234
+    assert memory.load(0x10, word_type) is None
+
+    for addr, type in (
+        (0x100, half_type),
+        (0xff, word_type),
+        (0x2000, half_type),
+    ):
+        try:
+            memory.load(addr, type)
+        except MemoryAccessError:
+            pass
+        else:
+            assert False
+
+    try:
+        memory.store(0x1000, half_type, 0)
+    except MemoryAccessError:
+        pass
+    else:
+        assert False
+
+
+def test_load_file():
+    """Test that regions can be initialized from dumps."""
+    ctx = Context()
+    half_type = ctx.create_int_type(16)
+    memory = create_memory()
+    rom = memory.get_region('rom')
+
+    with tempfile.TemporaryFile() as f:
+        f.write(b'\x12\x34\xab\xcd')
+        f.flush()
+        assert rom.load_file(f, offset=2) == 2
+    assert memory.load(0x1001, half_type) is None
+    assert memory.load(0x1002, half_type) == 0x1234
+    assert memory.load(0x1003, half_type) == 0xabcd
+
+
+def test_load_data_bounds():
+    """Test that data is loaded only inside regions."""
+    region = Region('ram', 0, 4)
+    assert region.load_data(bytes(16), offset=2) == 2
+    assert region.load_data(bytes(16), offset=4) == 0
+    assert list(region.defined) == [0, 0, 1, 1]
+
+    for offset in (-1, 6):
+        try:
+            region.load_data(bytes(16), offset=offset)
+        except ValueError:
+            pass
+        else:
+            assert False
+    assert len(region.words) == 4
+    assert len(region.defined) == 4
+
+
+@standard_testcase
+def test_interpreters(ctx, func, bld):
+    """
+    Test that both the reference and the compiled interpreters use the
+    memory they are given.
+    """
+    half_type = ctx.create_int_type(16)
+    pointer_type = ctx.create_pointer_type(half_type)
+    value = bld.build_load(
+        bld.build_bitcast(pointer_type, bld.build_rload(ctx.reg_a))
+    )
+    bld.build_store(
+        bld.build_bitcast(pointer_type, bld.build_rload(ctx.reg_b)),
+        bld.build_add(value, half_type.create(1))
+    )
+    bld.build_ret()
+
+    results = []
+    for run in (
+        lambda regs, memory: interpreter.Interpreter(func, regs, memory),
+        lambda regs, memory: compile_function(func).run(regs, memory),
+    ):
+        regs = {
+            ctx.reg_a: LiveValue(ctx.reg_a.type, 0x1000),
+            ctx.reg_b: LiveValue(ctx.reg_b.type, 0x20),
+        }
+        memory = create_memory()
+        memory.get_region('rom').load_data(b'\xff\xff')
+        run(regs, memory)
+        results.append(memory.load(0x20, half_type))
+    assert results == [0, 0]
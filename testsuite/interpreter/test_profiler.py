@@ -0,0 +1,131 @@
+import io
+import json
+
+from testsuite.utils import *
+
+from decompil import interpreter, utils
+from decompil.compiler import compile_function
+from decompil.interpreter import LiveValue
+from decompil.profiler import Profile
+
+
+def build_countdown(ctx, func, bld):
+    """Build a function that decrements reg_a down to 0."""
+    bb_cond = bld.create_basic_block()
+    bb_loop = bld.create_basic_block()
+    bb_end = bld.create_basic_block()
+    bld.build_jump(bb_cond)
+
+    bld.position_at_end(bb_cond)
+    bld.build_branch(
+        bld.build_ne(bld.build_rload(ctx.reg_a), ctx.reg_a.type.create(0)),
+        bb_loop, bb_end
+    )
+
+    bld.position_at_end(bb_loop)
+    bld.build_rstore(ctx.reg_a, bld.build_sub(
+        bld.build_rload(ctx.reg_a), ctx.reg_a.type.create(1)
+    ))
+    bld.build_jump(bb_cond)
+
+    bld.position_at_end(bb_end)
+    bld.build_ret()
+    return bb_cond, bb_loop, bb_end
+
+
+@standard_testcase
+def test_counts(ctx, func, bld):
+    """
+    Test that both interpreters count executed blocks, edges and
+    instructions the same way.
+    """
+    bb_cond, bb_loop, bb_end = build_countdown(ctx, func, bld)
+
+    profiles = []
+    for run in (
+        lambda regs, profile: interpreter.Interpreter(
+            func, regs, profile=profile
+        ),
+        compile_function(func).run,
+    ):
+        profile = Profile(func)
+        for count in (3, 2):
+            run({ctx.reg_a: LiveValue(ctx.reg_a.type, count)},
+                profile=profile)
+        profiles.append(profile)
+
+    for profile in profiles:
+        assert profile.runs == 2
+        assert profile.block_counts == {
+            func.entry: 2, bb_cond: 7, bb_loop: 5, bb_end: 2
+        }
+        assert profile.edge_counts == {
+            (func.entry, bb_cond): 2,
+            (bb_cond, bb_loop): 5,
+            (bb_loop, bb_cond): 5,
+            (bb_cond, bb_end): 2,
+        }
+        kind_counts = profile.kind_counts
+        assert kind_counts[ir.RLOAD] == 12
+        assert kind_counts[ir.SUB] == 5
+        assert kind_counts[ir.RET] == 2
+
+
+@standard_testcase
+def test_reports(ctx, func, bld):
+    """Test that profiles can be dumped as JSON and as a CFG overlay."""
+    bb_cond, bb_loop, bb_end = build_countdown(ctx, func, bld)
+    profile = Profile(func)
+    interpreter.run(
+        func, {ctx.reg_a: LiveValue(ctx.reg_a.type, 4)}, profile=profile
+    )
+
+    f = io.StringIO()
+    profile.write_report(f)
+    report = json.loads(f.getvalue())
+    assert report['runs'] == 1
+    assert report['blocks'][bb_loop.name] == 4
+    assert report['kinds']['sub'] == 4
+    assert {
+        'from': bb_loop.name, 'to': bb_cond.name, 'count': 4
+    } in report['edges']
+
+    dot = utils.function_to_dot(func, profile=profile)
+    assert 'xlabel="5"' in dot
+    assert 'label="4"' in dot
+
+
+@standard_testcase
+def test_partial_blocks(ctx, func, bld):
+    """
+    Test that instructions are counted only when executed, even when the
+    interpreter stops in the middle of a basic block.
+    """
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_rstore(ctx.reg_b, bld.build_add(a_val, a_val))
+    bld.build_ret()
+
+    profile = Profile(func)
+    interp = interpreter.Interpreter(
+        func, {ctx.reg_a: LiveValue(ctx.reg_a.type, 1)}, profile=profile,
+        max_steps=1
+    )
+    assert profile.block_counts == {func.entry: 1}
+    assert profile.kind_counts == {ir.RLOAD: 1}
+
+    interp.process(max_steps=1)
+    snapshot = interp.snapshot()
+    fork = interp.fork()
+    interp.process()
+    assert profile.kind_counts == {
+        ir.RLOAD: 1, ir.ADD: 1, ir.RSTORE: 1, ir.RET: 1
+    }
+
+    # Profiles are shared with forks and are not rolled back: they count
+    # instructions executed again.
+    fork.process()
+    interp.restore(snapshot)
+    interp.process()
+    assert profile.kind_counts == {
+        ir.RLOAD: 1, ir.ADD: 1, ir.RSTORE: 3, ir.RET: 3
+    }
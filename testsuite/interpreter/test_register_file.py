@@ -0,0 +1,107 @@
+from testsuite.utils import *
+
+import gcdsp
+from decompil import builder, interpreter
+from decompil.compiler import compile_function
+from decompil.interpreter import LiveValue
+from decompil.register_file import RegisterFile
+
+
+class CompositeRegister(ir.Register):
+    def __init__(self, context, name, width, components):
+        self.type = context.create_int_type(width)
+        self.name = name
+        self.components = components
+
+
+@standard_testcase
+def test_indexes(ctx, func, bld):
+    """
+    Test that registers get dense indexes when first needed, even after
+    register files are created.
+    """
+    regs = RegisterFile(ctx)
+    assert ctx.indexed_registers == []
+    regs.set(ctx.reg_b, 1)
+    bld.build_rstore(ctx.reg_c, bld.build_rload(ctx.reg_a))
+    bld.build_ret()
+    compile_function(func).run(regs)
+    assert ctx.indexed_registers == [ctx.reg_b, ctx.reg_a, ctx.reg_c]
+    assert [reg.index for reg in ctx.indexed_registers] == [0, 1, 2]
+    assert len(regs.values) == 3
+
+    live_regs = {ctx.reg_a: LiveValue(ctx.reg_a.type, 5)}
+    interpreter.run_compiled(func, live_regs)
+    assert live_regs[ctx.reg_c] == LiveValue(ctx.reg_c.type, 5)
+
+
+def test_composite_views():
+    """Test that composite registers are views on their components."""
+    ctx = Context()
+    reg_ab = CompositeRegister(ctx, 'rab', 48, [
+        (ctx.reg_a, 32), (ctx.reg_b, 0)
+    ])
+    regs = RegisterFile(ctx)
+    assert regs.get(reg_ab) is None
+
+    regs.set(reg_ab, 0x123456789abcdef)
+    assert regs.get(ctx.reg_a) == 0x4567
+    assert regs.get(ctx.reg_b) == 0x89abcdef
+    assert regs.get(reg_ab) == 0x456789abcdef
+
+    regs.set(ctx.reg_a, -1)
+    assert regs.get(ctx.reg_a) == 0xffffffff
+    assert regs.get(reg_ab) == 0xffff89abcdef
+
+    regs.set(ctx.reg_b, None)
+    assert regs.get(reg_ab) is None
+
+
+@standard_testcase
+def test_compiled_function(ctx, func, bld):
+    """Test that compiled functions work on register files in place."""
+    bld.build_rstore(ctx.reg_b, bld.build_add(
+        bld.build_rload(ctx.reg_a), ctx.reg_a.type.create(1)
+    ))
+    bld.build_ret()
+
+    regs = RegisterFile(ctx)
+    regs.set(ctx.reg_a, 41)
+    compile_function(func).run(regs)
+    assert regs.get(ctx.reg_b) == 42
+
+    live_regs = {}
+    regs.update_live_values(live_regs)
+    assert live_regs == {
+        ctx.reg_a: LiveValue(ctx.reg_a.type, 41),
+        ctx.reg_b: LiveValue(ctx.reg_b.type, 42),
+    }
+
+
+def test_gcdsp_accumulators():
+    """
+    Test that composite views match gcdsp's build_load and build_store.
+    """
+    ctx = gcdsp.Context()
+    func = ctx.create_function(0)
+    bld = builder.Builder()
+    bld.position_at_end(func.entry)
+    ac0, ac1 = ctx.long_accumulators
+    ac1.build_store(bld, bld.build_add(
+        ac0.build_load(bld), ac0.type.create(0x7f00000001)
+    ))
+    bld.build_ret()
+
+    regs = RegisterFile(ctx)
+    regs.set(ac0, 0x0123456789)
+    compile_function(func).run(regs)
+    assert regs.get(ac1) == 0x802345678a
+    assert regs.get(ctx.registers[0x11]) == 0x80
+    assert regs.get(ctx.registers[0x1f]) == 0x2345
+    assert regs.get(ctx.registers[0x1d]) == 0x678a
+
+    # Composite registers in mappings are written back too.
+    live_regs = {ac0: LiveValue(ac0.type, 1), ac1: LiveValue(ac1.type, 0)}
+    compile_function(func).run(live_regs)
+    assert live_regs[ac1] == LiveValue(ac1.type, 0x7f00000002)
+    assert live_regs[ctx.registers[0x1d]] == LiveValue(ctx.half_type, 2)
@@ -0,0 +1,89 @@
+from testsuite.utils import *
+
+from decompil import interpreter
+from decompil.interpreter import LiveValue
+
+
+def build_endless_loop(ctx, func, bld):
+    """Build a function that increments reg_a forever."""
+    bb_loop = bld.create_basic_block()
+    bld.build_jump(bb_loop)
+
+    bld.position_at_end(bb_loop)
+    bld.build_rstore(ctx.reg_a, bld.build_add(
+        bld.build_rload(ctx.reg_a), ctx.reg_a.type.create(1)
+    ))
+    bld.build_jump(bb_loop)
+    return bb_loop
+
+
+def get_reg_a(ctx, interp):
+    return interp.registers[ctx.reg_a].value
+
+
+@standard_testcase
+def test_step_budget(ctx, func, bld):
+    """Test that execution can be stopped and resumed at any instruction."""
+    bb_loop = build_endless_loop(ctx, func, bld)
+    interp = interpreter.Interpreter(
+        func, {ctx.reg_a: LiveValue(ctx.reg_a.type, 0)}, max_steps=0
+    )
+    assert interp.steps == 0 and interp.current_bb is func.entry
+
+    # Entry is 1 instruction, then each iteration is 4.
+    assert interp.process(max_steps=11) == 11
+    assert interp.current_bb is bb_loop and interp.index == 2
+    assert get_reg_a(ctx, interp) == 2
+
+    interp.process(max_steps=2)
+    assert interp.steps == 13 and interp.index == 0
+    assert get_reg_a(ctx, interp) == 3
+    assert not interp.finished
+
+    assert interp.process(until=bb_loop) == 4
+    assert get_reg_a(ctx, interp) == 4
+
+
+@standard_testcase
+def test_snapshot(ctx, func, bld):
+    """Test that snapshots can be restored and forked."""
+    build_endless_loop(ctx, func, bld)
+    interp = interpreter.Interpreter(
+        func, {ctx.reg_a: LiveValue(ctx.reg_a.type, 0)}, max_steps=42
+    )
+    snapshot = interp.snapshot()
+    interp.process(max_steps=40)
+    assert get_reg_a(ctx, interp) == 20
+
+    fork = interp.fork(snapshot)
+    assert fork.registers is not interp.registers
+    assert fork.steps == 42 and get_reg_a(ctx, fork) == 10
+    fork.process(max_steps=40)
+    assert get_reg_a(ctx, fork) == 20
+    assert get_reg_a(ctx, interp) == 20
+
+    interp.restore(snapshot)
+    assert get_reg_a(ctx, interp) == 10
+    interp.restore(snapshot)
+    interp.process(max_steps=4)
+    assert get_reg_a(ctx, interp) == 11
+    assert get_reg_a(ctx, fork) == 20
+
+
+@standard_testcase
+def test_snapshot_memory(ctx, func, bld):
+    """Test that forks get their own copy of the memory."""
+    addr = bld.build_alloca(ctx.reg_a.type)
+    bld.build_store(addr, ctx.reg_a.type.create(1))
+    bld.build_rstore(ctx.reg_b, bld.build_load(addr))
+    bld.build_ret()
+
+    interp = interpreter.Interpreter(func, {}, max_steps=2)
+    fork = interp.fork()
+    fork.memory.store(1, ctx.reg_a.type, 3)
+    interp.process()
+    fork.process()
+    assert interp.finished and fork.finished
+    assert interp.registers[ctx.reg_b] == LiveValue(ctx.reg_b.type, 1)
+    assert fork.registers[ctx.reg_b] == LiveValue(ctx.reg_b.type, 3)
+    assert interp.steps == fork.steps == 5
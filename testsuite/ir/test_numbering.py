@@ -0,0 +1,39 @@
+from testsuite.utils import *
+
+
+@standard_testcase
+def test_names(ctx, func, bld):
+    """Test that instructions and basic blocks are numbered in order."""
+    bb = bld.create_basic_block()
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_jump(bb)
+
+    bld.position_at_end(bb)
+    b_val = bld.build_rload(ctx.reg_b)
+    bld.build_ret()
+
+    assert func.entry.name == '%bb_0'
+    assert bb.name == '%bb_1'
+    assert a_val.value.name == '%0'
+    assert b_val.value.name == '%2'
+
+
+@standard_testcase
+def test_renumbering(ctx, func, bld):
+    """Test that names are updated when the function changes."""
+    a_val = bld.build_rload(ctx.reg_a)
+    b_val = bld.build_rload(ctx.reg_b)
+    bld.build_ret()
+    bb = func.entry
+    assert b_val.value.name == '%1'
+
+    bb.remove(0)
+    assert b_val.value.name == '%0'
+    assert a_val.value.name.startswith('%???')
+
+    new_entry = func.create_entry_basic_block()
+    assert new_entry.name == '%bb_0'
+    assert bb.name == '%bb_1'
+
+    func.remove(0)
+    assert bb.name == '%bb_0'
@@ -0,0 +1,84 @@
+from testsuite.utils import *
+
+from decompil import ir
+from decompil.analysis.predecessors import get_predecessors
+
+
+@standard_testcase
+def test_predecessors_building(ctx, func, bld):
+    """Test that building terminators records predecessors."""
+    then_bb = bld.create_basic_block()
+    next_bb = bld.create_basic_block()
+    cond = bld.build_eq(bld.build_rload(ctx.reg_a), bld.build_rload(ctx.reg_b))
+    bld.build_branch(cond, then_bb, next_bb)
+
+    bld.position_at_end(then_bb)
+    bld.build_jump(next_bb)
+
+    bld.position_at_end(next_bb)
+    bld.build_ret()
+
+    assert not func.entry.predecessors
+    assert set(then_bb.predecessors) == {func.entry}
+    assert set(next_bb.predecessors) == {func.entry, then_bb}
+
+
+@standard_testcase
+def test_predecessors_update(ctx, func, bld):
+    """Test that replacing and removing terminators updates predecessors."""
+    next_bb = bld.create_basic_block()
+    cond = bld.build_eq(bld.build_rload(ctx.reg_a), bld.build_rload(ctx.reg_b))
+    bld.build_branch(cond, next_bb, next_bb)
+
+    bld.position_at_end(next_bb)
+    bld.build_ret()
+
+    assert next_bb.predecessors == {func.entry: 2}
+
+    entry = func.entry
+    entry.replace(len(entry) - 1, ir.ControlFlowInstruction(
+        func, ir.JUMP, next_bb
+    ))
+    assert next_bb.predecessors == {entry: 1}
+
+    func.remove(0)
+    assert not next_bb.predecessors
+
+
+@standard_testcase
+def test_get_predecessors(ctx, func, bld):
+    """
+    Test that get_predecessors still accepts `allow_incomplete`, even for
+    functions with basic blocks without terminator.
+    """
+    next_bb = bld.create_basic_block()
+    bld.build_jump(next_bb)
+
+    for predecessors in (
+        get_predecessors(func),
+        get_predecessors(func, allow_incomplete=True),
+    ):
+        assert set(predecessors[next_bb]) == {func.entry}
+        assert not predecessors[func.entry]
+
+
+@standard_testcase
+def test_predecessors_mapping(ctx, func, bld):
+    """Test that get_predecessors returns a full mapping."""
+    next_bb = bld.create_basic_block()
+    bld.build_jump(next_bb)
+
+    bld.position_at_end(next_bb)
+    bld.build_ret()
+
+    predecessors = get_predecessors(func)
+    assert list(predecessors) == [func.entry, next_bb]
+    assert len(predecessors) == 2
+    assert next_bb in predecessors
+    assert dict(predecessors.items()) == {
+        func.entry: set(), next_bb: {func.entry},
+    }
+
+    func.remove_basic_blocks({next_bb})
+    assert next_bb not in predecessors
+    assert len(predecessors) == 1
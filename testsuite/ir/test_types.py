@@ -0,0 +1,16 @@
+from testsuite.utils import *
+
+
+@standard_testcase
+def test_interning(ctx, func, bld):
+    """Test that structurally equal types are the same object."""
+    assert ctx.create_int_type(16) is ctx.half_type
+    assert ctx.half_type.pointer is ctx.half_type.pointer
+    assert ctx.half_type.pointer is not ctx.word_type.pointer
+
+    func_type = ctx.create_function_type(ctx.void_type, [ctx.half_type])
+    assert func_type is ctx.create_function_type(
+        ctx.void_type, (ctx.half_type, )
+    )
+    assert func_type.width == ctx.pointer_width
+    assert len({ctx.half_type, ctx.create_int_type(16), func_type}) == 2
@@ -0,0 +1,42 @@
+from testsuite.utils import *
+
+from decompil import ir
+
+
+@standard_testcase
+def test_uses_building(ctx, func, bld):
+    """Test that the builder keeps use lists up to date."""
+    a_val = bld.build_rload(ctx.reg_a)
+    sum_val = bld.build_add(a_val, a_val)
+    bld.build_rstore(ctx.reg_b, sum_val)
+    bld.build_ret()
+
+    assert a_val.value.uses == {sum_val.value: 2}
+    assert set(sum_val.value.uses) == {func.entry[2]}
+
+
+@standard_testcase
+def test_uses_removal(ctx, func, bld):
+    """Test that removed instructions disappear from use lists."""
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_rstore(ctx.reg_b, a_val)
+    bld.build_rstore(ctx.reg_c, a_val)
+    bld.build_ret()
+
+    func.entry.remove(1)
+    assert set(a_val.value.uses) == {func.entry[1]}
+
+
+@standard_testcase
+def test_replace_value(ctx, func, bld):
+    """Test that replacing a value only updates its users."""
+    a_val = bld.build_rload(ctx.reg_a)
+    b_val = bld.build_rload(ctx.reg_b)
+    bld.build_rstore(ctx.reg_c, a_val)
+    bld.build_rstore(ctx.reg_d, a_val)
+    bld.build_ret()
+
+    func.replace_value(a_val, b_val)
+    assert not a_val.value.uses
+    assert set(b_val.value.uses) == {func.entry[2], func.entry[3]}
+    assert func.entry[2].value == b_val
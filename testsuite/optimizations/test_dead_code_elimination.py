@@ -0,0 +1,76 @@
+from testsuite.utils import *
+
+from decompil.interpreter import LiveValue
+from decompil.optimizations.dead_code_elimination import DeadCodeElimination
+
+
+@standard_testcase
+def test_unused_chain(ctx, func, bld):
+    """Test that long chains of unused computations are removed."""
+    a_val = bld.build_rload(ctx.reg_a)
+    value = a_val
+    for _ in range(5000):
+        value = bld.build_add(value, a_val.type.create(1))
+    bld.build_rstore(ctx.reg_b, a_val)
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, DeadCodeElimination,
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 1)},
+        {ctx.reg_b: LiveValue(ctx.reg_a.type, 1)}
+    )
+    assert len(func.entry) == 3
+    assert not a_val.value.uses.keys() - set(func.entry)
+
+
+@standard_testcase
+def test_unreachable(ctx, func, bld):
+    """Test that unreachable basic blocks and references to them go away."""
+    bb_dead = bld.create_basic_block()
+    bb_exit = bld.create_basic_block()
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_jump(bb_exit)
+
+    bld.position_at_end(bb_dead)
+    bld.build_jump(bb_exit)
+
+    bld.position_at_end(bb_exit)
+    phi = bld.build_phi([
+        (func.entry, a_val),
+        (bb_dead, a_val.type.create(2)),
+    ])
+    bld.build_rstore(ctx.reg_b, phi)
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, DeadCodeElimination,
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 1)},
+        {ctx.reg_b: LiveValue(ctx.reg_a.type, 1)}
+    )
+    assert list(func) == [func.entry, bb_exit]
+    assert set(bb_exit.predecessors) == {func.entry}
+    # The PHI node is left with a single incoming value: it is replaced with
+    # it.
+    assert all(insn.kind != ir.PHI for insn in bb_exit)
+    rstore = bb_exit.instructions[0]
+    assert rstore.kind == ir.RSTORE
+    assert rstore.value == a_val
+
+
+@standard_testcase
+def test_no_terminator(ctx, func, bld):
+    """
+    Test that basic blocks without terminator are handled like returns.
+    """
+    bb_dead = bld.create_basic_block()
+    bld.build_rstore(ctx.reg_b, bld.build_rload(ctx.reg_a))
+
+    bld.position_at_end(bb_dead)
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, DeadCodeElimination,
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 1)},
+        {ctx.reg_b: LiveValue(ctx.reg_a.type, 1)}
+    )
+    assert list(func) == [func.entry]
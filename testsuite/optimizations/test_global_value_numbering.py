@@ -0,0 +1,68 @@
+from testsuite.utils import *
+
+from decompil.interpreter import LiveValue
+from decompil.optimizations.global_value_numbering import GlobalValueNumbering
+
+
+def count_kind(func, kind):
+    return sum(
+        1
+        for basic_block in func
+        for insn in basic_block
+        if insn.kind == kind
+    )
+
+
+@standard_testcase
+def test_redundant_computation(ctx, func, bld):
+    """Test that equivalent computations in a basic block are merged."""
+    a_val = bld.build_rload(ctx.reg_a)
+    mask = ctx.reg_a.type.create(0xff)
+    bld.build_rstore(ctx.reg_b, bld.build_and(a_val, mask))
+    # Operands of commutative operations can be swapped.
+    bld.build_rstore(ctx.reg_c, bld.build_and(mask, a_val))
+    bld.build_rstore(ctx.reg_d, bld.build_or(a_val, mask))
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, GlobalValueNumbering,
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 0x1234)},
+        {
+            ctx.reg_b: LiveValue(ctx.reg_b.type, 0x34),
+            ctx.reg_c: LiveValue(ctx.reg_c.type, 0x34),
+            ctx.reg_d: LiveValue(ctx.reg_d.type, 0x12ff),
+        }
+    )
+    assert count_kind(func, ir.AND) == 1
+    assert count_kind(func, ir.OR) == 1
+
+
+@standard_testcase
+def test_dominance(ctx, func, bld):
+    """
+    Test that computations are replaced only with computations that dominate
+    them.
+    """
+    bb_then = bld.create_basic_block()
+    bb_else = bld.create_basic_block()
+    a_val = bld.build_rload(ctx.reg_a)
+    one = ctx.reg_a.type.create(1)
+    a_plus_one = bld.build_add(a_val, one)
+    bld.build_branch(
+        bld.build_eq(a_val, ctx.reg_a.type.create(0)),
+        bb_then, bb_else
+    )
+
+    bld.position_at_end(bb_then)
+    bld.build_rstore(ctx.reg_b, bld.build_add(a_val, one))
+    bld.build_rstore(ctx.reg_c, bld.build_sub(a_val, one))
+    bld.build_ret()
+
+    bld.position_at_end(bb_else)
+    bld.build_rstore(ctx.reg_b, a_plus_one)
+    bld.build_rstore(ctx.reg_c, bld.build_sub(a_val, one))
+    bld.build_ret()
+
+    assert GlobalValueNumbering.run(func) == 1
+    assert count_kind(func, ir.ADD) == 1
+    assert count_kind(func, ir.SUB) == 2
@@ -0,0 +1,95 @@
+from testsuite.utils import *
+
+from decompil.interpreter import LiveValue
+from decompil.optimizations.instruction_combining import InstructionCombining
+
+
+def get_kinds(func):
+    return [insn.kind for basic_block in func for insn in basic_block]
+
+
+@standard_testcase
+def test_split_merged_fields(ctx, func, bld):
+    """
+    Test that splitting a value made of bit fields gives back these fields.
+    """
+    half_type = ctx.create_int_type(16)
+    reg_type = ctx.reg_a.type
+    low = bld.build_trunc(half_type, bld.build_rload(ctx.reg_a))
+    high = bld.build_trunc(half_type, bld.build_rload(ctx.reg_b))
+    merged = bld.build_add(
+        bld.build_lshl(
+            bld.build_zext(reg_type, high), reg_type.create(16)
+        ),
+        bld.build_zext(reg_type, low)
+    )
+    bld.build_rstore(ctx.reg_c, bld.build_zext(
+        reg_type,
+        bld.build_trunc(
+            half_type, bld.build_lshr(merged, reg_type.create(16))
+        )
+    ))
+    bld.build_rstore(ctx.reg_d, bld.build_zext(
+        reg_type, bld.build_trunc(half_type, merged)
+    ))
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, InstructionCombining,
+        {
+            ctx.reg_a: LiveValue(reg_type, 0x12345678),
+            ctx.reg_b: LiveValue(reg_type, 0x9abcdef0),
+        },
+        {
+            ctx.reg_c: LiveValue(reg_type, 0xdef0),
+            ctx.reg_d: LiveValue(reg_type, 0x5678),
+        }
+    )
+    kinds = get_kinds(func)
+    for kind in (ir.ADD, ir.OR, ir.LSHL, ir.LSHR):
+        assert kind not in kinds
+
+
+@standard_testcase
+def test_conversion_chains(ctx, func, bld):
+    """Test that chained conversions and shifts by zero are simplified."""
+    reg_type = ctx.reg_a.type
+    byte = bld.build_trunc(
+        ctx.create_int_type(8), bld.build_rload(ctx.reg_a)
+    )
+    value = bld.build_zext(
+        reg_type, bld.build_zext(ctx.create_int_type(16), byte)
+    )
+    bld.build_rstore(
+        ctx.reg_b, bld.build_lshl(value, reg_type.create(0))
+    )
+    bld.build_ret()
+
+    assert InstructionCombining.run(func) == 2
+    assert get_kinds(func) == [
+        ir.RLOAD, ir.TRUNC, ir.ZEXT, ir.RSTORE, ir.RET
+    ]
+
+
+@standard_testcase
+def test_random_inputs(ctx, func, bld):
+    """Test that combining fields is correct for many random inputs."""
+    byte_type = ctx.create_int_type(8)
+    reg_type = ctx.reg_a.type
+    a_val = bld.build_rload(ctx.reg_a)
+    b_val = bld.build_rload(ctx.reg_b)
+    merged = bld.build_add(
+        bld.build_lshl(a_val, reg_type.create(8)),
+        bld.build_zext(reg_type, bld.build_trunc(byte_type, b_val))
+    )
+    bld.build_rstore(ctx.reg_c, bld.build_sext(
+        reg_type,
+        bld.build_trunc(byte_type, bld.build_lshr(merged, reg_type.create(8)))
+    ))
+    bld.build_rstore(ctx.reg_d, bld.build_sub(merged, b_val))
+    bld.build_ret()
+
+    check_optimization_on_random_inputs(
+        func, InstructionCombining, (ctx.reg_a, ctx.reg_b)
+    )
+    assert ir.ADD not in get_kinds(func)
@@ -0,0 +1,66 @@
+import io
+import json
+
+from testsuite.utils import *
+
+from decompil.optimizations.copy_elimination import CopyElimination
+from decompil.optimizations.dead_code_elimination import DeadCodeElimination
+from decompil.optimizations.instruction_combining import (
+    InstructionCombining
+)
+from decompil.optimizations.manager import FixedPoint, PassManager
+from decompil.optimizations.registers_to_ssa import RegistersToSSA
+
+
+@standard_testcase
+def test_fixed_point(ctx, func, bld):
+    """
+    Test that fixed point groups run until nothing changes and that each run
+    is recorded.
+    """
+    zero = ctx.reg_a.type.create(0)
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_rstore(ctx.reg_b, bld.build_add(bld.build_or(a_val, zero), zero))
+    bld.build_ret()
+
+    steps = []
+    pass_manager = PassManager(
+        [
+            RegistersToSSA,
+            CopyElimination,
+            FixedPoint([InstructionCombining, DeadCodeElimination]),
+        ],
+        lambda function, step, opt: steps.append((step, opt))
+    )
+    pass_manager.run(func)
+
+    # The second iteration changes nothing, so there is no third one.
+    assert steps == [
+        (1, RegistersToSSA),
+        (2, CopyElimination),
+        (3, InstructionCombining),
+        (4, DeadCodeElimination),
+        (5, InstructionCombining),
+        (6, DeadCodeElimination),
+    ]
+    combining_record = pass_manager.records[2]
+    assert combining_record['iteration'] == 0
+    assert combining_record['result'] > 0
+    assert (
+        combining_record['instructions_before']
+        - combining_record['instructions_after']
+        == combining_record['result']
+    )
+    assert not any(
+        insn.kind in (ir.ADD, ir.OR)
+        for basic_block in func
+        for insn in basic_block
+    )
+
+    f = io.StringIO()
+    pass_manager.write_report(f)
+    report = json.loads(f.getvalue())
+    totals = report['totals']['InstructionCombining']
+    assert totals['runs'] == 2
+    assert totals['instructions_removed'] == combining_record['result']
+    assert len(report['runs']) == 6
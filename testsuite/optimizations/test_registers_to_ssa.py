@@ -68,3 +68,30 @@ def test_simple_loop(ctx, func, bld):
 
     RegistersToSSA.process_function(func)
     material.test_simple_loop(ctx, func)
+
+
+@standard_testcase
+def test_pruned_phi(ctx, func, bld):
+    """Test that no phi node is created where a register is dead."""
+    bb_then = bld.create_basic_block()
+    bb_join = bld.create_basic_block()
+    a_val = bld.build_rload(ctx.reg_a)
+    bld.build_branch(
+        bld.build_eq(a_val, a_val.type.create(0)),
+        bb_then, bb_join
+    )
+
+    bld.position_at_end(bb_then)
+    bld.build_rstore(ctx.reg_a, a_val.type.create(1))
+    bld.build_jump(bb_join)
+
+    bld.position_at_end(bb_join)
+    bld.build_rstore(ctx.reg_a, a_val.type.create(2))
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, RegistersToSSA,
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 0)},
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 2)}
+    )
+    assert not any(insn.kind == ir.PHI for insn in bb_join)
@@ -0,0 +1,122 @@
+from testsuite.utils import *
+
+from decompil.interpreter import LiveValue
+from decompil.optimizations.sparse_conditional_constant_propagation import (
+    SparseConditionalConstantPropagation,
+)
+
+
+def build_diamond(ctx, func, bld, condition):
+    """
+    Branch on `condition` to store 1 or 2 in reg_b. Return the THEN and ELSE
+    basic blocks.
+    """
+    bb_then = bld.create_basic_block()
+    bb_else = bld.create_basic_block()
+    bb_next = bld.create_basic_block()
+    bld.build_branch(condition, bb_then, bb_else)
+
+    bld.position_at_end(bb_then)
+    bld.build_jump(bb_next)
+
+    bld.position_at_end(bb_else)
+    bld.build_jump(bb_next)
+
+    bld.position_at_end(bb_next)
+    bld.build_rstore(ctx.reg_b, bld.build_phi([
+        (bb_then, ctx.reg_b.type.create(1)),
+        (bb_else, ctx.reg_b.type.create(2)),
+    ]))
+    bld.build_ret()
+    return bb_then, bb_else
+
+
+@standard_testcase
+def test_constant_branch(ctx, func, bld):
+    """Test that branches on constant conditions are resolved."""
+    value = bld.build_mul(ctx.reg_a.type.create(2), ctx.reg_a.type.create(3))
+    bb_then, bb_else = build_diamond(
+        ctx, func, bld, bld.build_eq(value, ctx.reg_a.type.create(6))
+    )
+
+    run_before_and_after_optimization(
+        func, SparseConditionalConstantPropagation,
+        {},
+        {ctx.reg_b: LiveValue(ctx.reg_b.type, 1)}
+    )
+    assert bb_then in func
+    assert bb_else not in func
+    assert func.entry[-1].kind == ir.JUMP
+    assert func[-1][0].kind == ir.RSTORE
+
+
+@standard_testcase
+def test_known_bits(ctx, func, bld):
+    """Test that bit tests fold even when only some bits are known."""
+    a_val = bld.build_rload(ctx.reg_a)
+    mask = ctx.reg_a.type.create(0x10)
+    bit_set = bld.build_or(a_val, mask)
+    bb_then, bb_else = build_diamond(
+        ctx, func, bld,
+        bld.build_ne(bld.build_and(bit_set, mask), ctx.reg_a.type.create(0))
+    )
+
+    run_before_and_after_optimization(
+        func, SparseConditionalConstantPropagation,
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 3)},
+        {ctx.reg_b: LiveValue(ctx.reg_b.type, 1)}
+    )
+    assert bb_else not in func
+
+
+@standard_testcase
+def test_loop(ctx, func, bld):
+    """Test that values changing in a loop are not considered constant."""
+    bb_loop = bld.create_basic_block()
+    bb_exit = bld.create_basic_block()
+    bld.build_jump(bb_loop)
+
+    bld.position_at_end(bb_loop)
+    counter = bld.build_phi([
+        (func.entry, ctx.reg_a.type.create(0)),
+        (bb_loop, None),
+    ])
+    next_counter = bld.build_add(counter, ctx.reg_a.type.create(1))
+    counter.value.set_value(bb_loop, next_counter)
+    bld.build_branch(
+        bld.build_ult(next_counter, ctx.reg_a.type.create(10)),
+        bb_loop, bb_exit
+    )
+
+    bld.position_at_end(bb_exit)
+    bld.build_rstore(ctx.reg_a, next_counter)
+    bld.build_ret()
+
+    run_before_and_after_optimization(
+        func, SparseConditionalConstantPropagation,
+        {},
+        {ctx.reg_a: LiveValue(ctx.reg_a.type, 10)}
+    )
+    assert list(func) == [func.entry, bb_loop, bb_exit]
+    assert bb_loop[-1].kind == ir.BRANCH
+
+
+@standard_testcase
+def test_empty_block(ctx, func, bld):
+    """Test that empty basic blocks are handled."""
+    SparseConditionalConstantPropagation.run(func)
+    assert list(func) == [func.entry]
+    assert len(func.entry) == 0
+
+
+@standard_testcase
+def test_emptied_block(ctx, func, bld):
+    """
+    Test that basic blocks without terminator whose instructions are all
+    folded are handled.
+    """
+    bld.build_add(ctx.reg_a.type.create(1), ctx.reg_a.type.create(1))
+
+    SparseConditionalConstantPropagation.run(func)
+    assert list(func) == [func.entry]
+    assert len(func.entry) == 0
@@ -48,3 +48,42 @@ def test_inline_multiple_sub_insns(ctx, func, bld):
         # TODO: from decompil.utils import format_to_str
         # TODO: print(format_to_str(func.entry))
         assert len(func.entry) == 5
+
+
+@standard_testcase
+def test_phi_stays_in_basic_block(ctx, func, bld):
+    """Test that PHI nodes are not inlined into other basic blocks."""
+    bb_then = bld.create_basic_block()
+    bb_join = bld.create_basic_block()
+    bb_next = bld.create_basic_block()
+    a_val = bld.build_rload(ctx.reg_a)
+    zero = a_val.type.create(0)
+    bld.build_branch(bld.build_eq(a_val, zero), bb_then, bb_join)
+
+    bld.position_at_end(bb_then)
+    bld.build_jump(bb_join)
+
+    bld.position_at_end(bb_join)
+    phi = bld.build_phi([(func.entry, zero), (bb_then, a_val)])
+    bld.build_jump(bb_next)
+
+    bld.position_at_end(bb_next)
+    bld.build_rstore(ctx.reg_b, phi)
+    bld.build_ret()
+
+    ToExpr.process_function(func)
+    assert not phi.value.inline
+    assert bb_join[0] is phi.value
+
+
+@standard_testcase
+def test_deep_expression(ctx, func, bld):
+    """Test that very long chains of operations are inlined."""
+    value = bld.build_rload(ctx.reg_a)
+    for _ in range(5000):
+        value = bld.build_add(value, value.type.create(1))
+    bld.build_rstore(ctx.reg_b, value)
+    bld.build_ret()
+
+    ToExpr.process_function(func)
+    assert [insn.kind for insn in func.entry] == [ir.RLOAD, ir.RSTORE, ir.RET]
@@ -1,4 +1,5 @@
 import functools
+import random
 
 import nose.tools
 from pygments.token import *
@@ -46,7 +47,7 @@ def standard_testcase(func):
 def run_before_and_after_optimization(func, optimization, regs, expected_regs):
     for run_opt in (False, True):
         if run_opt:
-            optimization.process_function(func)
+            optimization.run(func)
         import decompil.utils
         print(decompil.utils.format_to_str(func))
 
@@ -54,3 +55,24 @@ def run_before_and_after_optimization(func, optimization, regs, expected_regs):
         interpreter.run(func, regs_copy)
         for reg, value in expected_regs.items():
             assert regs_copy[reg] == value
+
+
+def check_optimization_on_random_inputs(func, optimization, registers,
+                                        count=1000, seed=0):
+    """
+    Check that `optimization` does not change the registers `func` computes
+    from `count` random values for `registers`.
+    """
+    rng = random.Random(seed)
+    inputs = {
+        reg: [rng.getrandbits(reg.type.width) for _ in range(count)]
+        for reg in registers
+    }
+    results = []
+    for run_opt in (False, True):
+        if run_opt:
+            optimization.run(func)
+        regs = {reg: list(lanes) for reg, lanes in inputs.items()}
+        interpreter.run_batch(func, regs, count)
+        results.append(regs)
+    assert results[0] == results[1]